@@ -0,0 +1,145 @@
+import os
+import io
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ruamel.yaml import YAML
+
+from app.registry_store import FileLock
+
+logger = logging.getLogger(__name__)
+
+# (operation, service name, definition)
+Patch = Tuple[str, str, Optional[Dict[str, Any]]]
+
+
+class ComposeStore:
+    """In-memory docker-compose document with debounced, lock-serialized flushes.
+
+    The file is parsed once with a round-trip YAML loader so ordering, comments and
+    quoting survive edits. Service patches apply to the in-memory document right away
+    and a burst of patches is written back in a single flush after `debounce` seconds.
+    """
+
+    def __init__(self, path: Path, debounce: Optional[float] = None):
+        self.path = Path(path)
+        self.debounce = debounce if debounce is not None else float(os.getenv('COMPOSE_FLUSH_DEBOUNCE', '0.5'))
+        self.lock = FileLock(self.path.with_name(f".{self.path.name}.lock"))
+        self._yaml = YAML()
+        self._yaml.preserve_quotes = True
+        self._yaml.indent(mapping=2, sequence=4, offset=2)
+        self._mutex = threading.RLock()
+        self._document: Any = None
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._pending: List[Patch] = []
+        self._timer: Optional[threading.Timer] = None
+
+    def _stat_signature(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _load(self):
+        with open(self.path) as f:
+            self._document = self._yaml.load(f) or {}
+        self._signature = self._stat_signature()
+
+    def _ensure_loaded(self):
+        # Another writer (e.g. the service watcher) may have replaced the file
+        if self._document is None or self._stat_signature() != self._signature:
+            self._load()
+            for patch in self._pending:
+                self._apply(patch)
+
+    def _services(self):
+        if self._document.get('services') is None:
+            self._document['services'] = {}
+        return self._document['services']
+
+    def _apply(self, patch: Patch) -> bool:
+        operation, name, definition = patch
+        services = self._services()
+        if operation == 'add':
+            services[name] = definition
+            return True
+        if name in services:
+            del services[name]
+            return True
+        return False
+
+    def services(self) -> List[str]:
+        with self._mutex:
+            self._ensure_loaded()
+            return list(self._services())
+
+    def add_service(self, name: str, definition: Dict[str, Any]):
+        self._patch(('add', name, definition))
+
+    def remove_service(self, name: str) -> bool:
+        """Remove a service; returns False if it was not defined"""
+        return self._patch(('remove', name, None))
+
+    def _patch(self, patch: Patch) -> bool:
+        with self._mutex:
+            self._ensure_loaded()
+            applied = self._apply(patch)
+            if applied:
+                self._pending.append(patch)
+                self._schedule_flush()
+            return applied
+
+    def _schedule_flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        if self.debounce <= 0:
+            self.flush()
+            return
+        self._timer = threading.Timer(self.debounce, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self):
+        """Write pending patches back to disk atomically under the file lock"""
+        with self._mutex:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            with self.lock.hold():
+                self._ensure_loaded()
+                buffer = io.StringIO()
+                self._yaml.dump(self._document, buffer)
+                tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+                with open(tmp_path, 'w') as f:
+                    f.write(buffer.getvalue())
+                os.replace(tmp_path, self.path)
+                self._signature = self._stat_signature()
+            logger.info(f"Flushed {len(self._pending)} docker-compose change(s) to {self.path}")
+            self._pending = []
+
+
+_stores: Dict[str, ComposeStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_compose_store(path: Path) -> ComposeStore:
+    """Shared ComposeStore for a compose file path"""
+    with _stores_lock:
+        store = _stores.get(str(path))
+        if store is None:
+            store = ComposeStore(path)
+            _stores[str(path)] = store
+        return store
+
+
+def flush_compose_stores():
+    for store in list(_stores.values()):
+        try:
+            store.flush()
+        except Exception as e:
+            logger.error(f"Error flushing {store.path}: {e}")
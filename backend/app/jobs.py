@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import asyncio
+import logging
+import threading
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+TERMINAL_STATUSES = {SUCCEEDED, FAILED}
+
+# A job handler receives the submitted payload and a progress reporter
+ProgressReporter = Callable[..., None]
+JobHandler = Callable[[Dict[str, Any], ProgressReporter], Awaitable[Any]]
+
+
+class JobStore:
+    """Durable SQLite store for jobs and their progress events"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv('JOB_STORE_PATH', '/app/data/jobs.sqlite3')
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " stage TEXT,"
+            " result TEXT,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS job_events ("
+            " job_id TEXT NOT NULL,"
+            " seq INTEGER NOT NULL,"
+            " data TEXT NOT NULL,"
+            " PRIMARY KEY (job_id, seq))"
+        )
+
+    def create(self, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, kind, payload, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), QUEUED, now, now),
+            )
+        return self.get(job_id)
+
+    def update(self, job_id: str, **fields):
+        fields["updated_at"] = time.time()
+        for key in ("result",):
+            if key in fields and fields[key] is not None:
+                fields[key] = json.dumps(fields[key])
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._lock:
+            self._db.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id: str, include_payload: bool = False) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = {
+            "id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "stage": row["stage"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "createdAt": row["created_at"],
+            "updatedAt": row["updated_at"],
+        }
+        if include_payload:
+            job["payload"] = json.loads(row["payload"])
+        return job
+
+    def unfinished(self) -> List[str]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def add_event(self, job_id: str, event: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            seq = self._db.execute(
+                "SELECT COALESCE(MAX(seq), 0) + 1 FROM job_events WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+            event = {"seq": seq, **event}
+            self._db.execute(
+                "INSERT INTO job_events (job_id, seq, data) VALUES (?, ?, ?)", (job_id, seq, json.dumps(event))
+            )
+        return event
+
+    def events(self, job_id: str, after: int = 0) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT data FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq", (job_id, after)
+            ).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class JobQueue:
+    """Worker pool that runs durable jobs and fans progress out to subscribers"""
+
+    def __init__(self, store: JobStore, workers: Optional[int] = None):
+        self.store = store
+        self.workers = workers or int(os.getenv('JOB_WORKERS', '2'))
+        self._handlers: Dict[str, JobHandler] = {}
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    def register(self, kind: str, handler: JobHandler):
+        self._handlers[kind] = handler
+
+    async def start(self):
+        # Anything queued or interrupted mid-run before a restart is picked up again
+        for job_id in self.store.unfinished():
+            self.store.update(job_id, status=QUEUED)
+            self._queue.put_nowait(job_id)
+            logger.info(f"Recovered job {job_id}")
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, int]:
+        return {"workers": self.workers, "queued": self._queue.qsize()}
+
+    def submit(self, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind {kind}")
+        job = self.store.create(kind, payload)
+        self._queue.put_nowait(job["id"])
+        self._publish(job["id"], {"stage": QUEUED, "status": QUEUED, "position": self._queue.qsize()})
+        return job
+
+    def _publish(self, job_id: str, event: Dict[str, Any]):
+        event = self.store.add_event(job_id, {"timestamp": time.time(), **event})
+        for subscriber in self._subscribers.get(job_id, ()):
+            subscriber.put_nowait(event)
+
+    def reporter(self, job_id: str) -> ProgressReporter:
+        def report(stage: str, message: Optional[str] = None, **data):
+            self.store.update(job_id, stage=stage)
+            self._publish(job_id, {"stage": stage, "status": RUNNING, "message": message, **data})
+        return report
+
+    async def _worker(self, index: int):
+        while True:
+            job_id = await self._queue.get()
+            job = self.store.get(job_id, include_payload=True)
+            if job is None or job["status"] in TERMINAL_STATUSES:
+                continue
+
+            self.store.update(job_id, status=RUNNING, stage="started")
+            self._publish(job_id, {"stage": "started", "status": RUNNING, "worker": index})
+            try:
+                result = await self._handlers[job["kind"]](job["payload"], self.reporter(job_id))
+                self.store.update(job_id, status=SUCCEEDED, stage="completed", result=result)
+                self._publish(job_id, {"stage": "completed", "status": SUCCEEDED})
+            except asyncio.CancelledError:
+                # Left as running so it is recovered on the next start
+                raise
+            except Exception as e:
+                detail = getattr(e, "detail", None) or str(e)
+                logger.error(f"Job {job_id} failed: {detail}")
+                self.store.update(job_id, status=FAILED, error=detail)
+                self._publish(job_id, {"stage": "failed", "status": FAILED, "error": detail})
+
+    async def events(self, job_id: str, keepalive: float = 15.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Yield every event for a job, replaying history first; None is yielded as a keepalive"""
+        subscriber: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(subscriber)
+        try:
+            last_seq = 0
+            for event in self.store.events(job_id):
+                last_seq = event["seq"]
+                yield event
+                if event["status"] in TERMINAL_STATUSES:
+                    return
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event["seq"] <= last_seq:
+                    continue
+                last_seq = event["seq"]
+                yield event
+                if event["status"] in TERMINAL_STATUSES:
+                    return
+        finally:
+            self._subscribers[job_id].discard(subscriber)
+            if not self._subscribers[job_id]:
+                del self._subscribers[job_id]
@@ -0,0 +1,153 @@
+import os
+import random
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """Raised when a chat completion fails after all retries"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class QueueTicket:
+    """A caller waiting for a free LLM slot"""
+
+    def __init__(self, on_position: Optional[Callable[[int], None]] = None):
+        self.on_position = on_position
+        self.position = 0
+
+
+class LLMClient:
+    """Async OpenAI-compatible chat client with bounded concurrency and retries"""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        backoff_base: Optional[float] = None,
+        backoff_max: Optional[float] = None,
+    ):
+        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+        self.base_url = (base_url or os.getenv('OPENAI_BASE_URL', 'https://api.openai.com/v1')).rstrip('/')
+        self.max_concurrency = max_concurrency or int(os.getenv('LLM_MAX_CONCURRENCY', '4'))
+        self.timeout = timeout or float(os.getenv('LLM_TIMEOUT', '60'))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('LLM_MAX_RETRIES', '4'))
+        self.backoff_base = backoff_base or float(os.getenv('LLM_BACKOFF_BASE', '0.5'))
+        self.backoff_max = backoff_max or float(os.getenv('LLM_BACKOFF_MAX', '20'))
+
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._waiting: List[QueueTicket] = []
+        self._in_flight = 0
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                limits=httpx.Limits(max_connections=self.max_concurrency),
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "queued": len(self._waiting),
+        }
+
+    def _notify_positions(self):
+        for index, ticket in enumerate(self._waiting, start=1):
+            if ticket.position != index:
+                ticket.position = index
+                if ticket.on_position:
+                    ticket.on_position(index)
+
+    async def _acquire(self, on_position: Optional[Callable[[int], None]]):
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            return
+
+        ticket = QueueTicket(on_position)
+        self._waiting.append(ticket)
+        self._notify_positions()
+        logger.info(f"LLM call queued at position {ticket.position}")
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting.remove(ticket)
+            self._notify_positions()
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        # Full jitter: uniform in [0, base * 2^attempt], capped
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "gpt-4",
+        temperature: float = 0.1,
+        timeout: Optional[float] = None,
+        on_queue_position: Optional[Callable[[int], None]] = None,
+    ) -> str:
+        """Run a chat completion and return the message content"""
+        await self._acquire(on_queue_position)
+        self._in_flight += 1
+        try:
+            return await self._chat_with_retries(messages, model, temperature, timeout or self.timeout)
+        finally:
+            self._in_flight -= 1
+            self._semaphore.release()
+
+    async def _chat_with_retries(self, messages, model, temperature, timeout) -> str:
+        payload: Dict[str, Any] = {"model": model, "messages": messages, "temperature": temperature}
+        last_error: Optional[LLMError] = None
+
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                response = await self._http().post("/chat/completions", json=payload, timeout=timeout)
+                if response.status_code == 200:
+                    return response.json()["choices"][0]["message"]["content"]
+
+                last_error = LLMError(
+                    f"LLM request failed with status {response.status_code}: {response.text[:200]}",
+                    status_code=response.status_code,
+                )
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    raise last_error
+                retry_after = response.headers.get("retry-after")
+            except httpx.TimeoutException:
+                last_error = LLMError(f"LLM request timed out after {timeout}s")
+            except httpx.TransportError as e:
+                last_error = LLMError(f"LLM transport error: {e}")
+
+            if attempt < self.max_retries:
+                delay = self._backoff(attempt, retry_after)
+                logger.warning(f"{last_error}; retrying in {delay:.2f}s (attempt {attempt + 1}/{self.max_retries})")
+                await asyncio.sleep(delay)
+
+        raise last_error
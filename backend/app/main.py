@@ -1,45 +1,76 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, Any, List, Optional
 import os
-import yaml
+import re
 import json
+import pprint
 import shutil
 from pathlib import Path
-import subprocess
 import logging
 from datetime import datetime
-import openai
+from functools import lru_cache
 import asyncio
+import httpx
+
+from app.llm_client import LLMClient
+from app.prompt_cache import PromptCache, prompt_cache_key
+from app.jobs import JobQueue, JobStore
+from app.registry_store import FileLock, atomic_write_json, atomic_write_text, get_registry_store
+from app.compose_store import flush_compose_stores, get_compose_store
+from app.templating import get_templates
+from app.rule_engine import compile_rules
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Create async version of subprocess.exec
-async def execAsync(command: str):
-    """Execute a shell command asynchronously"""
-    process = await asyncio.create_subprocess_shell(
-        command,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE
-    )
-    stdout, stderr = await process.communicate()
-    
-    if process.returncode != 0:
-        raise Exception(f"Command failed with exit code {process.returncode}: {stderr.decode()}")
-        
-    return stdout.decode()
-
 # Configure OpenAI
 if not os.getenv('OPENAI_API_KEY'):
     raise ValueError("OPENAI_API_KEY environment variable is required")
 
-openai.api_key = os.getenv('OPENAI_API_KEY')
-
 app = FastAPI()
 
+PROMPT_MODEL = "gpt-4"
+PROMPT_TEMPERATURE = 0.1
+CREATE_ANALYZER_JOB = "create-analyzer"
+CREATE_ANALYZERS_JOB = "create-analyzers"
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '4'))
+
+# Created on startup so their asyncio primitives bind to the server's event loop
+llm_client: Optional[LLMClient] = None
+prompt_cache: Optional[PromptCache] = None
+job_store: Optional[JobStore] = None
+job_queue: Optional[JobQueue] = None
+
+@app.on_event("startup")
+async def startup():
+    """Create the shared LLM client, prompt cache and job workers"""
+    global llm_client, prompt_cache, job_store, job_queue
+    get_templates()
+    llm_client = LLMClient()
+    prompt_cache = PromptCache()
+    job_store = JobStore()
+    job_queue = JobQueue(job_store)
+    job_queue.register(CREATE_ANALYZER_JOB, run_create_analyzer_job)
+    job_queue.register(CREATE_ANALYZERS_JOB, run_create_analyzers_job)
+    await job_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop job workers, flush pending compose edits and close shared clients"""
+    if job_queue is not None:
+        await job_queue.stop()
+    flush_compose_stores()
+    if job_store is not None:
+        job_store.close()
+    if llm_client is not None:
+        await llm_client.aclose()
+    if prompt_cache is not None:
+        prompt_cache.close()
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -51,7 +82,10 @@ app.add_middleware(
 
 # Constants
 FRONTEND_SRC_PATH = os.getenv('FRONTEND_SRC_PATH', '/app/src')
-GATEWAY_SERVICES_PATH = '/app/gateway/services.json'
+GATEWAY_SERVICES_PATH = os.getenv('GATEWAY_SERVICES_PATH', '/app/gateway/services.json')
+COMPOSE_PATH = os.getenv('COMPOSE_PATH', '/app/docker-compose.yml')
+# When set, analyzers are served by one shared analyzer host (host/) instead of a container each
+ANALYZER_HOST_URL = os.getenv('ANALYZER_HOST_URL')
 
 # Pydantic models to match frontend structure
 class Input(BaseModel):
@@ -93,58 +127,51 @@ class CreateAnalyzerResponse(BaseModel):
     error: Optional[str] = None
     details: Optional[str] = None
 
-def update_registry(component_name: str, route_name: str, config: AnalyzerConfig, base_path: Path):
-    """Update the analyzers registry with the new analyzer"""
+def registry_entry(component_name: str, route_name: str, config: AnalyzerConfig) -> Dict[str, Any]:
+    return {
+        "name": config.name,
+        "componentName": component_name,
+        "configPath": f"config/analyzers/{route_name}.json",
+        "pythonPath": f"analyticscode/{route_name}/main.py"
+    }
+
+def registry_path_for(base_path: Path) -> Path:
+    # Update path to match frontend structure
+    return base_path / "app" / "analyzers" / "registry.json"
+
+def update_registry_entries(entries: Dict[str, Dict[str, Any]], base_path: Path):
+    """Add or replace several analyzers in the registry in one locked, atomic commit"""
     try:
-        # Update path to match frontend structure
-        registry_path = base_path / "app" / "analyzers" / "registry.json"
-        logger.info(f"Registry path: {registry_path}")
-        
-        # Ensure directory exists
-        registry_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        # Read existing registry or create new
-        if registry_path.exists():
-            logger.info("Reading existing registry")
-            try:
-                with open(registry_path, 'r') as f:
-                    registry = json.load(f)
-                logger.info(f"Existing registry content: {registry}")
-            except Exception as e:
-                logger.error(f"Error reading registry: {e}")
-                registry = {}
-        else:
-            logger.info("Creating new registry")
-            registry = {}
-
-        # Add new analyzer to registry
-        registry[route_name] = {
-            "name": config.name,
-            "componentName": component_name,
-            "configPath": f"config/analyzers/{route_name}.json",
-            "pythonPath": f"analyticscode/{route_name}/main.py"
-        }
-        
-        logger.info(f"Updated registry content: {registry}")
-
-        # Write updated registry
-        try:
-            with open(registry_path, 'w') as f:
-                json.dump(registry, f, indent=2)
-            logger.info(f"Successfully wrote to registry file")
-        except Exception as e:
-            logger.error(f"Error writing to registry: {e}")
-            raise
-            
-        logger.info(f"Updated registry with {route_name}")
-        
+        get_registry_store(registry_path_for(base_path)).put_many(entries)
+        logger.info(f"Updated registry with {', '.join(entries)}")
     except Exception as e:
         logger.error(f"Error updating registry: {e}")
         logger.error("Full traceback: ", exc_info=True)
         raise
 
-@app.post("/create-analyzer")
-async def create_analyzer(config: AnalyzerConfig):
+def commit_analyzers(entries: Dict[str, Dict[str, Any]], base_path: Path) -> List[str]:
+    """Commit analyzers to the registry, then register what it committed with the gateway.
+
+    The registry is the record of which analyzers exist, so it is written first and the
+    gateway services are derived from its committed entries in one locked write. The two
+    files cannot change together; if the gateway write fails the caller's cleanup_files
+    removes the registry entries again.
+    """
+    update_registry_entries(entries, base_path)
+    registry = get_registry_store(registry_path_for(base_path)).all()
+    committed = [route_name for route_name in entries if route_name in registry]
+    register_services_with_gateway(committed)
+    return committed
+
+def update_registry(component_name: str, route_name: str, config: AnalyzerConfig, base_path: Path):
+    """Update the analyzers registry with the new analyzer"""
+    update_registry_entries({route_name: registry_entry(component_name, route_name, config)}, base_path)
+
+def _ignore_progress(stage: str, message: Optional[str] = None, **data):
+    pass
+
+async def build_analyzer(config: AnalyzerConfig, report=_ignore_progress) -> Dict[str, Any]:
+    """Run every stage of analyzer creation, cleaning up generated files on failure"""
     try:
         logger.info(f"Creating analyzer: {config.name}")
         
@@ -154,287 +181,320 @@ async def create_analyzer(config: AnalyzerConfig):
 
         # Format prompt with AI
         logger.info("Getting formatted prompt...")
-        formatted_prompt = await format_prompt_with_ai(config)
+        report("formatting_prompt", "Formatting prompt with AI")
+        formatted_prompt = await format_prompt_with_ai(
+            config,
+            on_queue_position=lambda position: report(
+                "formatting_prompt", "Waiting for a free LLM slot", queuePosition=position
+            ),
+        )
         
         # Generate Python files
         logger.info("Generating Python files...")
-        generate_python_code(component_name, route_name, config, base_path)
+        report("generating_code", "Generating analyzer files")
+        await asyncio.to_thread(generate_python_code, component_name, route_name, config, base_path)
         logger.info("All files created successfully")
 
         # Update registry
         logger.info("Updating analyzer registry...")
-        update_registry(component_name, route_name, config, base_path)
+        report("updating_registry", "Updating analyzer registry")
+        await asyncio.to_thread(update_registry, component_name, route_name, config, base_path)
         logger.info("Registry updated successfully")
 
+        # Expose the analyzer through the gateway proxy
+        report("registering_gateway", "Registering analyzer with gateway")
+        await register_with_gateway(config, component_name, route_name)
+
         # The watch-services.js will handle Docker operations
         return {
-            "success": True,
-            "analyzer": {
-                "name": config.name,
-                "componentName": component_name,
-                "routeName": route_name,
-                "analyzerType": config.analyzerType,
-                "structure": config.structure.dict(),
-                "systemPrompt": config.systemPrompt.dict(),
-                "userPrompt": config.userPrompt
-            }
+            "name": config.name,
+            "componentName": component_name,
+            "routeName": route_name,
+            "analyzerType": config.analyzerType,
+            "structure": config.structure.dict(),
+            "systemPrompt": config.systemPrompt.dict(),
+            "userPrompt": config.userPrompt
         }
 
     except Exception as e:
         logger.error(f"Error creating analyzer: {str(e)}")
         if 'component_name' in locals() and 'route_name' in locals() and 'base_path' in locals():
             cleanup_files(component_name, route_name, base_path)
+        raise
+
+async def run_create_analyzer_job(payload: Dict[str, Any], report) -> Dict[str, Any]:
+    """Job handler for queued analyzer creation"""
+    return await build_analyzer(AnalyzerConfig(**payload), report)
+
+async def build_analyzers_batch(configs: List[AnalyzerConfig], report=_ignore_progress) -> Dict[str, Any]:
+    """Create several analyzers with concurrent prompt formatting and file generation and one registry commit"""
+    base_path = Path(os.getenv('FRONTEND_SRC_PATH', '/app/src'))
+    limit = asyncio.Semaphore(BATCH_CONCURRENCY)
+    names = []
+    results = []
+    for config in configs:
+        component_name = f"{config.name.replace(' ', '')}Analyzer"
+        names.append((component_name, component_name.lower()))
+        results.append({"name": config.name, "routeName": component_name.lower(), "success": False})
+
+    # Only the first occurrence of a route name in the batch is created
+    first_index = {}
+    for index, (_, route_name) in enumerate(names):
+        first_index.setdefault(route_name, index)
+    duplicates = {index for index, (_, route_name) in enumerate(names) if first_index[route_name] != index}
+
+    async def prepare(index: int, config: AnalyzerConfig):
+        component_name, route_name = names[index]
+        async with limit:
+            report("formatting_prompt", f"Formatting prompt for {config.name}", item=index)
+            await format_prompt_with_ai(config)
+
+        report("generating_code", f"Generating files for {config.name}", item=index)
+        await asyncio.to_thread(generate_python_code, component_name, route_name, config, base_path)
+
+    candidates = [index for index in range(len(configs)) if index not in duplicates]
+    outcomes = await asyncio.gather(
+        *(prepare(index, configs[index]) for index in candidates),
+        return_exceptions=True
+    )
+
+    for index in duplicates:
+        results[index]["error"] = f"Duplicate analyzer {names[index][1]} in batch"
+
+    prepared = []
+    for index, outcome in zip(candidates, outcomes):
+        if isinstance(outcome, BaseException):
+            results[index]["error"] = getattr(outcome, "detail", None) or str(outcome)
+            logger.error(f"Batch item {configs[index].name} failed: {results[index]['error']}")
+            cleanup_files(names[index][0], names[index][1], base_path)
+        else:
+            prepared.append(index)
+
+    if prepared:
+        # Commit every prepared analyzer to the registry and then the gateway in a single write each
+        report("updating_registry", f"Registering {len(prepared)} analyzers")
+        entries = {
+            names[index][1]: registry_entry(names[index][0], names[index][1], configs[index])
+            for index in prepared
+        }
+        try:
+            committed = await asyncio.to_thread(commit_analyzers, entries, base_path)
+        except Exception as e:
+            # cleanup_files drops the registry entries and any gateway routes written above
+            logger.error(f"Error committing batch: {e}")
+            for index in prepared:
+                results[index]["error"] = f"Registry commit failed: {str(e)}"
+                cleanup_files(names[index][0], names[index][1], base_path)
+        else:
+            for index in prepared:
+                results[index]["success"] = True
+                results[index]["componentName"] = names[index][0]
+            await load_in_analyzer_host(committed)
+
+    succeeded = sum(1 for result in results if result["success"])
+    return {
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results
+    }
+
+async def run_create_analyzers_job(payload: Dict[str, Any], report) -> Dict[str, Any]:
+    """Job handler for queued batch analyzer creation"""
+    configs = [AnalyzerConfig(**config) for config in payload["analyzers"]]
+    return await build_analyzers_batch(configs, report)
+
+def job_links(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "success": True,
+        "jobId": job["id"],
+        "status": job["status"],
+        "statusUrl": f"/jobs/{job['id']}",
+        "eventsUrl": f"/jobs/{job['id']}/events"
+    }
+
+@app.post("/create-analyzer", status_code=202)
+async def create_analyzer(config: AnalyzerConfig):
+    """Queue analyzer creation and return the job id right away"""
+    try:
+        job = job_queue.submit(CREATE_ANALYZER_JOB, config.dict())
+        logger.info(f"Queued analyzer {config.name} as job {job['id']}")
+        return job_links(job)
+    except Exception as e:
+        logger.error(f"Error queueing analyzer: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-async def register_with_gateway(config: AnalyzerConfig, component_name: str, route_name: str):
-    """Register the new analyzer service with the gateway"""
+@app.post("/create-analyzers", status_code=202)
+async def create_analyzers(configs: List[AnalyzerConfig]):
+    """Queue creation of several analyzers as one batch job"""
     try:
-        services_path = Path(GATEWAY_SERVICES_PATH)
-        services = []
-        
+        job = job_queue.submit(CREATE_ANALYZERS_JOB, {"analyzers": [config.dict() for config in configs]})
+        logger.info(f"Queued batch of {len(configs)} analyzers as job {job['id']}")
+        return job_links(job)
+    except Exception as e:
+        logger.error(f"Error queueing analyzer batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Current status of a queued job"""
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-sent events stream of a job's progress through each stage"""
+    if job_store.get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+    async def stream():
+        async for event in job_queue.events(job_id):
+            if event is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"id: {event['seq']}\nevent: {event['stage']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+gateway_services_lock = FileLock(Path(GATEWAY_SERVICES_PATH).with_name(".services.json.lock"))
+
+def gateway_service_entry(route_name: str) -> Dict[str, Any]:
+    return {
+        "name": route_name,
+        "url": f"{ANALYZER_HOST_URL.rstrip('/')}/{route_name}" if ANALYZER_HOST_URL else f"http://{route_name}:8000",
+        "health_check": "/health",
+        "routes": [
+            {
+                "path": f"/api/{route_name}",
+                # GET and DELETE reach /incremental/{dataset} under the route
+                "methods": ["GET", "POST", "DELETE"],
+                "target": "/analyze"
+            }
+        ]
+    }
+
+def register_services_with_gateway(route_names: List[str]):
+    """Register several analyzer services with the gateway in one locked write"""
+    services_path = Path(GATEWAY_SERVICES_PATH)
+    services = []
+    
+    with gateway_services_lock.hold():
         # Load existing services
         if services_path.exists():
             with open(services_path) as f:
                 services = json.load(f)
 
-        # Add new service
-        new_service = {
-            "name": route_name,
-            "url": f"http://{route_name}:8000",
-            "health_check": "/health",
-            "routes": [
-                {
-                    "path": f"/api/{route_name}",
-                    "methods": ["POST"],
-                    "target": "/analyze"
-                }
-            ]
-        }
-
-        # Update services list
-        services.append(new_service)
+        # Update services list, replacing any previous registration
+        services = [service for service in services if service.get("name") not in route_names]
+        services.extend(gateway_service_entry(route_name) for route_name in route_names)
 
         # Write updated services back to file
-        with open(services_path, 'w') as f:
-            json.dump(services, f, indent=2)
-
-        logger.info(f"Registered analyzer {route_name} with gateway")
+        atomic_write_json(services_path, services)
+    logger.info(f"Registered analyzers {', '.join(route_names)} with gateway")
 
+async def register_with_gateway(config: AnalyzerConfig, component_name: str, route_name: str):
+    """Register the new analyzer service with the gateway"""
+    try:
+        register_services_with_gateway([route_name])
     except Exception as e:
         logger.error(f"Failed to register with gateway: {e}")
         raise
+    await load_in_analyzer_host([route_name])
+
+async def load_in_analyzer_host(route_names: List[str]):
+    """Ask the analyzer host to load new analyzers now rather than on its next scan of the code directory"""
+    if not ANALYZER_HOST_URL:
+        return
+    async with httpx.AsyncClient(base_url=ANALYZER_HOST_URL, timeout=60) as client:
+        for route_name in route_names:
+            try:
+                response = await client.put(f"/analyzers/{route_name}")
+                response.raise_for_status()
+            except Exception as e:
+                logger.error(f"Analyzer host did not load {route_name}: {e}")
 
-async def generate_files(config: AnalyzerConfig, component_name: str, route_name: str, base_path: Path):
-    """Generate all necessary files for the analyzer"""
-    try:
-        # Create directories if they don't exist
-        directories = [
-            base_path / "components" / "analyzers",
-            base_path / "config" / "analyzers",
-            base_path / "analyticscode" / route_name
-        ]
-        for directory in directories:
-            directory.mkdir(parents=True, exist_ok=True)
+def unregister_from_gateway(route_name: str):
+    """Remove an analyzer service from the gateway registry"""
+    services_path = Path(GATEWAY_SERVICES_PATH)
+    with gateway_services_lock.hold():
+        if not services_path.exists():
+            return
 
-        # Generate files
-        await generate_component_file(config, component_name, base_path)
-        await generate_config_file(config, route_name, base_path)
-        await generate_python_files(config, route_name, base_path)
-        await update_registry(config, component_name, route_name, base_path)
-        await update_docker_compose(route_name)
+        with open(services_path) as f:
+            services = json.load(f)
 
-    except Exception as e:
-        logger.error(f"Error generating files: {str(e)}")
-        cleanup_files(component_name, route_name, base_path)
-        raise
+        remaining = [service for service in services if service.get("name") != route_name]
+        if len(remaining) != len(services):
+            atomic_write_json(services_path, remaining)
+            logger.info(f"Unregistered analyzer {route_name} from gateway")
 
 async def generate_component_file(config: AnalyzerConfig, component_name: str, base_path: Path):
     """Generate the React component file"""
     component_path = base_path / "components" / "analyzers" / f"{component_name}.tsx"
     
-    # Component template code here...
-    component_content = f"""
-import React from 'react';
-import {{ AnalyzerProps }} from '../../types/analyzer';
-
-interface {component_name}Result {{
-  {generate_typescript_interfaces(config.structure.outputs)}
-}}
-
-const {component_name}: React.FC<AnalyzerProps> = ({{
-  spreadsheet,
-  onAnalysisComplete,
-  renderCustomButton
-}}) => {{
-  const [isAnalyzing, setIsAnalyzing] = React.useState(false);
-  const [error, setError] = React.useState<string | null>(null);
-
-  const handleAnalysis = async () => {{
-    setIsAnalyzing(true);
-    setError(null);
-    try {{
-      const response = await fetch('/api/{route_name}', {{
-        method: 'POST',
-        headers: {{ 'Content-Type': 'application/json' }},
-        body: JSON.stringify({{ spreadsheet }})
-      }});
-
-      if (!response.ok) {{
-        const errorData = await response.json();
-        throw new Error(errorData.message || 'Analysis failed');
-      }}
-      
-      const result = await response.json() as {component_name}Result;
-      onAnalysisComplete(result, "{config.name}");
-    }} catch (error) {{
-      console.error('Analysis error:', error);
-      setError(error instanceof Error ? error.message : 'Analysis failed');
-    }} finally {{
-      setIsAnalyzing(false);
-    }}
-  }};
-
-  return (
-    <div>
-      {{renderCustomButton ? 
-        renderCustomButton(handleAnalysis, isAnalyzing) : 
-        <button 
-          onClick={{handleAnalysis}} 
-          disabled={{isAnalyzing}}
-          className="px-4 py-2 bg-blue-500 text-white rounded hover:bg-blue-600 disabled:bg-gray-400"
-        >
-          {{isAnalyzing ? 'Analyzing...' : '{config.name}'}}
-        </button>
-      }}
-      {{error && <div className="text-red-500 mt-2">{{error}}</div>}}
-    </div>
-  );
-}};
-
-export default {component_name};
-"""
+    component_content = get_templates().render(
+        "component.tsx",
+        component_name=component_name,
+        route_name=component_name.lower(),
+        analyzer_name=config.name,
+        result_interface=generate_typescript_interfaces(config.structure.outputs),
+    )
     
     with open(component_path, 'w') as f:
         f.write(component_content)
 
-async def format_prompt_with_ai(config: AnalyzerConfig):
-    """Format the analysis prompt using OpenAI"""
+async def format_prompt_with_ai(config: AnalyzerConfig, on_queue_position=None):
+    """Format the analysis prompt using OpenAI, reusing cached results for identical configs"""
     try:
         # Convert Pydantic model to dict before using
         structure_dict = config.structure.dict()
-        
-        # Use synchronous call without await
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {
-                    "role": "system",
-                    "content": f"""You are an AI prompt formatter specializing in data analysis. Format this prompt considering:
-                    1. Input fields: {structure_dict['inputs']}
-                    2. Analysis rules: {structure_dict['rules']}
-                    3. Required outputs: {structure_dict['outputs']}
-                    4. Analyzer type: {config.analyzerType}
-                    
-                    Format the prompt to be clear and specific about the analysis requirements."""
-                },
-                {
-                    "role": "user",
-                    "content": f"Format this analysis prompt: {config.userPrompt}"
-                }
-            ],
-            temperature=0.1,
-        )
 
-        formatted_prompt = response.choices[0].message['content']
-        return formatted_prompt
+        async def request_formatted_prompt():
+            return await llm_client.chat(
+                model=PROMPT_MODEL,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": f"""You are an AI prompt formatter specializing in data analysis. Format this prompt considering:
+                        1. Input fields: {structure_dict['inputs']}
+                        2. Analysis rules: {structure_dict['rules']}
+                        3. Required outputs: {structure_dict['outputs']}
+                        4. Analyzer type: {config.analyzerType}
+                        
+                        Format the prompt to be clear and specific about the analysis requirements."""
+                    },
+                    {
+                        "role": "user",
+                        "content": f"Format this analysis prompt: {config.userPrompt}"
+                    }
+                ],
+                temperature=PROMPT_TEMPERATURE,
+                on_queue_position=on_queue_position,
+            )
+
+        cache_key = prompt_cache_key(
+            structure_dict, config.analyzerType, config.userPrompt, PROMPT_MODEL, PROMPT_TEMPERATURE
+        )
+        return await prompt_cache.get_or_compute(cache_key, request_formatted_prompt)
 
     except Exception as e:
         logger.error(f"Error formatting prompt: {e}")
         logger.error("Full traceback: ", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error formatting prompt: {str(e)}")
 
-def extract_python_code(content: str) -> Optional[str]:
-    """Extract Python code from markdown-formatted text"""
-    import re
-    python_code_regex = r"```python\n([\s\S]*?)```"
-    match = re.search(python_code_regex, content)
-    return match.group(1).strip() if match else None
-
-async def generate_python_files(config: AnalyzerConfig, route_name: str, base_path: Path):
-    """Generate Python implementation files"""
-    try:
-        # Get AI-formatted prompt and outputs
-        formatted_prompt, outputs = await format_prompt_with_ai(config)
-        
-        # Extract Python code from formatted prompt
-        python_implementation = extract_python_code(formatted_prompt)
-        if not python_implementation:
-            raise ValueError("Failed to generate Python implementation")
-
-        analytics_path = base_path / "analyticscode" / route_name
-        
-        # Generate main.py with FastAPI implementation
-        main_py_content = generate_fastapi_wrapper(
-            python_implementation,
-            config.name,
-            outputs
-        )
-        
-        with open(analytics_path / "main.py", "w") as f:
-            f.write(main_py_content)
-
-        # Generate other necessary files
-        generate_requirements(analytics_path)
-        generate_dockerfile(analytics_path)
-        
-    except Exception as e:
-        logger.error(f"Error generating Python files: {str(e)}")
-        raise
-
 def generate_fastapi_wrapper(implementation: str, analyzer_name: str, outputs: List[Dict[str, Any]]) -> str:
     """Generate the FastAPI wrapper code"""
-    return f"""
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Dict, Any, List
-import pandas as pd
-import logging
-
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-app = FastAPI()
-
-{implementation}
-
-@app.post("/analyze")
-async def analyze_endpoint(request: dict):
-    try:
-        # Convert input data to DataFrame
-        df = pd.DataFrame(request["spreadsheet"])
-        
-        # Run analysis
-        result = analyze_data(df)
-        
-        return {{
-            "status": "success",
-            "results": result,
-            "metadata": {{
-                "analyzer": "{analyzer_name}",
-                "version": "1.0.0"
-            }}
-        }}
-    except Exception as e:
-        logger.error(f"Analysis error: {str(e)}")
-        raise HTTPException(status_code=400, detail=str(e))
-
-@app.get("/health")
-async def health_check():
-    return {{"status": "healthy"}}
-"""
-
-# Add other necessary functions like generate_config_file, generate_python_files, etc. 
+    return get_templates().render(
+        "fastapi_wrapper.py",
+        implementation=implementation,
+        analyzer_name_literal=repr(analyzer_name),
+    )
 
 @app.get("/health")
 async def health_check():
@@ -454,7 +514,10 @@ async def health_check():
             "checks": {
                 "openai_api": openai_status,
                 "src_path": src_path_status
-            }
+            },
+            "llm": llm_client.stats() if llm_client else None,
+            "prompt_cache": prompt_cache.stats() if prompt_cache else None,
+            "jobs": job_queue.stats() if job_queue else None
         }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
@@ -472,7 +535,10 @@ async def root():
         "status": "running",
         "endpoints": {
             "health": "/health",
-            "create_analyzer": "/create-analyzer"
+            "create_analyzer": "/create-analyzer",
+            "create_analyzers": "/create-analyzers",
+            "job_status": "/jobs/{job_id}",
+            "job_events": "/jobs/{job_id}/events"
         }
     } 
 
@@ -516,45 +582,28 @@ def cleanup_files(component_name: str, route_name: str, base_path: Path):
                     raise
 
         # 3. Update registry
-        registry_path = base_path / "app" / "analyzers" / "registry.json"
-        logger.info(f"Checking registry at: {registry_path}")
-        if registry_path.exists():
-            try:
-                # Read current registry
-                with open(registry_path, 'r') as f:
-                    registry = json.load(f)
-                    logger.info(f"Current registry contents: {registry}")
-                
-                # Remove analyzer entry if exists
-                if route_name in registry:
-                    removed_entry = registry.pop(route_name)
-                    logger.info(f"Removing entry from registry: {removed_entry}")
-                    
-                    # Write updated registry
-                    with open(registry_path, 'w') as f:
-                        json.dump(registry, f, indent=2)
-                    logger.info(f"Successfully updated registry")
-                else:
-                    logger.warning(f"No entry found in registry for {route_name}")
-            except Exception as e:
-                logger.error(f"Error updating registry: {e}")
-                raise
+        try:
+            removed_entry = get_registry_store(registry_path_for(base_path)).remove(route_name)
+            if removed_entry is not None:
+                logger.info(f"Removed {route_name} from registry")
+            else:
+                logger.warning(f"No entry found in registry for {route_name}")
+        except Exception as e:
+            logger.error(f"Error updating registry: {e}")
+            raise
+
+        # 4. Remove gateway route
+        try:
+            unregister_from_gateway(route_name)
+        except Exception as e:
+            logger.error(f"Error updating gateway services: {e}")
 
-        # 4. Update docker-compose services
-        docker_compose_path = Path('/app/docker-compose.yml')
-        logger.info(f"Checking docker-compose at: {docker_compose_path}")
+        # 5. Update docker-compose services
+        docker_compose_path = Path(COMPOSE_PATH)
         if docker_compose_path.exists():
             try:
-                with open(docker_compose_path, 'r') as f:
-                    compose_config = yaml.safe_load(f)
-                
-                if route_name in compose_config.get('services', {}):
-                    del compose_config['services'][route_name]
+                if get_compose_store(docker_compose_path).remove_service(route_name):
                     logger.info(f"Removed service {route_name} from docker-compose.yml")
-                    
-                    with open(docker_compose_path, 'w') as f:
-                        yaml.dump(compose_config, f)
-                    logger.info("Successfully updated docker-compose.yml")
                 else:
                     logger.warning(f"No service found in docker-compose.yml for {route_name}")
             except Exception as e:
@@ -568,320 +617,83 @@ def cleanup_files(component_name: str, route_name: str, base_path: Path):
         logger.error("Full error traceback:", exc_info=True)
         raise Exception(f"Cleanup failed: {str(e)}")
 
+@lru_cache(maxsize=1)
+def load_type_mappings() -> Dict[str, Any]:
+    """Load type mappings from JSON once"""
+    type_mappings_path = Path(__file__).parent.parent / "config" / "type_mappings.json"
+    with open(type_mappings_path) as f:
+        return json.load(f)
+
 def generate_typescript_interfaces(outputs: List[Dict[str, Any]]) -> str:
     """Generate TypeScript interfaces from output configuration using JSON mappings"""
     try:
-        # Load type mappings from JSON
-        type_mappings_path = Path(__file__).parent.parent / "config" / "type_mappings.json"
-        with open(type_mappings_path) as f:
-            mappings = json.load(f)
-            type_mapping = mappings["typeScriptMappings"]
+        type_mapping = load_type_mappings()["typeScriptMappings"]
 
         # Generate interface properties
         interface_props = []
         for output in outputs:
+            output = output if isinstance(output, dict) else output.dict()
             ts_type = type_mapping.get(output["type"].lower(), "any")
             interface_props.append(f"{output['name']}: {ts_type};")
 
-        return "\n  ".join(interface_props)
+        return "\n".join(interface_props)
 
     except Exception as e:
         logger.error(f"Error generating TypeScript interfaces: {e}")
         return "// Error generating interfaces" 
 
-def generate_type_conversion_code(inputs: List[Dict[str, Any]]) -> str:
-    """Generate code for type conversion based on input configuration"""
-    conversion_code = []
+# An input declares a column when its description is just a column name, e.g. "amount"
+COLUMN_NAME_PATTERN = re.compile(r"^[\w][\w .%#()/-]{0,63}$")
+
+def generate_input_schema(inputs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build the input schema the generated analyzer coerces columns with.
+
+    Inputs whose type maps to a Python kind and whose description names a column pin
+    that column's kind; every other column's kind is inferred from its values.
+    """
+    type_mapping = load_type_mappings()["pythonMappings"]
+    columns = {}
     for input_config in inputs:
-        if input_config.type.lower() == 'number':
-            conversion_code.append(
-                "if '{col}' in df.columns:\n"
-                "    df['{col}'] = pd.to_numeric(df['{col}'], errors='coerce')"
-            )
-        elif input_config.type.lower() == 'date':
-            conversion_code.append(
-                "if '{col}' in df.columns:\n"
-                "    df['{col}'] = pd.to_datetime(df['{col}'], errors='coerce')"
-            )
-    return "\n".join(conversion_code)
-
-def generate_analysis_code(rules: List[Dict[str, Any]]) -> str:
-    """Generate analysis code based on rules configuration"""
-    analysis_code = []
-    for rule in rules:
-        if rule.type.lower() == 'calculation':
-            analysis_code.append(f"""
-# Calculation rule: {rule.description}
-try:
-    results['calculation'] = df.describe().to_dict()
-except Exception as calc_error:
-    logger.error(f'Calculation error: {{calc_error}}')
-    results['calculation_error'] = str(calc_error)
-""")
-    
-    if not analysis_code:
-        return "results['default'] = df.describe().to_dict()"
-    
-    return "\n".join(analysis_code)
+        kind = type_mapping.get(input_config.type.strip().lower())
+        name = input_config.description.strip()
+        if kind and COLUMN_NAME_PATTERN.match(name):
+            columns[name] = kind
+    return {"columns": columns}
 
 def generate_python_code(component_name: str, route_name: str, config: AnalyzerConfig, base_path: Path):
     """Generate Python implementation for the analyzer"""
     try:
         analytics_dir = base_path / "app" / "analyticscode" / route_name
-        
-        # Create main.py with detailed implementation
-        main_py_content = f'''import os
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import Dict, Any, List, Optional, Union
-import pandas as pd
-from datetime import datetime
-import json
-import logging
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
-
-class PandasJSONEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, pd.Series):
-            return list(obj)
-        if isinstance(obj, pd.Timestamp):
-            return obj.isoformat()
-        return super().default(obj)
-
-app = FastAPI()
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-class AnalysisRequest(BaseModel):
-    spreadsheet: Dict[str, Any]
-    options: Dict[str, Any] = Field(default_factory=dict)
-
-class AnalysisResponse(BaseModel):
-    results: Dict[str, Any]
-    metadata: Dict[str, Any]
+        templates = get_templates()
 
-    class Config:
-        json_encoders = {{
-            pd.Series: lambda x: list(x),
-            pd.Timestamp: lambda x: x.isoformat()
-        }}
-
-def convert_to_dataframe(data: Dict[str, Any]) -> pd.DataFrame:
-    """Convert input data to pandas DataFrame."""
-    try:
-        logger.info(f"Converting input data to DataFrame. Data structure: {{list(data.keys())}}")
-        
-        if isinstance(data, dict) and "rows" in data:
-            rows_data = data["rows"]
-            
-            if isinstance(rows_data, list) and rows_data and "cells" in rows_data[0]:
-                headers = [cell['value'] for cell in rows_data[0]['cells']]
-                processed_rows = []
-                for row in rows_data[1:]:
-                    row_values = [cell['value'] for cell in row['cells']]
-                    processed_rows.append(row_values)
-                
-                df = pd.DataFrame(processed_rows, columns=headers)
-                df.columns = df.columns.str.strip()
-                
-                # Handle data types based on input configuration
-                {generate_type_conversion_code(config.structure.inputs)}
-                
-                return df
-            
-        raise ValueError("Invalid data structure")
-        
-    except Exception as e:
-        logger.error(f"Failed to convert data to DataFrame: {{str(e)}}")
-        raise ValueError(f"Failed to convert data to DataFrame: {{str(e)}}")
-
-def analyze_data(df: pd.DataFrame) -> Dict[str, Any]:
-    """Analyzes data according to configured rules."""
-    try:
-        results = {{}}
-        
-        # Implement analysis based on configured rules
-        {generate_analysis_code(config.structure.rules)}
-        
-        return results
-    except Exception as e:
-        return {{"error": f"Analysis error: {{str(e)}}"}}
-
-@app.get("/info")
-async def get_info():
-    """Get information about the analyzer service."""
-    return {{
-        "name": "{config.name}",
-        "status": "running",
-        "version": "1.0.0"
-    }}
-
-@app.get("/health")
-async def health_check():
-    return {{
-        "status": "healthy",
-        "service": "{route_name}",
-        "timestamp": datetime.now().isoformat()
-    }}
-
-@app.post("/analyze")
-async def analyze_endpoint(request: AnalysisRequest) -> AnalysisResponse:
-    try:
-        logger.info("Analyze endpoint called")
-        df = convert_to_dataframe(request.spreadsheet)
-        results = analyze_data(df)
-        
-        return AnalysisResponse(
-            results=results,
-            metadata={{
-                "analyzer": "{component_name}",
-                "version": "1.0.0",
-                "timestamp": datetime.now().isoformat(),
-                "columns": list(df.columns),
-                "row_count": len(df)
-            }}
+        # Only the analyzer-specific parts are rendered; the rest is cached at startup
+        files_to_write = {
+            (".gitignore" if name == "gitignore" else name): content
+            for name, content in templates.static_files("analyzer").items()
+        }
+        files_to_write["main.py"] = templates.render(
+            "analyzer/main.py",
+            analyzer_name_literal=repr(config.name),
+            route_name_literal=repr(route_name),
+            component_name_literal=repr(component_name),
+            input_schema_literal=repr(generate_input_schema(config.structure.inputs)),
+            rule_plan_literal=pprint.pformat(compile_rules(config.structure.rules), sort_dicts=False),
         )
-    except Exception as e:
-        logger.error(f"Error in analyze endpoint: {{str(e)}}", exc_info=True)
-        raise HTTPException(
-            status_code=400,
-            detail={{
-                "error": str(e),
-                "timestamp": datetime.now().isoformat()
-            }}
+        files_to_write["README.md"] = templates.render(
+            "analyzer/README.md",
+            analyzer_name=config.name,
+            description=config.systemPrompt.description,
+            user_prompt=config.userPrompt,
+            inputs_json=json.dumps([input.dict() for input in config.structure.inputs], indent=2),
+            outputs_json=json.dumps([output.dict() for output in config.structure.outputs], indent=2),
         )
 
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
-'''
-
-        # Create requirements.txt
-        requirements_txt = """fastapi==0.104.1
-uvicorn==0.24.0
-pydantic==2.4.2
-python-dateutil==2.8.2
-pandas==2.1.1
-numpy==1.24.3
-scikit-learn==1.3.0
-matplotlib==3.7.1
-python-multipart==0.0.6
-httpx==0.24.1
-"""
-
-        # Create Dockerfile
-        dockerfile_content = """FROM python:3.9-slim
-
-WORKDIR /app
-
-# Install curl for healthcheck
-RUN apt-get update && apt-get install -y curl && rm -rf /var/lib/apt/lists/*
-
-# Copy requirements first to leverage Docker cache
-COPY requirements.txt .
-RUN pip install --no-cache-dir -r requirements.txt
-
-# Copy the rest of the application
-COPY . .
-
-# Make sure the files are readable and executable
-RUN chmod -R 755 /app
-
-EXPOSE 8000
-
-CMD ["python", "-m", "uvicorn", "main:app", "--host", "0.0.0.0", "--port", "8000"]
-"""
-
-        # Create Makefile
-        makefile_content = """.PHONY: setup run clean
-
-setup:
-\tpython -m venv venv
-\t. venv/bin/activate && pip install -r requirements.txt
-
-run:
-\t. venv/bin/activate && uvicorn main:app --reload --host 0.0.0.0 --port 8000
-
-clean:
-\trm -rf venv
-\tfind . -type f -name "*.pyc" -delete
-\tfind . -type d -name "__pycache__" -delete
-
-init: setup
-"""
-
-        # Create README.md with proper model serialization
-        readme_content = f"""# {config.name} Analyzer API
-
-## Description
-{config.systemPrompt.description}
-
-## Analysis Logic
-{config.userPrompt}
-
-## Setup
-
-1. Initialize the environment:
-   ```bash
-   make init
-   ```
-
-2. Run the API:
-   ```bash
-   make run
-   ```
-
-## API Endpoints
-
-POST /analyze
-- Input: {json.dumps([input.dict() for input in config.structure.inputs], indent=2)}
-- Output: {json.dumps([output.dict() for output in config.structure.outputs], indent=2)}
-
-## Development
-
-- Clean environment: `make clean`
-- Rebuild environment: `make setup`
-- Start server: `make run`
-
-The API will be available at http://localhost:8000
-"""
-
-        # Create .gitignore
-        gitignore_content = """venv/
-__pycache__/
-*.pyc
-.env
-.DS_Store
-"""
-
         # Write all files
         analytics_dir.mkdir(parents=True, exist_ok=True)
         
-        files_to_write = {
-            "main.py": main_py_content,
-            "requirements.txt": requirements_txt,
-            "Dockerfile": dockerfile_content,
-            "Makefile": makefile_content,
-            "README.md": readme_content,
-            ".gitignore": gitignore_content
-        }
-        
+        # Replaced whole, never truncated in place: a running analyzer hot-reloads main.py as soon as it changes
         for filename, content in files_to_write.items():
-            with open(analytics_dir / filename, "w") as f:
-                f.write(content)
+            atomic_write_text(analytics_dir / filename, content)
 
         logger.info(f"Generated Python implementation in {analytics_dir}")
         return True
@@ -0,0 +1,251 @@
+import os
+import json
+import fcntl
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Callback receives (added_or_changed, removed) keys after every committed change
+ChangeListener = Callable[[List[str], List[str]], None]
+
+
+class FileLock:
+    """Cross-process exclusive lock on a sidecar lock file (also serializes threads in this process)"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+
+    @contextmanager
+    def hold(self) -> Iterator[None]:
+        with self._thread_lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a') as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def atomic_write_text(path: Path, content: str):
+    """Write text to a sibling temp file and rename it over the target; readers see the old or the new file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, 'w') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def atomic_write_json(path: Path, data: Any):
+    """Write JSON to a sibling temp file and rename it over the target"""
+    atomic_write_text(path, json.dumps(data, indent=2))
+
+
+class RegistryStore(ABC):
+    """Keyed analyzer registry with an in-memory index and change notification"""
+
+    def __init__(self):
+        self._listeners: List[ChangeListener] = []
+
+    def subscribe(self, listener: ChangeListener):
+        self._listeners.append(listener)
+
+    def _notify(self, changed: List[str], removed: List[str]):
+        if not changed and not removed:
+            return
+        for listener in self._listeners:
+            try:
+                listener(changed, removed)
+            except Exception as e:
+                logger.error(f"Registry listener failed: {e}")
+
+    @staticmethod
+    def _diff(before: Dict[str, Any], after: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+        changed = [key for key, value in after.items() if before.get(key) != value]
+        removed = [key for key in before if key not in after]
+        return changed, removed
+
+    @abstractmethod
+    def transaction(self) -> ContextManager[Dict[str, Dict[str, Any]]]:
+        """Context manager yielding the whole registry; changes made to it are committed on exit"""
+
+    @abstractmethod
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        """Every entry by key"""
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.all().get(key)
+
+    def put_many(self, entries: Dict[str, Dict[str, Any]]):
+        with self.transaction() as registry:
+            registry.update(entries)
+
+    def put(self, key: str, entry: Dict[str, Any]):
+        self.put_many({key: entry})
+
+    def remove(self, key: str) -> Optional[Dict[str, Any]]:
+        with self.transaction() as registry:
+            return registry.pop(key, None)
+
+
+class JsonRegistryStore(RegistryStore):
+    """registry.json guarded by a file lock and replaced atomically on every commit"""
+
+    def __init__(self, path: Path):
+        super().__init__()
+        self.path = Path(path)
+        self.lock = FileLock(self.path.with_name(f".{self.path.name}.lock"))
+        self._index: Dict[str, Dict[str, Any]] = {}
+        self._signature: Optional[Tuple[int, int, int]] = None
+
+    def _stat_signature(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _refresh(self):
+        """Reload the index only when another writer replaced the file"""
+        signature = self._stat_signature()
+        if signature == self._signature:
+            return
+        if signature is None:
+            self._index = {}
+        else:
+            try:
+                with open(self.path) as f:
+                    self._index = json.load(f)
+            except Exception as e:
+                logger.error(f"Error reading registry {self.path}: {e}")
+                self._index = {}
+        self._signature = signature
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        self._refresh()
+        return dict(self._index)
+
+    @contextmanager
+    def transaction(self) -> Iterator[Dict[str, Dict[str, Any]]]:
+        """Read-modify-write under the cross-process lock; the yielded dict is committed on exit"""
+        with self.lock.hold():
+            self._refresh()
+            before = self._index
+            registry = dict(before)
+            yield registry
+
+            changed, removed = self._diff(before, registry)
+            if changed or removed:
+                atomic_write_json(self.path, registry)
+                self._index = registry
+                self._signature = self._stat_signature()
+        self._notify(changed, removed)
+
+
+class SqliteRegistryStore(RegistryStore):
+    """SQLite-backed registry for large deployments, mirrored to registry.json for its readers"""
+
+    def __init__(self, db_path: Path, export_path: Optional[Path] = None):
+        super().__init__()
+        self.db_path = Path(db_path)
+        self.export_path = Path(export_path) if export_path else None
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS registry (key TEXT PRIMARY KEY, entry TEXT NOT NULL)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS registry_version (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)")
+        self._db.execute("INSERT OR IGNORE INTO registry_version (id, version) VALUES (1, 0)")
+        self._index: Dict[str, Dict[str, Any]] = {}
+        self._version = -1
+        self._import_existing()
+
+    def _import_existing(self):
+        """Seed an empty database from an existing registry.json"""
+        if self.export_path is None or not self.export_path.exists():
+            return
+        if self._db.execute("SELECT COUNT(*) FROM registry").fetchone()[0]:
+            return
+        with open(self.export_path) as f:
+            entries = json.load(f)
+        if entries:
+            with self.transaction() as registry:
+                registry.update(entries)
+            logger.info(f"Imported {len(entries)} analyzers from {self.export_path}")
+
+    def _current_version(self) -> int:
+        return self._db.execute("SELECT version FROM registry_version WHERE id = 1").fetchone()[0]
+
+    def _refresh(self):
+        version = self._current_version()
+        if version != self._version:
+            rows = self._db.execute("SELECT key, entry FROM registry").fetchall()
+            self._index = {key: json.loads(entry) for key, entry in rows}
+            self._version = version
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            return dict(self._index)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT entry FROM registry WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    @contextmanager
+    def transaction(self) -> Iterator[Dict[str, Dict[str, Any]]]:
+        """BEGIN IMMEDIATE takes SQLite's write lock, serializing writers across processes"""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._refresh()
+                before = self._index
+                registry = dict(before)
+                yield registry
+
+                changed, removed = self._diff(before, registry)
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO registry (key, entry) VALUES (?, ?)",
+                    [(key, json.dumps(registry[key])) for key in changed],
+                )
+                self._db.executemany("DELETE FROM registry WHERE key = ?", [(key,) for key in removed])
+                if changed or removed:
+                    self._db.execute("UPDATE registry_version SET version = version + 1 WHERE id = 1")
+                    if self.export_path is not None:
+                        atomic_write_json(self.export_path, registry)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._index = registry
+            self._version = self._current_version()
+        self._notify(changed, removed)
+
+
+_stores: Dict[str, RegistryStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_registry_store(registry_path: Path) -> RegistryStore:
+    """Shared store for a registry.json path; REGISTRY_BACKEND=sqlite selects the SQLite backend"""
+    key = str(registry_path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            if os.getenv('REGISTRY_BACKEND', 'json').lower() == 'sqlite':
+                db_path = Path(os.getenv('REGISTRY_DB_PATH', '/app/data/registry.sqlite3'))
+                store = SqliteRegistryStore(db_path, export_path=registry_path)
+            else:
+                store = JsonRegistryStore(registry_path)
+            _stores[key] = store
+        return store
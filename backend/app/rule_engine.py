@@ -0,0 +1,151 @@
+import re
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PLAN_VERSION = 1
+
+AGGREGATIONS = ("count", "sum", "mean", "median", "min", "max", "std", "var", "nunique")
+PREDICATE_RULE_TYPES = ("validation", "score")
+
+# sum(amount), mean( unit price )
+AGGREGATION_PATTERN = re.compile(r"^\s*(?P<name>\w+)\s*\(\s*(?P<column>[^()]+?)\s*\)\s*$")
+# amount > 0, status == "open", unit price <= 9.5
+COMPARISON_PATTERN = re.compile(r"^\s*(?P<column>.+?)\s*(?P<op>>=|<=|==|!=|>|<|=)\s*(?P<value>.+?)\s*$")
+# region in [north, south]
+MEMBERSHIP_PATTERN = re.compile(r"^\s*(?P<column>.+?)\s+in\s+\[(?P<values>.*)\]\s*$", re.IGNORECASE)
+# amount is not null, notes is empty
+NULL_PATTERN = re.compile(r"^\s*(?P<column>.+?)\s+is\s+(?P<negated>not\s+)?(null|empty|missing)\s*$", re.IGNORECASE)
+
+
+def _literal(text: str) -> Any:
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "'\"":
+        return text[1:-1]
+    try:
+        number = float(text)
+    except ValueError:
+        return text
+    return int(number) if number.is_integer() and "." not in text else number
+
+
+def parse_aggregation(criterion: str) -> Optional[Tuple[str, str]]:
+    match = AGGREGATION_PATTERN.match(criterion)
+    if match is None or match.group("name").lower() not in AGGREGATIONS:
+        return None
+    return match.group("name").lower(), match.group("column")
+
+
+def parse_predicate(criterion: str) -> Optional[Dict[str, Any]]:
+    match = NULL_PATTERN.match(criterion)
+    if match:
+        return {"column": match.group("column"), "op": "notnull" if match.group("negated") else "null"}
+    match = MEMBERSHIP_PATTERN.match(criterion)
+    if match:
+        values = [_literal(value) for value in match.group("values").split(",") if value.strip()]
+        return {"column": match.group("column"), "op": "in", "value": values}
+    match = COMPARISON_PATTERN.match(criterion)
+    if match:
+        op = "==" if match.group("op") == "=" else match.group("op")
+        return {"column": match.group("column"), "op": op, "value": _literal(match.group("value"))}
+    return None
+
+
+class PlanBuilder:
+    """Collects aggregations and predicates once each, however many rules reference them"""
+
+    def __init__(self):
+        self.aggregations: List[List[str]] = []
+        self.predicates: List[Dict[str, Any]] = []
+        self.outputs: List[Dict[str, Any]] = []
+        self.columns: List[str] = []
+        self.needs_all_columns = False
+        self._aggregation_index: Dict[Tuple[str, str], int] = {}
+        self._predicate_index: Dict[str, int] = {}
+        self._keys: Dict[str, int] = {}
+
+    def _reference(self, column: str):
+        if column not in self.columns:
+            self.columns.append(column)
+
+    def aggregation(self, name: str, column: str) -> int:
+        key = (name, column)
+        if key not in self._aggregation_index:
+            self._aggregation_index[key] = len(self.aggregations)
+            self.aggregations.append([name, column])
+            self._reference(column)
+        return self._aggregation_index[key]
+
+    def predicate(self, predicate: Dict[str, Any]) -> int:
+        key = repr(sorted(predicate.items()))
+        if key not in self._predicate_index:
+            self._predicate_index[key] = len(self.predicates)
+            self.predicates.append(predicate)
+            self._reference(predicate["column"])
+        return self._predicate_index[key]
+
+    def output_key(self, rule_type: str) -> str:
+        """First rule of a type keeps the bare key (e.g. 'calculation'), later ones get a suffix"""
+        count = self._keys.get(rule_type, 0) + 1
+        self._keys[rule_type] = count
+        return rule_type if count == 1 else f"{rule_type}_{count}"
+
+    def add_describe(self, key: str, rule_type: str, description: str):
+        self.needs_all_columns = True
+        self.outputs.append({"key": key, "type": rule_type, "description": description, "describe": True})
+
+    def build(self) -> Dict[str, Any]:
+        return {
+            "version": PLAN_VERSION,
+            "columns": None if self.needs_all_columns else self.columns,
+            "aggregations": self.aggregations,
+            "predicates": self.predicates,
+            "outputs": self.outputs,
+        }
+
+
+def compile_rules(rules: List[Any]) -> Dict[str, Any]:
+    """Compile AnalyzerStructure.rules into the plan analyzer_runtime.engine executes.
+
+    calculation rules whose criteria are aggregations (e.g. "sum(amount)") compute just
+    those; otherwise they fall back to describe(). validation and score rules evaluate
+    comparison criteria ("amount > 0", "region in [north, south]", "notes is not null").
+    Rules of other types are skipped, and with no usable rule the plan runs describe().
+    """
+    builder = PlanBuilder()
+    for rule in rules:
+        rule_type = (rule.type or "").strip().lower()
+        criteria = [criterion for criterion in (rule.criteria or []) if criterion and criterion.strip()]
+
+        if rule_type == "calculation":
+            key = builder.output_key(rule_type)
+            parsed = [parse_aggregation(criterion) for criterion in criteria]
+            aggregations = [builder.aggregation(*item) for item in parsed if item is not None]
+            if aggregations:
+                builder.outputs.append({
+                    "key": key, "type": rule_type, "description": rule.description, "aggregations": aggregations,
+                })
+            else:
+                builder.add_describe(key, rule_type, rule.description)
+        elif rule_type in PREDICATE_RULE_TYPES:
+            predicates, unsupported = [], []
+            for criterion in criteria:
+                predicate = parse_predicate(criterion)
+                if predicate is None:
+                    unsupported.append(criterion)
+                else:
+                    predicates.append([builder.predicate(predicate), criterion])
+            output = {
+                "key": builder.output_key(rule_type), "type": rule_type,
+                "description": rule.description, "predicates": predicates,
+            }
+            if unsupported:
+                output["unsupported"] = unsupported
+            builder.outputs.append(output)
+        else:
+            logger.info(f"Skipping rule of unsupported type '{rule.type}'")
+
+    if not builder.outputs:
+        builder.add_describe("default", "calculation", "Summary statistics")
+    return builder.build()
@@ -0,0 +1,4 @@
+"""Shared runtime for generated analyzer services.
+
+This package is copied verbatim next to every generated main.py.
+"""
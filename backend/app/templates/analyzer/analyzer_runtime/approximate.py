@@ -0,0 +1,342 @@
+"""Approximate analysis: quantiles, distinct counts and frequent values from sketches, with error bounds.
+
+Requested per call with ?approximate=true (and optionally ?accuracy= and ?confidence=).
+Counts, sums, means, variances, min and max stay exact; they are computed one chunk at a
+time instead of from full-column copies. Quantiles and medians come from a uniform
+sample of rows sized by the DKW inequality, so with the given confidence every sampled
+quantile lies within accuracy in rank of the true one. Distinct counts come from a
+HyperLogLog, and describe()'s top/freq of text columns from the sample. Extra memory is
+one column of the sample, the HLL registers and one chunk, whatever the number of rows.
+
+bound(column, stat) is the absolute error bound of each approximate value at the same
+confidence; RulePlan.error_bounds() collects them for the response metadata.
+"""
+import os
+import math
+from statistics import NormalDist
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from analyzer_runtime.engine import DESCRIBE_STATS, MOMENT_AGGREGATIONS, QUANTILE_STATS, ExecutionContext, _number
+from analyzer_runtime.incremental import _nanoseconds
+from analyzer_runtime.sketches import HyperLogLog, hash_values
+from analyzer_runtime.streaming import DESCRIBE_PERCENTILES, NumericAccumulator, OutOfCoreFrame, SpilledContext
+
+# Rows per chunk for exact moments and HLL updates; hashing a chunk takes ~40 bytes a row
+CHUNK_ROWS = 1 << 16
+# Fixed so that repeating a request repeats its sample (and its cached response stays valid)
+SAMPLE_SEED = 0
+# Columns with at most this share of distinct values in the sample are counted exactly
+LOW_CARDINALITY = 0.01
+
+TRUE_VALUES = {"1", "true", "yes", "on"}
+
+
+class Approximation:
+    """Accuracy of an approximate analysis, and the sample size and HLL precision it takes.
+
+    accuracy is the rank error of quantiles (0.01: a reported median lies between the
+    true 49% and 51% values) and the target relative error of distinct counts; both
+    hold with probability confidence.
+    """
+
+    def __init__(self, accuracy: Optional[float] = None, confidence: Optional[float] = None):
+        self.accuracy = accuracy if accuracy is not None else float(os.getenv("ANALYZER_APPROXIMATE_ACCURACY", "0.01"))
+        self.confidence = confidence if confidence is not None else float(os.getenv("ANALYZER_APPROXIMATE_CONFIDENCE", "0.99"))
+        if not 0 < self.accuracy < 0.5:
+            raise ValueError("accuracy must be between 0 and 0.5")
+        if not 0 < self.confidence < 1:
+            raise ValueError("confidence must be between 0 and 1")
+        # DKW: with this many rows, P(any sampled quantile is off by more than accuracy in rank) <= 1 - confidence
+        self.sample_rows = math.ceil(math.log(2 / (1 - self.confidence)) / (2 * self.accuracy ** 2))
+        # Two-sided normal quantile turning the HLL standard error into a bound at this confidence
+        self.z = NormalDist().inv_cdf((1 + self.confidence) / 2)
+        self.precision = min(max(math.ceil(math.log2((self.z * 1.04 / self.accuracy) ** 2)), 4), 18)
+
+    @classmethod
+    def from_query(cls, params: Any) -> Optional["Approximation"]:
+        """Settings from ?approximate=true&accuracy=&confidence=, None for an exact analysis"""
+        if str(params.get("approximate", "")).lower() not in TRUE_VALUES:
+            return None
+        try:
+            accuracy = float(params["accuracy"]) if params.get("accuracy") else None
+            confidence = float(params["confidence"]) if params.get("confidence") else None
+        except ValueError:
+            raise ValueError("accuracy and confidence must be numbers")
+        return cls(accuracy, confidence)
+
+    def key(self) -> Tuple[Any, ...]:
+        """What the results depend on, for the response cache key"""
+        return ("approximate", self.accuracy, self.confidence)
+
+    def settings(self) -> Dict[str, Any]:
+        return {
+            "accuracy": self.accuracy,
+            "confidence": self.confidence,
+            "sample_rows": self.sample_rows,
+            "hll_registers": 1 << self.precision,
+        }
+
+    def context(self, df: Union[pd.DataFrame, OutOfCoreFrame]) -> ExecutionContext:
+        """Context factory for RulePlan.execute; frames no larger than the sample are analyzed exactly.
+
+        A spilled stream whose reservoir kept every row is analyzed exactly from the reservoir.
+        """
+        if isinstance(df, OutOfCoreFrame) and df.sample is not None and len(df.sample) >= len(df):
+            return ExecutionContext(df.sample)
+        if isinstance(df, pd.DataFrame) and len(df) <= self.sample_rows:
+            return ExecutionContext(df)
+        return ApproximateContext(df, self)
+
+
+class ApproximateContext(ExecutionContext):
+    """ExecutionContext answering quantiles, distinct counts and text describe() approximately.
+
+    Works on in-memory frames and on an OutOfCoreFrame that carries a reservoir sample;
+    for the latter moments come from the streaming accumulators (or one pass over a
+    datetime column), distinct counts from one pass over the spill, text columns are
+    described exactly from the spill and validation and score rules are tallied exactly
+    over its batches, as SpilledContext does.
+    """
+
+    def __init__(self, df: Union[pd.DataFrame, OutOfCoreFrame], approximation: Approximation):
+        super().__init__(df)
+        self.approximation = approximation
+        self.spilled = isinstance(df, OutOfCoreFrame)
+        if self.spilled and df.sample is None:
+            raise ValueError("Approximate analysis of a spilled stream needs its ingest to keep a sample")
+        self.anchors: Dict[Any, int] = {}
+        for column in df.datetimes if self.spilled else df.columns:
+            if self.spilled or pd.api.types.is_datetime64_any_dtype(df[column]):
+                valid = (df.sample if self.spilled else df)[column].dropna()
+                self.anchors[column] = int(valid.iloc[0].value) if len(valid) else 0
+        self._positions: Optional[np.ndarray] = None
+        # Sorted sample values of the last column whose quantiles were asked for
+        self._sorted: Optional[Tuple[Any, np.ndarray]] = None
+        self._summaries: Dict[Any, Tuple[NumericAccumulator, float]] = {}
+        self._distinct: Dict[Any, int] = {}
+        # (column, q or stat name) -> absolute error bound
+        self._bounds: Dict[Tuple[Any, Any], float] = {}
+
+    def sample(self, column: Any) -> pd.Series:
+        """A column's values in a uniform sample of approximation.sample_rows rows; only that column is copied"""
+        if self.spilled:
+            return self.df.sample[column]
+        if self._positions is None:
+            rng = np.random.default_rng(SAMPLE_SEED)
+            self._positions = np.sort(rng.choice(self.rows, min(self.approximation.sample_rows, self.rows), replace=False))
+        return self.df[column].iloc[self._positions]
+
+    @property
+    def exhaustive(self) -> bool:
+        """Whether the sample holds every row, making sampled values exact"""
+        sampled = len(self.df.sample) if self.spilled else self.approximation.sample_rows
+        return sampled >= self.rows
+
+    def parts(self) -> Iterator[ExecutionContext]:
+        if self.spilled:
+            yield from SpilledContext(self.df).parts()
+        else:
+            yield self
+
+    def _offsets(self, series: pd.Series, column: Any) -> np.ndarray:
+        """float64 values, datetime columns as nanoseconds after the column's anchor"""
+        if column in self.anchors:
+            return _nanoseconds(series) - self.anchors[column]
+        if not pd.api.types.is_numeric_dtype(series):
+            series = pd.to_numeric(series, errors="coerce")
+        return series.to_numpy(dtype=np.float64, na_value=np.nan)
+
+    def _chunks(self, column: Any) -> Iterator[pd.Series]:
+        if self.spilled:
+            for batch in pq.ParquetFile(self.df.path).iter_batches(columns=[str(column)], batch_size=CHUNK_ROWS):
+                yield batch.column(0).to_pandas()
+            return
+        series = self.df[column]
+        for start in range(0, len(series), CHUNK_ROWS):
+            yield series.iloc[start:start + CHUNK_ROWS]
+
+    def summary(self, column: Any) -> Tuple[NumericAccumulator, float]:
+        """Exact count, mean, variance, min and max (as anchor offsets) and sum of a column"""
+        cached = self._summaries.get(column)
+        if cached is None:
+            if self.spilled and column in self.df.summary.numeric:
+                accumulator = self.df.summary.accumulators[column]
+                cached = (accumulator, accumulator.mean * accumulator.count)
+            else:
+                accumulator, total = NumericAccumulator(), 0.0
+                for chunk in self._chunks(column):
+                    values = self._offsets(chunk, column)
+                    accumulator.update(values)
+                    total += float(np.nansum(values))
+                cached = (accumulator, total)
+            self._summaries[column] = cached
+        return cached
+
+    def _sampled(self, column: Any) -> np.ndarray:
+        """Sorted valid sample values of a column"""
+        if self._sorted is None or self._sorted[0] != column:
+            values = self._offsets(self.sample(column), column)
+            values = values[~np.isnan(values)]
+            values.sort()
+            self._sorted = (column, values)
+        return self._sorted[1]
+
+    def _rank_error(self, sampled: int) -> float:
+        """DKW rank error of an empirical distribution from sampled values, at the configured confidence"""
+        if self.exhaustive or not sampled:
+            return 0.0
+        return math.sqrt(math.log(2 / (1 - self.approximation.confidence)) / (2 * sampled))
+
+    def quantile(self, column: Any, q: float) -> float:
+        """Sampled quantile (as an anchor offset); its bound is the distance to the quantiles accuracy away"""
+        accumulator, _ = self.summary(column)
+        values = self._sampled(column)
+        if not len(values):
+            self._bounds[(column, q)] = 0.0
+            return np.nan
+        value = float(np.quantile(values, q))
+        error = self._rank_error(len(values))
+        # The true quantile lies between the sample's q - error and q + error quantiles, or the
+        # exact min / max when that range runs off either end
+        low = float(np.quantile(values, q - error)) if q - error > 0 else accumulator.minimum
+        high = float(np.quantile(values, q + error)) if q + error < 1 else accumulator.maximum
+        bound = max(value - low, high - value, 0.0)
+        self._bounds[(column, q)] = bound / 1e9 if column in self.anchors else bound
+        return value
+
+    def distinct(self, column: Any) -> int:
+        """Distinct non-null values from a HyperLogLog.
+
+        Counted exactly when that is cheap in time and memory: for categorical and boolean
+        columns, when the sample shows only a few distinct values, and for spilled text
+        columns whose value counts the stream kept.
+        """
+        if column not in self._distinct:
+            sample = self.sample(column)
+            counts = getattr(self.df.summary.accumulators[column], "counts", None) if self.spilled else None
+            if counts is not None:
+                self._distinct[column] = len(counts)
+                self._bounds[(column, "nunique")] = 0.0
+            elif not self.spilled and (
+                isinstance(sample.dtype, pd.CategoricalDtype)
+                or pd.api.types.is_bool_dtype(sample)
+                or sample.nunique() <= LOW_CARDINALITY * len(sample)
+            ):
+                self._distinct[column] = int(self.df[column].nunique())
+                self._bounds[(column, "nunique")] = 0.0
+            else:
+                sketch = HyperLogLog(self.approximation.precision)
+                for chunk in self._chunks(column):
+                    sketch.update(hash_values(chunk))
+                estimate = sketch.estimate()
+                self._distinct[column] = int(round(estimate))
+                self._bounds[(column, "nunique")] = self.approximation.z * sketch.relative_error * estimate
+        return self._distinct[column]
+
+    def _describe_summary(self, column: Any) -> Dict[str, Any]:
+        accumulator, _ = self.summary(column)
+        anchor = self.anchors.get(column)
+
+        def value(offset: float) -> Any:
+            return offset if anchor is None else pd.Timestamp(anchor + int(round(offset)))
+
+        empty = not accumulator.count
+        stats: Dict[str, Any] = {"count": float(accumulator.count) if anchor is None else accumulator.count}
+        stats["mean"] = np.nan if empty else value(accumulator.mean)
+        if anchor is None:
+            stats["std"] = accumulator.std
+        stats["min"] = np.nan if empty else value(accumulator.minimum)
+        for q in DESCRIBE_PERCENTILES:
+            quantile = self.quantile(column, q)
+            stats[f"{q * 100:g}%"] = np.nan if empty else value(quantile)
+        stats["max"] = np.nan if empty else value(accumulator.maximum)
+        if empty and anchor is not None:
+            stats.update({key: pd.NaT for key in ("mean", "min", "max", "25%", "50%", "75%")})
+        return stats
+
+    def _describe_values(self, column: Any) -> Dict[str, Any]:
+        series = self.df[column]
+        count = int(series.count())
+        if isinstance(series.dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(series):
+            counts = series.value_counts()
+            counts = counts[counts > 0]
+            self._distinct[column] = len(counts)
+            self._bounds[(column, "nunique")] = 0.0
+            top, freq = (counts.index[0], int(counts.iloc[0])) if len(counts) else (np.nan, np.nan)
+            return {"count": count, "unique": len(counts), "top": top, "freq": freq}
+        # The most frequent sampled value, its frequency scaled to all rows; the sampled share
+        # of any one value is within the DKW error of its true share
+        sampled = self.sample(column).value_counts()
+        if len(sampled):
+            share = sampled.iloc[0] / sampled.sum()
+            top, freq = sampled.index[0], int(round(share * count))
+            self._bounds[(column, "freq")] = self._rank_error(int(sampled.sum())) * count
+        else:
+            top, freq = np.nan, np.nan
+        return {"count": count, "unique": self.distinct(column), "top": top, "freq": freq}
+
+    def describe(self) -> Dict[Any, Dict[str, Any]]:
+        """Same shape as DataFrame.describe().to_dict(), with approximate quantiles, unique and freq"""
+        if self._describe is None:
+            if self.spilled:
+                described = [column for column in self.df.columns if column in self.df.summary.numeric or column in self.anchors]
+                if not described:
+                    return super().describe()
+            else:
+                described = [
+                    column for column in self.df.columns
+                    if column in self.anchors
+                    or (pd.api.types.is_numeric_dtype(self.df[column]) and not pd.api.types.is_bool_dtype(self.df[column]))
+                ]
+            if described:
+                describe = {column: self._describe_summary(column) for column in described}
+                if len(self.anchors) < len(described):
+                    for column in self.anchors:
+                        describe[column]["std"] = np.nan
+            else:
+                describe = {column: self._describe_values(column) for column in self.df.columns}
+            self._describe = describe
+        return self._describe
+
+    def moments(self, column: Any) -> Dict[str, float]:
+        moments = self._moments.get(column)
+        if moments is None:
+            accumulator, total = self.summary(column)
+            count = accumulator.count
+            # Datetime offsets are shifted back by the anchor; ExecutionContext sees nanoseconds
+            total += self.anchors.get(column, 0) * count
+            var = accumulator.m2 / (count - 1) if count > 1 else np.nan
+            moments = {"count": count, "sum": total, "mean": total / count if count else np.nan, "var": var, "std": float(np.sqrt(var))}
+            self._moments[column] = moments
+        return moments
+
+    def aggregate(self, name: str, column_name: str) -> Any:
+        column = self.resolve(column_name)
+        if self._describe is not None and name in DESCRIBE_STATS:
+            stats = self._describe.get(column, {})
+            if DESCRIBE_STATS[name] in stats:
+                return _number(stats[DESCRIBE_STATS[name]])
+        if name == "nunique":
+            return self.distinct(column)
+        if name == "count" and self.spilled:
+            return self.df.summary.accumulators[column].count
+        if name in MOMENT_AGGREGATIONS:
+            return self.moments(column)[name]
+        if name in ("min", "max", "median"):
+            accumulator, _ = self.summary(column)
+            if not accumulator.count:
+                return np.nan
+            shift = self.anchors.get(column, 0)
+            if name == "median":
+                return self.quantile(column, 0.5) + shift
+            return (accumulator.minimum if name == "min" else accumulator.maximum) + shift
+        return super().aggregate(name, column_name)
+
+    def bound(self, column: Any, stat: str) -> Optional[float]:
+        """Error bound of a sampled quantile (seconds for datetime columns), distinct count or freq"""
+        q = QUANTILE_STATS.get(stat)
+        return self._bounds.get((column, q if q is not None else "nunique" if stat == "unique" else stat))
@@ -0,0 +1,212 @@
+"""Result cache: finished /analyze responses keyed by a fingerprint of the request.
+
+The fingerprint hashes the analyzer version (compiled plan and input schema), the
+content type, the response encoding and the body bytes, so an unchanged sheet posted
+again is answered without analyzing it. The fingerprint doubles as the response ETag:
+a client that sends it back in If-None-Match gets an empty 304.
+
+Entries live in an LRU bounded by ANALYZER_CACHE_BYTES (default 64MB; 0 disables
+storage, ETags still work). With ANALYZER_CACHE_DIR set, entries are also written there,
+bounded by ANALYZER_CACHE_DISK_BYTES (default 1GB), and survive container restarts.
+"""
+import os
+import asyncio
+import hashlib
+import logging
+import tempfile
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, NamedTuple, Optional
+
+from fastapi.responses import Response
+
+logger = logging.getLogger(__name__)
+
+SUFFIX = ".response"
+# Bodies above this are hashed in a thread; hashlib releases the GIL on large buffers
+THREAD_HASH_BYTES = 1 << 20
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    media_type: str
+
+
+class Fingerprint:
+    """Incremental request hash; the version and request shape are hashed before the body"""
+
+    def __init__(self, *parts: Any):
+        self._hash = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            self._hash.update(str(part).encode("utf-8") + b"\0")
+
+    def update(self, data: bytes):
+        self._hash.update(data)
+
+    async def wrap(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Pass a body stream through unchanged, hashing it on the way"""
+        async for chunk in chunks:
+            self._hash.update(chunk)
+            yield chunk
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+class ResultCache:
+    """Byte-bounded LRU of encoded responses with optional disk persistence"""
+
+    def __init__(self, version: str, max_bytes: Optional[int] = None, directory: Optional[str] = None,
+                 max_disk_bytes: Optional[int] = None):
+        self.version = version
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("ANALYZER_CACHE_BYTES", str(64 << 20)))
+        self.directory = directory if directory is not None else os.getenv("ANALYZER_CACHE_DIR") or None
+        self.max_disk_bytes = (
+            max_disk_bytes if max_disk_bytes is not None else int(os.getenv("ANALYZER_CACHE_DISK_BYTES", str(1 << 30)))
+        )
+        self.counters = {"hits": 0, "disk_hits": 0, "misses": 0, "not_modified": 0, "evictions": 0}
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        # key -> file size, least recently used first
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        if self.enabled and self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self._scan()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def version_of(*parts: Any) -> str:
+        """Digest of everything that determines the results besides the request itself"""
+        return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+    @staticmethod
+    def etag(key: str) -> str:
+        return f'"{key}"'
+
+    def fingerprint(self, content_type: str, compact: bool, *options: Any) -> Fingerprint:
+        """options are further request settings the response depends on, such as approximation"""
+        return Fingerprint(self.version, content_type.split(";")[0].strip().lower(), compact, *options)
+
+    async def key(self, body: bytes, content_type: str, compact: bool, *options: Any) -> str:
+        fingerprint = self.fingerprint(content_type, compact, *options)
+        if len(body) > THREAD_HASH_BYTES:
+            await asyncio.get_running_loop().run_in_executor(None, fingerprint.update, body)
+        else:
+            fingerprint.update(body)
+        return fingerprint.hexdigest()
+
+    def respond(self, key: str, if_none_match: Optional[str]) -> Optional[Response]:
+        """304 when the client already holds this result, the stored response on a hit, else None"""
+        headers = {"ETag": self.etag(key)}
+        if if_none_match:
+            tags = {tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip() for tag in if_none_match.split(",")}
+            if self.etag(key) in tags:
+                self.counters["not_modified"] += 1
+                return Response(status_code=304, headers=headers)
+        cached = self.get(key)
+        if cached is None:
+            return None
+        return Response(cached.body, media_type=cached.media_type, headers={**headers, "X-Cache": "hit"})
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        cached = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+            self.counters["hits"] += 1
+            return cached
+        if key in self._disk:
+            cached = self._read(key)
+            if cached is not None:
+                self.counters["disk_hits"] += 1
+                self._remember(key, cached)
+                return cached
+        self.counters["misses"] += 1
+        return None
+
+    def put(self, key: str, body: bytes, media_type: str):
+        if not self.enabled or len(body) > self.max_bytes:
+            return
+        cached = CachedResponse(body, media_type)
+        self._remember(key, cached)
+        if self.directory:
+            self._write(key, cached)
+
+    def _remember(self, key: str, cached: CachedResponse):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous.body)
+        self._entries[key] = cached
+        self._bytes += len(cached.body)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted.body)
+            self.counters["evictions"] += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def _scan(self):
+        """Index entries persisted by earlier runs, oldest access first"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(SUFFIX):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, name[:-len(SUFFIX)], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._prune_disk()
+        logger.info(f"Result cache: {len(self._disk)} persisted entries ({self._disk_bytes} bytes) in {self.directory}")
+
+    def _read(self, key: str) -> Optional[CachedResponse]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                media_type, _, body = f.read().partition(b"\n")
+            os.utime(path)
+        except OSError:
+            self._disk_bytes -= self._disk.pop(key, 0)
+            return None
+        self._disk.move_to_end(key)
+        return CachedResponse(body, media_type.decode("utf-8"))
+
+    def _write(self, key: str, cached: CachedResponse):
+        """Write to a temporary file and rename it, so readers never see a partial entry"""
+        data = cached.media_type.encode("utf-8") + b"\n" + cached.body
+        try:
+            fd, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temporary, self._path(key))
+        except OSError as e:
+            logger.warning(f"Could not persist cached result {key}: {str(e)}")
+            return
+        self._disk_bytes += len(data) - self._disk.pop(key, 0)
+        self._disk[key] = len(data)
+        self._prune_disk()
+
+    def _prune_disk(self):
+        while self._disk_bytes > self.max_disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        served = self.counters["hits"] + self.counters["disk_hits"] + self.counters["not_modified"]
+        lookups = served + self.counters["misses"]
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "disk_entries": len(self._disk),
+            "disk_bytes": self._disk_bytes,
+            "hit_rate": round(served / lookups, 4) if lookups else 0.0,
+            **self.counters,
+        }
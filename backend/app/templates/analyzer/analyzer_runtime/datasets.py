@@ -0,0 +1,47 @@
+"""Dataset handles: sheets uploaded once to the gateway's dataset store.
+
+The gateway keeps each upload as an uncompressed Arrow IPC file named by its content
+hash on a volume shared with the analyzers (DATASET_DIR, default /datasets). Reading
+memory-maps the file, so Arrow buffers point into the page cache instead of being
+copied, and only the columns the rule plan needs are touched.
+"""
+import os
+from typing import List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from analyzer_runtime.wire import select_columns, table_to_frame
+
+DATASET_DIR = os.getenv("DATASET_DIR", "/datasets")
+
+
+class DatasetNotFound(LookupError):
+    """The handle is unknown here: never uploaded, evicted, or the volume is not mounted"""
+
+
+def dataset_path(handle: str) -> str:
+    if not handle or not handle.isalnum():
+        raise DatasetNotFound(f"Invalid dataset handle: {handle!r}")
+    return os.path.join(DATASET_DIR, handle + ".arrow")
+
+
+def read_dataset(handle: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    path = dataset_path(handle)
+    try:
+        source = pa.memory_map(path)
+    except FileNotFoundError:
+        raise DatasetNotFound(f"Unknown dataset {handle}; upload it to the gateway again")
+    with source:
+        reader = ipc.open_file(source)
+        table = reader.read_all()
+        selected = select_columns(table.column_names, columns)
+        frame = table_to_frame(table if selected is None else table.select(selected))
+    try:
+        # Reads count as use for the gateway's least-recently-used eviction; a no-op on the
+        # read-only mount, where the gateway records the read as it proxies the request
+        os.utime(path)
+    except OSError:
+        pass
+    return frame
@@ -0,0 +1,335 @@
+"""Rule engine: executes the plan the backend compiles from an analyzer's rules.
+
+A plan lists every aggregation and predicate once, however many rules use them, plus the
+columns the rules reference. Execution projects the frame to those columns, computes each
+shared input once (numeric views, describe(), per-column moments, predicate masks) and
+assembles every rule's output from them. Validation and score rules are tallied over the
+context's parts(), one in-memory frame for most contexts and a batch at a time for a
+request spilled to disk.
+"""
+import logging
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# describe() rows that can answer an aggregation without recomputing it
+DESCRIBE_STATS = {"count": "count", "mean": "mean", "std": "std", "min": "min", "max": "max", "median": "50%"}
+MOMENT_AGGREGATIONS = {"sum", "mean", "std", "var"}
+# describe() rows and aggregations that are quantiles, and their q
+QUANTILE_STATS = {"25%": 0.25, "50%": 0.5, "75%": 0.75, "median": 0.5}
+
+
+def _number(value: Any) -> Any:
+    """NumPy scalars to plain floats/ints, NaN kept as NaN"""
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    return value
+
+
+class ExecutionContext:
+    """Caches everything rules share during one execution"""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._names = {str(column).lower(): column for column in df.columns}
+        self._numeric: Dict[Any, np.ndarray] = {}
+        self._moments: Dict[Any, Dict[str, float]] = {}
+        self._describe: Optional[Dict[Any, Dict[str, Any]]] = None
+
+    @property
+    def rows(self) -> int:
+        return len(self.df)
+
+    def close(self):
+        """Release resources held for the execution; nothing for the in-process context"""
+
+    def parts(self) -> Iterator["ExecutionContext"]:
+        """Contexts over disjoint rows that together make up these rows; masks are evaluated per part"""
+        yield self
+
+    def bound(self, column: Any, stat: str) -> Optional[float]:
+        """Absolute error bound of a describe() statistic or aggregation; None as every value is exact"""
+        return None
+
+    def resolve(self, name: str) -> Any:
+        """Exact column name first, then a case-insensitive match"""
+        if name in self.df.columns:
+            return name
+        try:
+            return self._names[str(name).lower()]
+        except KeyError:
+            raise KeyError(f"Unknown column: {name}")
+
+    def numeric(self, column: Any) -> np.ndarray:
+        values = self._numeric.get(column)
+        if values is None:
+            series = self.df[column]
+            if not pd.api.types.is_numeric_dtype(series):
+                series = pd.to_numeric(series, errors="coerce")
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            self._numeric[column] = values
+        return values
+
+    def describe(self) -> Dict[Any, Dict[str, Any]]:
+        if self._describe is None:
+            self._describe = self.df.describe().to_dict()
+        return self._describe
+
+    @property
+    def described_stats(self) -> Optional[Dict[Any, Dict[str, Any]]]:
+        """describe() as this execution computed it, None if no rule asked for it"""
+        return self._describe
+
+    def moments(self, column: Any) -> Dict[str, float]:
+        """count, sum, mean and variance from a single pass over the valid values"""
+        moments = self._moments.get(column)
+        if moments is None:
+            values = self.numeric(column)
+            values = values[~np.isnan(values)]
+            count = len(values)
+            total = float(values.sum())
+            mean = total / count if count else np.nan
+            var = float(np.square(values - mean).sum() / (count - 1)) if count > 1 else np.nan
+            moments = {"count": count, "sum": total, "mean": mean, "var": var, "std": float(np.sqrt(var))}
+            self._moments[column] = moments
+        return moments
+
+    def aggregate(self, name: str, column_name: str) -> Any:
+        column = self.resolve(column_name)
+        if self._describe is not None and name in DESCRIBE_STATS:
+            stats = self._describe.get(column, {})
+            if DESCRIBE_STATS[name] in stats:
+                return _number(stats[DESCRIBE_STATS[name]])
+        if name == "count":
+            return int(self.df[column].count())
+        if name == "nunique":
+            return int(self.df[column].nunique())
+        if name in MOMENT_AGGREGATIONS:
+            return self.moments(column)[name]
+        values = self.numeric(column)
+        if not np.any(~np.isnan(values)):
+            return np.nan
+        if name == "min":
+            return float(np.nanmin(values))
+        if name == "max":
+            return float(np.nanmax(values))
+        if name == "median":
+            return float(np.nanmedian(values))
+        raise ValueError(f"Unsupported aggregation: {name}")
+
+    def mask(self, predicate: Dict[str, Any]) -> np.ndarray:
+        column = self.resolve(predicate["column"])
+        op, value = predicate["op"], predicate.get("value")
+        if op == "null":
+            return self.df[column].isna().to_numpy()
+        if op == "notnull":
+            return self.df[column].notna().to_numpy()
+        if op == "in":
+            return self.df[column].astype(str).isin([str(item) for item in value]).to_numpy()
+        if isinstance(value, (int, float)):
+            left = self.numeric(column)
+            with np.errstate(invalid="ignore"):
+                mask = {
+                    ">": np.greater, ">=": np.greater_equal, "<": np.less, "<=": np.less_equal,
+                    "==": np.equal, "!=": np.not_equal,
+                }[op](left, value)
+            return mask
+        strings = self.df[column].astype(str)
+        if op == "==":
+            return (strings == str(value)).to_numpy()
+        if op == "!=":
+            return (strings != str(value)).to_numpy()
+        raise ValueError(f"Operator {op} needs a numeric value")
+
+
+class RulePlan:
+    """Executable form of a compiled rule plan"""
+
+    def __init__(self, plan: Dict[str, Any]):
+        self.plan = plan
+        self.columns: Optional[List[str]] = plan.get("columns")
+        self.aggregations: List[List[str]] = plan.get("aggregations", [])
+        self.predicates: List[Dict[str, Any]] = plan.get("predicates", [])
+        self.outputs: List[Dict[str, Any]] = plan.get("outputs", [])
+        self.needs_describe = any(output.get("describe") for output in self.outputs)
+
+    def project(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Keep only the referenced columns (all of them when a rule needs describe())"""
+        if self.columns is None or not isinstance(df, pd.DataFrame):
+            return df
+        names = {str(column).lower(): column for column in df.columns}
+        selected = []
+        for name in self.columns:
+            column = name if name in df.columns else names.get(name.lower())
+            if column is not None and column not in selected:
+                selected.append(column)
+        return df[selected]
+
+    def execute(
+        self,
+        df: pd.DataFrame,
+        context_factory: Callable[[Any], ExecutionContext] = ExecutionContext,
+        bounds: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Run every output; context_factory can supply e.g. a partitioned context for large frames.
+
+        bounds, if given, receives the error_bounds() of the results.
+        """
+        context = context_factory(self.project(df))
+        try:
+            results = self._execute(context)
+            if bounds is not None:
+                bounds.update(self.error_bounds(context))
+            return results
+        finally:
+            context.close()
+
+    def _execute(self, context: ExecutionContext) -> Dict[str, Any]:
+        tallies: Dict[str, Any] = {}
+
+        def tally(output: Dict[str, Any]) -> np.ndarray:
+            if not tallies:
+                tallies.update(self.tallies(context))
+            found = tallies[output["key"]]
+            if isinstance(found, Exception):
+                raise found
+            return found
+
+        return self.assemble(context, tally)
+
+    def tallies(self, context: ExecutionContext) -> Dict[str, Any]:
+        """Tally of every validation and score output, summed over context.parts() in one pass.
+
+        An output whose predicates cannot be evaluated gets the exception instead.
+        """
+        outputs = [output for output in self.outputs if output["type"] in ("validation", "score")]
+        totals: Dict[str, Any] = {}
+        for part in context.parts():
+            masks: Dict[int, np.ndarray] = {}
+
+            def mask(index: int) -> np.ndarray:
+                if index not in masks:
+                    masks[index] = part.mask(self.predicates[index])
+                return masks[index]
+
+            for output in outputs:
+                key = output["key"]
+                if isinstance(totals.get(key), Exception):
+                    continue
+                try:
+                    counts = self.tally(output, [mask(index) for index, _ in output["predicates"]], part.rows)
+                except Exception as e:
+                    totals[key] = e
+                    continue
+                totals[key] = totals[key] + counts if key in totals else counts
+        return totals
+
+    @staticmethod
+    def tally(output: Dict[str, Any], checks: List[np.ndarray], rows: int) -> np.ndarray:
+        """Counts behind a validation (passes per criterion) or score (rows per score) output.
+
+        Tallies of disjoint row sets add up to the tally of their union.
+        """
+        kind = output["type"]
+        if kind == "validation":
+            return np.array([np.count_nonzero(passed) for passed in checks], dtype=np.int64)
+        if kind == "score":
+            scores = np.zeros(rows, dtype=np.int64)
+            for passed in checks:
+                scores += passed
+            return np.bincount(scores, minlength=len(checks) + 1) if rows else np.zeros(len(checks) + 1, dtype=np.int64)
+        raise ValueError(f"Unsupported rule type: {kind}")
+
+    def assemble(self, context: Any, tally: Callable[[Dict[str, Any]], np.ndarray]) -> Dict[str, Any]:
+        """Every rule's output from a context's describe()/aggregate() and each output's tally.
+
+        context is an ExecutionContext or anything answering the same calls from a summary
+        of the rows, such as an incremental DatasetState.
+        """
+        aggregates: Dict[int, Any] = {}
+        results: Dict[str, Any] = {}
+
+        if self.needs_describe:
+            try:
+                context.describe()
+            except Exception as e:
+                logger.error(f"describe() failed: {e}")
+
+        def aggregate(index: int) -> Any:
+            if index not in aggregates:
+                aggregates[index] = context.aggregate(*self.aggregations[index])
+            return aggregates[index]
+
+        for output in self.outputs:
+            key = output["key"]
+            try:
+                results[key] = self._output(output, context, aggregate, tally)
+            except Exception as e:
+                logger.error(f"Rule {key} failed: {e}")
+                results[f"{key}_error"] = str(e)
+        return results
+
+    def error_bounds(self, context: Any) -> Dict[str, Any]:
+        """Error bound of every approximate value in the results assembled from context, keyed like them.
+
+        Bounds come from context.bound(column, stat) and, for describe() outputs, the stats
+        in context.described_stats; values with no bound are exact and left out, so an
+        exact context has none.
+        """
+        bounds: Dict[str, Any] = {}
+        for output in self.outputs:
+            if output["type"] != "calculation":
+                continue
+            entries: Dict[Any, Dict[str, float]] = {}
+            if output.get("describe"):
+                for column, stats in (context.described_stats or {}).items():
+                    found = {stat: context.bound(column, stat) for stat in stats}
+                    found = {stat: bound for stat, bound in found.items() if bound is not None}
+                    if found:
+                        entries[column] = found
+            else:
+                for index in output["aggregations"]:
+                    name, column_name = self.aggregations[index]
+                    try:
+                        bound = context.bound(context.resolve(column_name), name)
+                    except KeyError:
+                        continue
+                    if bound is not None:
+                        entries.setdefault(column_name, {})[name] = bound
+            if entries:
+                bounds[output["key"]] = entries
+        return bounds
+
+    def _output(self, output: Dict[str, Any], context: Any, aggregate, tally) -> Any:
+        kind = output["type"]
+        if kind == "calculation":
+            if output.get("describe"):
+                return context.describe()
+            values: Dict[str, Dict[str, Any]] = {}
+            for index in output["aggregations"]:
+                name, column = self.aggregations[index]
+                values.setdefault(column, {})[name] = aggregate(index)
+            return values
+
+        rows = context.rows
+        counts = tally(output).tolist()
+        if kind == "validation":
+            criteria = {}
+            for (_, label), count in zip(output["predicates"], counts):
+                criteria[label] = {"passed": count, "failed": rows - count, "pass_rate": count / rows if rows else None}
+            result = {"rows": rows, "criteria": criteria}
+        else:
+            result = {
+                "rows": rows,
+                "max_score": len(counts) - 1,
+                "mean_score": sum(score * count for score, count in enumerate(counts)) / rows if rows else None,
+                "distribution": {str(score): count for score, count in enumerate(counts)},
+            }
+        if output.get("unsupported"):
+            result["unsupported_criteria"] = output["unsupported"]
+        return result
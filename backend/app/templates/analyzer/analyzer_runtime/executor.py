@@ -0,0 +1,97 @@
+"""Process pool for CPU-bound analysis, with an in-flight limit for load shedding."""
+import os
+import asyncio
+import logging
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Overloaded(Exception):
+    """Raised when the in-flight limit is reached; the request should be shed with a 503"""
+
+
+class AnalysisExecutor:
+    """Runs analysis off the event loop so /health and other requests stay responsive.
+
+    ANALYZER_WORKERS processes (default: CPU count; 0 runs in a single thread instead)
+    execute the work. At most ANALYZER_MAX_IN_FLIGHT requests (default: twice the
+    workers) are running or queued; anything beyond that is rejected immediately rather
+    than piling up behind a saturated pool.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_in_flight: Optional[int] = None,
+                 initializer: Optional[Callable[[], None]] = None):
+        self.workers = workers if workers is not None else int(os.getenv("ANALYZER_WORKERS", str(os.cpu_count() or 1)))
+        self.max_in_flight = max_in_flight or int(os.getenv("ANALYZER_MAX_IN_FLIGHT", str(2 * max(self.workers, 1))))
+        self.in_flight = 0
+        self.counters = {"completed": 0, "failed": 0, "shed": 0, "pool_restarts": 0}
+        # Runs once in every worker as it starts; must be a picklable module-level function
+        self.initializer = initializer
+        self._executor: Optional[Executor] = None
+
+    def _create(self) -> Executor:
+        if self.workers <= 0:
+            return ThreadPoolExecutor(max_workers=1, initializer=self.initializer)
+        # spawn: forking a process that already runs an event loop and threads is not safe
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"), initializer=self.initializer
+        )
+
+    async def start(self):
+        self._executor = self._create()
+        # Start every worker up front so the first requests do not pay for interpreter and pandas imports
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._executor, os.getpid) for _ in range(max(self.workers, 1))))
+        logger.info(f"Analysis executor ready: {self.workers} workers, {self.max_in_flight} in flight")
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold one in-flight slot for a whole request; raises Overloaded when none are free"""
+        if self.in_flight >= self.max_in_flight:
+            self.counters["shed"] += 1
+            raise Overloaded(f"{self.in_flight} analyses in flight (limit {self.max_in_flight})")
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """Run fn(*args) in the pool; fn and its arguments must be picklable"""
+        if self._executor is None:
+            self._executor = self._create()
+        executor = self._executor
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+            self.counters["completed"] += 1
+            return result
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); replace the pool once so later requests can run
+            self.counters["failed"] += 1
+            if self._executor is executor:
+                logger.error("Analysis worker died; restarting the process pool")
+                self.counters["pool_restarts"] += 1
+                self.shutdown(wait=False)
+                self._executor = self._create()
+            raise
+        except Exception:
+            self.counters["failed"] += 1
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            **self.counters,
+        }
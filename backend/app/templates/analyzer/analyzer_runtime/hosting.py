@@ -0,0 +1,60 @@
+"""Hosting hooks: resources shared by generated analyzer modules loaded into one process.
+
+The analyzer host (host/ in the repository) imports many analyzers' main.py as separate
+modules, and the hot reloader imports successive versions of one. Before loading any,
+they install here what the modules should share; a main.py imported on its own creates
+its own instead. Every module loaded into a process also shares that process's partition
+pool, and successive versions of one analyzer share its incremental state, so a reload
+neither starts processes nor loses appended rows.
+"""
+import re
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from analyzer_runtime.executor import AnalysisExecutor
+from analyzer_runtime.incremental import IncrementalStore
+from analyzer_runtime.parallel import PartitionPool
+
+_executor: Optional[AnalysisExecutor] = None
+_partitions: Optional[PartitionPool] = None
+# Incremental store of each analyzer and the version of its plan and schema the states follow
+_incremental: Dict[str, Tuple[str, IncrementalStore]] = {}
+
+
+def share_executor(executor: Optional[AnalysisExecutor]):
+    """Run the analysis of every analyzer loaded from now on in executor (None stops sharing)"""
+    global _executor
+    _executor = executor
+
+
+def shared_executor() -> Optional[AnalysisExecutor]:
+    return _executor
+
+
+def shared_partitions() -> PartitionPool:
+    """The partition pool of this process, used by every analyzer module loaded into it"""
+    global _partitions
+    if _partitions is None:
+        _partitions = PartitionPool()
+    return _partitions
+
+
+def _analyzer(module: str) -> str:
+    """Analyzer a module is a version of: analyzer__<name>__<version> without the version"""
+    return re.sub(r"__\d+$", "", module)
+
+
+def shared_incremental(module: str, version: str, create: Callable[[], IncrementalStore]) -> IncrementalStore:
+    """Incremental store of the analyzer whose version module is; a new store only when version changes.
+
+    version identifies everything the states depend on (the rule plan and input schema).
+    A version with another one replaces the previous store, whose states it cannot continue.
+    """
+    key = _analyzer(module)
+    if key not in _incremental or _incremental[key][0] != version:
+        _incremental[key] = (version, create())
+    return _incremental[key][1]
+
+
+def drop_incremental(module: str):
+    """Forget the incremental state of an analyzer that is no longer served"""
+    _incremental.pop(_analyzer(module), None)
@@ -0,0 +1,508 @@
+"""Incremental analysis: running per-dataset state for sheets that grow by appended rows.
+
+Appended rows are summarized on their own into a partial DatasetState, which is merged
+into the dataset's running state; the rule plan then assembles every result from the
+merged state, so an append costs time in proportion to the new rows, not the sheet.
+
+Counts, sums, means, variances, min and max, value counts (up to max_distinct distinct
+values per column), validation passes and score distributions are exact up to float
+rounding. Quantiles and medians come from a QuantileSketch and are within the relative
+accuracy of the true value; error_bounds() reports the bound of each, and compare()
+checks a state's results against a full recompute.
+"""
+import os
+import re
+import math
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from analyzer_runtime.engine import DESCRIBE_STATS, MOMENT_AGGREGATIONS, QUANTILE_STATS, ExecutionContext, RulePlan, _number
+from analyzer_runtime.sketches import QuantileSketch
+from analyzer_runtime.streaming import DESCRIBE_PERCENTILES, NumericAccumulator, ValueCountAccumulator
+
+logger = logging.getLogger(__name__)
+
+DATASET_ID = re.compile(r"^[A-Za-z0-9._-]{1,128}$")
+# Aggregations answered from a column's ColumnSummary
+SUMMARY_AGGREGATIONS = MOMENT_AGGREGATIONS | {"min", "max", "median"}
+# Mismatches listed by compare(); the count covers all of them
+MAX_MISMATCHES = 100
+
+
+class StateNotFound(LookupError):
+    pass
+
+
+class OffsetMismatch(ValueError):
+    """Rows were appended against a different row count than the state holds"""
+
+    def __init__(self, dataset: str, offset: int, rows: int):
+        super().__init__(f"Dataset {dataset} holds {rows} rows, not {offset}; append from row {rows}")
+        self.rows = rows
+
+
+class StateEvicted(OffsetMismatch):
+    """The dataset's state was evicted; its rows must be appended again from row 0"""
+
+    def __init__(self, dataset: str, rows: int):
+        ValueError.__init__(self, f"Dataset {dataset} was evicted after {rows} rows; append every row again from row 0")
+        self.rows = 0
+
+
+class ColumnSummary:
+    """Moments, exact sum and quantile sketch of one column's values.
+
+    Datetime columns are summarized as nanoseconds after an anchor (the first value seen),
+    which keeps float64 precise; their sketch error is relative to the distance from it.
+    """
+
+    __slots__ = ("moments", "total", "sketch", "anchor")
+
+    def __init__(self, accuracy: float, anchor: Optional[int] = None):
+        self.moments = NumericAccumulator()
+        self.total = 0.0
+        self.sketch = QuantileSketch(accuracy)
+        self.anchor = anchor
+
+    def update(self, values: np.ndarray):
+        self.moments.update(values)
+        self.total += float(np.nansum(values))
+        self.sketch.update(values)
+
+    def merge(self, other: "ColumnSummary"):
+        self.moments.merge(other.moments)
+        self.total += other.total
+        self.sketch.merge(other.sketch)
+
+    def value(self, offset: float) -> Any:
+        """A summarized value as reported: a Timestamp for datetime columns"""
+        if self.anchor is None:
+            return offset
+        return pd.Timestamp(self.anchor + int(round(offset)))
+
+
+class DatasetState:
+    """Mergeable summary of every row appended to one dataset, shaped by the rule plan.
+
+    The first append fixes the layout: the columns and their kinds, which columns
+    describe() and the aggregations need summaries or value counts for, and the datetime
+    anchors. empty() returns a state with that layout to summarize the next rows into.
+    Answers describe() and aggregate() like an ExecutionContext, so RulePlan.assemble
+    builds results from it.
+    """
+
+    def __init__(self, plan: RulePlan, accuracy: Optional[float] = None, max_distinct: Optional[int] = None):
+        self.plan = plan
+        self.accuracy = accuracy if accuracy is not None else float(os.getenv("ANALYZER_QUANTILE_ACCURACY", "0.005"))
+        self.max_distinct = max_distinct or int(os.getenv("ANALYZER_INCREMENTAL_MAX_DISTINCT", "100000"))
+        self.rows = 0
+        self.appends = 0
+        # Input schema kinds bound by the first append; later appends are coerced to them
+        self.kinds: Optional[Dict[Any, str]] = None
+        self.columns: Optional[List[Any]] = None
+        self.described: List[Any] = []
+        self.anchors: Dict[Any, int] = {}
+        self.counts: Dict[Any, int] = {}
+        self.summaries: Dict[Any, ColumnSummary] = {}
+        self.values: Dict[Any, ValueCountAccumulator] = {}
+        self.tallies: Dict[str, np.ndarray] = {}
+        self.errors: Dict[str, str] = {}
+        self._names: Dict[str, Any] = {}
+        self._describe: Optional[Dict[Any, Dict[str, Any]]] = None
+        # (column, q) -> (value, absolute error bound)
+        self._quantiles: Dict[Tuple[Any, float], Tuple[Any, float]] = {}
+
+    def _bind(self, df: pd.DataFrame):
+        self.columns = list(df.columns)
+        self._names = {str(column).lower(): column for column in self.columns}
+        datetimes = [column for column in self.columns if pd.api.types.is_datetime64_any_dtype(df[column])]
+        # describe() reports numeric and datetime columns if there are any, otherwise every column
+        self.described = [
+            column for column in self.columns
+            if column in datetimes or (pd.api.types.is_numeric_dtype(df[column]) and not pd.api.types.is_bool_dtype(df[column]))
+        ]
+        for column in datetimes:
+            stamps = _nanoseconds(df[column])
+            valid = stamps[~np.isnan(stamps)]
+            self.anchors[column] = int(valid[0]) if len(valid) else 0
+
+        summarized = list(self.described) if self.plan.needs_describe else []
+        counted = [] if self.described or not self.plan.needs_describe else list(self.columns)
+        for name, column_name in self.plan.aggregations:
+            try:
+                column = self.resolve(column_name)
+            except KeyError:
+                continue
+            if name in SUMMARY_AGGREGATIONS and column not in summarized:
+                summarized.append(column)
+            elif name == "nunique" and column not in counted:
+                counted.append(column)
+        self._allocate(summarized, counted)
+
+    def _allocate(self, summarized: List[Any], counted: List[Any]):
+        self.counts = {column: 0 for column in self.columns}
+        self.summaries = {column: ColumnSummary(self.accuracy, self.anchors.get(column)) for column in summarized}
+        self.values = {column: ValueCountAccumulator(self.max_distinct) for column in counted}
+
+    def empty(self) -> "DatasetState":
+        """A state with this one's layout and no rows, to summarize appended rows into"""
+        state = DatasetState(self.plan, self.accuracy, self.max_distinct)
+        state.kinds = self.kinds
+        if self.columns is not None:
+            state.columns, state.described, state.anchors = self.columns, self.described, self.anchors
+            state._names = self._names
+            state._allocate(list(self.summaries), list(self.values))
+        return state
+
+    def _numeric(self, context: ExecutionContext, column: Any) -> np.ndarray:
+        if column in self.anchors:
+            return _nanoseconds(context.df[column]) - self.anchors[column]
+        return context.numeric(column)
+
+    def update(self, df: pd.DataFrame):
+        """Add rows (a frame coerced with self.kinds) to the state"""
+        if self.columns is None:
+            self._bind(df)
+        elif list(df.columns) != self.columns:
+            raise ValueError(f"Appended rows must have the columns {self.columns}, got {list(df.columns)}")
+        context = ExecutionContext(df)
+        for column in self.columns:
+            self.counts[column] += int(df[column].count())
+        for column, summary in self.summaries.items():
+            summary.update(self._numeric(context, column))
+        for column, values in self.values.items():
+            values.update(df[column])
+
+        masks: Dict[int, np.ndarray] = {}
+
+        def mask(index: int) -> np.ndarray:
+            if index not in masks:
+                masks[index] = context.mask(self.plan.predicates[index])
+            return masks[index]
+
+        for output in self.plan.outputs:
+            key = output["key"]
+            if output["type"] == "calculation" or key in self.errors:
+                continue
+            try:
+                tally = self.plan.tally(output, [mask(index) for index, _ in output["predicates"]], len(df))
+            except Exception as e:
+                self.errors[key] = str(e)
+                self.tallies.pop(key, None)
+                continue
+            self.tallies[key] = self.tallies[key] + tally if key in self.tallies else tally
+        self.rows += len(df)
+        self.appends += 1
+        self._reset()
+
+    def merge(self, other: "DatasetState"):
+        """Add another state's rows; both must share a layout (other = self.empty() plus rows)"""
+        if other.columns is None:
+            return
+        if self.columns is None:
+            raise ValueError("Cannot merge rows into a state without a layout")
+        self.rows += other.rows
+        self.appends += other.appends
+        for column, count in other.counts.items():
+            self.counts[column] += count
+        for column, summary in other.summaries.items():
+            self.summaries[column].merge(summary)
+        for column, values in other.values.items():
+            self.values[column].merge(values)
+        for key, error in other.errors.items():
+            self.errors[key] = error
+            self.tallies.pop(key, None)
+        for key, tally in other.tallies.items():
+            if key not in self.errors:
+                self.tallies[key] = self.tallies[key] + tally if key in self.tallies else tally
+        self._reset()
+
+    def _reset(self):
+        self._describe = None
+        self._quantiles = {}
+
+    def resolve(self, name: str) -> Any:
+        """Exact column name first, then a case-insensitive match"""
+        if name in self.columns:
+            return name
+        try:
+            return self._names[str(name).lower()]
+        except KeyError:
+            raise KeyError(f"Unknown column: {name}")
+
+    def _tally(self, output: Dict[str, Any]) -> np.ndarray:
+        key = output["key"]
+        if key in self.errors:
+            raise RuntimeError(self.errors[key])
+        return self.tallies[key]
+
+    def quantile(self, column: Any, q: float) -> Any:
+        """Linear interpolation between sketched order statistics, as pandas computes quantiles"""
+        cached = self._quantiles.get((column, q))
+        if cached is None:
+            summary = self.summaries[column]
+            count = summary.moments.count
+            if not count:
+                cached = (np.nan if summary.anchor is None else pd.NaT, 0.0)
+            else:
+                position = (count - 1) * q
+                below, above = int(np.floor(position)), int(np.ceil(position))
+                values = summary.sketch.order_statistics([below, above], summary.moments.minimum, summary.moments.maximum)
+                bound = max(0.0 if rank in (0, count - 1) else summary.sketch.error_bound(values[rank]) for rank in (below, above))
+                offset = values[below] + (values[above] - values[below]) * (position - below)
+                # Datetime bounds are reported in seconds
+                cached = (summary.value(offset), bound if summary.anchor is None else bound / 1e9)
+            self._quantiles[(column, q)] = cached
+        return cached[0]
+
+    def _describe_summary(self, column: Any) -> Dict[str, Any]:
+        summary = self.summaries[column]
+        moments = summary.moments
+        empty = not moments.count
+        stats: Dict[str, Any] = {"count": float(moments.count) if summary.anchor is None else moments.count}
+        stats["mean"] = np.nan if empty else summary.value(moments.mean)
+        if summary.anchor is None:
+            stats["std"] = moments.std
+        stats["min"] = np.nan if empty else summary.value(moments.minimum)
+        for q in DESCRIBE_PERCENTILES:
+            stats[f"{q * 100:g}%"] = self.quantile(column, q)
+        stats["max"] = np.nan if empty else summary.value(moments.maximum)
+        if empty and summary.anchor is not None:
+            stats.update({key: pd.NaT for key in ("mean", "min", "max")})
+        return stats
+
+    def _describe_values(self, column: Any) -> Dict[str, Any]:
+        accumulator = self.values[column]
+        if accumulator.counts is None:
+            raise ValueError(f"Column {column} has more than {self.max_distinct} distinct values")
+        top, freq = accumulator.counts.most_common(1)[0] if accumulator.counts else (np.nan, np.nan)
+        return {"count": accumulator.count, "unique": len(accumulator.counts), "top": top, "freq": freq}
+
+    def describe(self) -> Dict[Any, Dict[str, Any]]:
+        """Same shape as DataFrame.describe().to_dict() for the rows appended so far"""
+        if self._describe is None:
+            if self.described:
+                describe = {column: self._describe_summary(column) for column in self.described}
+                if len(self.anchors) < len(self.described):
+                    for column in self.anchors:
+                        describe[column]["std"] = np.nan
+            else:
+                describe = {column: self._describe_values(column) for column in self.columns}
+            self._describe = describe
+        return self._describe
+
+    @property
+    def described_stats(self) -> Optional[Dict[Any, Dict[str, Any]]]:
+        """describe() as the last results() computed it, None if no rule asked for it"""
+        return self._describe
+
+    def aggregate(self, name: str, column_name: str) -> Any:
+        column = self.resolve(column_name)
+        if self._describe is not None and name in DESCRIBE_STATS:
+            stats = self._describe.get(column, {})
+            if DESCRIBE_STATS[name] in stats:
+                return _number(stats[DESCRIBE_STATS[name]])
+        if name == "count":
+            return self.counts[column]
+        if name == "nunique":
+            counts = self.values[column].counts
+            if counts is None:
+                raise ValueError(f"Column {column} has more than {self.max_distinct} distinct values")
+            return len(counts)
+        if name not in SUMMARY_AGGREGATIONS:
+            raise ValueError(f"Unsupported aggregation: {name}")
+        summary = self.summaries[column]
+        moments = summary.moments
+        count = moments.count
+        if name in MOMENT_AGGREGATIONS:
+            # Datetime offsets are shifted back by the anchor; ExecutionContext sees nanoseconds
+            shift = summary.anchor or 0
+            var = moments.m2 / (count - 1) if count > 1 else np.nan
+            total = summary.total + shift * count
+            return {"sum": total, "mean": total / count if count else np.nan, "var": var, "std": float(np.sqrt(var))}[name]
+        if not count:
+            return np.nan
+        if name == "median":
+            return self.quantile(column, 0.5)
+        return summary.value(moments.minimum if name == "min" else moments.maximum)
+
+    def results(self) -> Dict[str, Any]:
+        return self.plan.assemble(self, self._tally)
+
+    def bound(self, column: Any, stat: str) -> Optional[float]:
+        """Error bound of a sketched quantile (in seconds for datetime columns); the rest is exact"""
+        q = QUANTILE_STATS.get(stat)
+        if q is None or (column, q) not in self._quantiles:
+            return None
+        return self._quantiles[(column, q)][1]
+
+    def error_bounds(self) -> Dict[str, Any]:
+        """Absolute error bound of every approximate value in the last results(), keyed like them"""
+        return self.plan.error_bounds(self)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"rows": self.rows, "appends": self.appends, "quantile_relative_accuracy": self.accuracy}
+
+
+def _nanoseconds(series: pd.Series) -> np.ndarray:
+    """Datetime values as float64 nanoseconds since the epoch, NaT as NaN"""
+    if getattr(series.dt, "tz", None) is not None:
+        series = series.dt.tz_convert(None)
+    values = series.to_numpy(dtype="datetime64[ns]").view(np.int64).astype(np.float64)
+    values[series.isna().to_numpy()] = np.nan
+    return values
+
+
+def _comparable(value: Any) -> Any:
+    """NumPy scalars as Python numbers, missing values as None"""
+    if value is None or value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def compare(expected: Any, actual: Any, bounds: Optional[Dict[str, Any]] = None, tolerance: float = 1e-9) -> Dict[str, Any]:
+    """Differences between the results of a full recompute (expected) and of a state (actual).
+
+    Numbers match when they differ by no more than their error bound plus a relative
+    tolerance for float rounding; everything else must be equal.
+    """
+    mismatches: List[Dict[str, Any]] = []
+    totals = {"compared": 0, "mismatched": 0, "max_relative_error": 0.0}
+
+    def walk(path: List[str], left: Any, right: Any, bound: Any):
+        if isinstance(left, dict) or isinstance(right, dict):
+            if not (isinstance(left, dict) and isinstance(right, dict)):
+                report(path, left, right, None)
+                return
+            for key in list(left) + [key for key in right if key not in left]:
+                walk(path + [str(key)], left.get(key), right.get(key), bound.get(key) if isinstance(bound, dict) else None)
+            return
+        totals["compared"] += 1
+        left, right = _comparable(left), _comparable(right)
+        if isinstance(left, pd.Timestamp) and isinstance(right, pd.Timestamp):
+            # Datetime bounds are in seconds; exact values may differ by float rounding of the offsets
+            allowed = (bound if isinstance(bound, (int, float)) else 0.0) + 1e-6
+            if abs((left - right).total_seconds()) > allowed:
+                report(path, left, right, allowed)
+            return
+        numbers = all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in (left, right))
+        if not numbers:
+            if left != right:
+                report(path, left, right, None)
+            return
+        difference = abs(left - right)
+        if difference:
+            totals["max_relative_error"] = max(totals["max_relative_error"], difference / max(abs(left), 1e-12))
+        allowed = (bound if isinstance(bound, (int, float)) else 0.0) + tolerance * max(abs(left), abs(right), 1.0)
+        if difference > allowed:
+            report(path, left, right, allowed)
+
+    def report(path: List[str], left: Any, right: Any, allowed: Optional[float]):
+        totals["mismatched"] += 1
+        if len(mismatches) < MAX_MISMATCHES:
+            mismatches.append({"path": path, "expected": left, "actual": right, "allowed": allowed})
+
+    walk([], expected, actual, bounds or {})
+    return {"matches": not totals["mismatched"], **totals, "mismatches": mismatches}
+
+
+class IncrementalStore:
+    """Running DatasetStates by dataset id, least recently used evicted past max_datasets.
+
+    Appends to one dataset are serialized by lock(); an append may name the row count it
+    extends (offset), so a retried, reordered or lost append is refused instead of
+    counted twice or skipped. Evicted datasets are remembered: appending to one is
+    refused until it starts again at offset 0, so a state never silently loses its history.
+    """
+
+    def __init__(self, plan: RulePlan, max_datasets: Optional[int] = None):
+        self.plan = plan
+        self.max_datasets = max_datasets if max_datasets is not None else int(os.getenv("ANALYZER_INCREMENTAL_DATASETS", "100"))
+        self._states: "OrderedDict[str, DatasetState]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # Row counts of evicted datasets, most recent last; kept for ten times as many ids as states
+        self._evicted: "OrderedDict[str, int]" = OrderedDict()
+        self.evictions = 0
+
+    @staticmethod
+    def check_id(dataset: str) -> str:
+        if not DATASET_ID.match(dataset):
+            raise ValueError("Dataset ids are 1-128 letters, digits, '.', '_' or '-'")
+        return dataset
+
+    def lock(self, dataset: str) -> asyncio.Lock:
+        return self._locks.setdefault(dataset, asyncio.Lock())
+
+    def template(self, dataset: str, offset: Optional[int] = None) -> Tuple[DatasetState, int]:
+        """Empty state with the dataset's layout for a worker to summarize appended rows into, and its row count"""
+        state = self._states.get(dataset)
+        if state is None and dataset in self._evicted:
+            if offset != 0:
+                raise StateEvicted(dataset, self._evicted[dataset])
+            del self._evicted[dataset]
+        rows = state.rows if state is not None else 0
+        if offset is not None and offset != rows:
+            raise OffsetMismatch(dataset, offset, rows)
+        return (state.empty() if state is not None else DatasetState(self.plan)), rows
+
+    def append(self, dataset: str, partial: DatasetState, rows: int) -> DatasetState:
+        """Merge rows summarized against a template of rows rows into the dataset's state"""
+        state = self._states.get(dataset)
+        if state is None and rows:
+            # Evicted by other datasets' appends while these rows were summarized
+            self._locks.pop(dataset, None)
+            raise StateEvicted(dataset, self._evicted.get(dataset, rows))
+        if state is None:
+            state = self._states[dataset] = partial
+        else:
+            state.merge(partial)
+            self._states.move_to_end(dataset)
+        while len(self._states) > self.max_datasets:
+            evicted, old = self._states.popitem(last=False)
+            self._evict(evicted, old.rows)
+        return state
+
+    def _evict(self, dataset: str, rows: int):
+        self.evictions += 1
+        self._evicted[dataset] = rows
+        self._evicted.move_to_end(dataset)
+        while len(self._evicted) > 10 * self.max_datasets:
+            self._evicted.popitem(last=False)
+        # A lock still held belongs to an append that will find the state gone and drop it then
+        lock = self._locks.get(dataset)
+        if lock is not None and not lock.locked():
+            del self._locks[dataset]
+        logger.info(f"Evicted incremental state of dataset {dataset} ({rows} rows)")
+
+    def get(self, dataset: str) -> DatasetState:
+        state = self._states.get(dataset)
+        if state is None and dataset in self._evicted:
+            raise StateNotFound(f"Dataset {dataset} was evicted after {self._evicted[dataset]} rows")
+        if state is None:
+            raise StateNotFound(f"No rows appended to dataset {dataset}")
+        self._states.move_to_end(dataset)
+        return state
+
+    def delete(self, dataset: str) -> bool:
+        lock = self._locks.get(dataset)
+        if lock is not None and not lock.locked():
+            del self._locks[dataset]
+        evicted = self._evicted.pop(dataset, None) is not None
+        return self._states.pop(dataset, None) is not None or evicted
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "datasets": len(self._states),
+            "max_datasets": self.max_datasets,
+            "rows": sum(state.rows for state in self._states.values()),
+            "evictions": self.evictions,
+        }
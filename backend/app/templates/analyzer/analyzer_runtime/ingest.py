@@ -0,0 +1,47 @@
+"""Spreadsheet ingestion: the {rows: [{cells: [{value}]}]} payload to a DataFrame."""
+from itertools import chain, islice, repeat
+from operator import itemgetter, methodcaller
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+_cells = itemgetter("cells")
+_value = itemgetter("value")
+_value_or_none = methodcaller("get", "value")
+
+
+def _headers(header_cells: List[Dict[str, Any]]) -> List[Any]:
+    return [value.strip() if isinstance(value, str) else value for value in map(_value_or_none, header_cells)]
+
+
+def sheet_to_frame(data: Dict[str, Any]) -> pd.DataFrame:
+    """Decode the cell format into a DataFrame in one pass.
+
+    Cell values are pulled out in C (map/itemgetter over a chained iterator) and streamed by
+    np.fromiter into a single flat object buffer that becomes the frame's only block, so no
+    per-row lists or intermediate row-major copies are built. Ragged rows are padded with
+    None or truncated to the header width.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("rows"), list):
+        raise ValueError("Invalid data structure")
+    rows = data["rows"]
+    if not rows or "cells" not in rows[0]:
+        raise ValueError("Invalid data structure")
+
+    headers = _headers(rows[0]["cells"])
+    width = len(headers)
+    row_cells = list(map(_cells, islice(rows, 1, None)))
+    count = len(row_cells) * width
+
+    if set(map(len, row_cells)) <= {width}:
+        try:
+            buffer = np.fromiter(map(_value, chain.from_iterable(row_cells)), dtype=object, count=count)
+        except KeyError:
+            # Some cells omit "value"; fall back to the slower tolerant lookup
+            buffer = np.fromiter(map(_value_or_none, chain.from_iterable(row_cells)), dtype=object, count=count)
+    else:
+        padded = chain.from_iterable(islice(chain(cells, repeat({})), width) for cells in row_cells)
+        buffer = np.fromiter(map(_value_or_none, padded), dtype=object, count=count)
+
+    return pd.DataFrame(buffer.reshape(len(row_cells), width), columns=headers, copy=False)
@@ -0,0 +1,273 @@
+"""Partitioned analysis: one large frame split across ANALYZER_PARTITIONS processes.
+
+The numeric columns are copied once into a shared-memory block (one contiguous float64
+column after another). Partition workers attach to it by name and compute mergeable
+partials over row ranges, so the frame is never pickled: NumericAccumulator moments
+with sums, min and max, and the histogram passes of order_statistics for exact
+quantiles and medians. The parent merges the partials and answers every describe() and
+aggregation from them; predicates and non-numeric columns are evaluated as before.
+
+Frames below ANALYZER_PARTITION_MIN_ROWS rows and describe() over datetime columns use
+the serial ExecutionContext, and a request spilled to disk a SpilledContext.
+"""
+import os
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory, util
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from analyzer_runtime.engine import ExecutionContext
+from analyzer_runtime.streaming import (
+    DESCRIBE_PERCENTILES, IntervalScan, IntervalSpec, NumericAccumulator, OutOfCoreFrame, SpilledContext, merge_scans,
+    order_statistics, scan_intervals,
+)
+
+logger = logging.getLogger(__name__)
+
+# Values an order-statistics interval may hold before partitions return them instead of a histogram
+COLLECT_LIMIT = 1 << 16
+
+# Partial per column: (count, sum, mean, m2, min, max)
+Partial = Tuple[int, float, float, float, float, float]
+
+
+class SharedColumns(NamedTuple):
+    """Picklable reference to the shared block: shape is (columns, rows)"""
+    name: str
+    columns: int
+    rows: int
+
+
+def _view(ref: SharedColumns, block: shared_memory.SharedMemory) -> np.ndarray:
+    return np.ndarray((ref.columns, ref.rows), dtype=np.float64, buffer=block.buf)
+
+
+def _partials(values: np.ndarray) -> List[Partial]:
+    partials = []
+    for column in values:
+        valid = column[~np.isnan(column)]
+        if not len(valid):
+            partials.append((0, 0.0, 0.0, 0.0, np.inf, -np.inf))
+            continue
+        mean = float(valid.mean())
+        partials.append((len(valid), float(valid.sum()), mean, float(np.square(valid - mean).sum()),
+                         float(valid.min()), float(valid.max())))
+    return partials
+
+
+def _summarize(ref: SharedColumns, start: int, stop: int) -> List[Partial]:
+    """Partition task: moments, sum and range of every column over rows [start, stop)"""
+    block = shared_memory.SharedMemory(name=ref.name)
+    try:
+        # Views into the block must be gone before it is closed, so none outlive this call
+        return _partials(_view(ref, block)[:, start:stop])
+    finally:
+        block.close()
+
+
+def _valid_batches(column: np.ndarray) -> List[np.ndarray]:
+    return [column[~np.isnan(column)]]
+
+
+def _scan(ref: SharedColumns, index: int, start: int, stop: int, specs: List[IntervalSpec]) -> List[IntervalScan]:
+    """Partition task: one order_statistics pass over a column's rows [start, stop)"""
+    block = shared_memory.SharedMemory(name=ref.name)
+    try:
+        return scan_intervals(_valid_batches(_view(ref, block)[index, start:stop]), specs)
+    finally:
+        block.close()
+
+
+class PartitionedContext(ExecutionContext):
+    """ExecutionContext whose numeric statistics are computed by partition workers"""
+
+    def __init__(self, df: pd.DataFrame, pool: "PartitionPool"):
+        super().__init__(df)
+        self.pool = pool
+        self.numeric_columns = [
+            column for column in df.columns
+            if pd.api.types.is_numeric_dtype(df[column]) and not pd.api.types.is_bool_dtype(df[column])
+        ]
+        self._positions = {column: index for index, column in enumerate(self.numeric_columns)}
+        self._block: Optional[shared_memory.SharedMemory] = None
+        self._ref: Optional[SharedColumns] = None
+        self._summaries: Optional[Dict[Any, Tuple[NumericAccumulator, float]]] = None
+        self._quantiles: Dict[Any, Dict[int, float]] = {}
+
+    def _shared(self) -> SharedColumns:
+        """Copy the numeric columns into shared memory on first use"""
+        if self._ref is None:
+            rows = len(self.df)
+            self._block = shared_memory.SharedMemory(create=True, size=max(len(self.numeric_columns) * rows * 8, 1))
+            self._ref = SharedColumns(self._block.name, len(self.numeric_columns), rows)
+            values = _view(self._ref, self._block)
+            for index, column in enumerate(self.numeric_columns):
+                # Reuse the float64 view the serial path would build; it lands in shared memory directly
+                values[index] = self.df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+            del values
+        return self._ref
+
+    def close(self):
+        if self._block is not None:
+            self._block.close()
+            self._block.unlink()
+            self._block = None
+
+    def summaries(self) -> Dict[Any, Tuple[NumericAccumulator, float]]:
+        """Merged moments and sum of every numeric column, from one round of partition tasks"""
+        if self._summaries is None:
+            ref = self._shared()
+            parts = self.pool.map(_summarize, [(ref, start, stop) for start, stop in self.pool.ranges(ref.rows)])
+            self._summaries = {}
+            for index, column in enumerate(self.numeric_columns):
+                accumulator, total = NumericAccumulator(), 0.0
+                for part in parts:
+                    count, subtotal, mean, m2, minimum, maximum = part[index]
+                    partial = NumericAccumulator()
+                    partial.count, partial.mean, partial.m2, partial.minimum, partial.maximum = count, mean, m2, minimum, maximum
+                    accumulator.merge(partial)
+                    total += subtotal
+                self._summaries[column] = (accumulator, total)
+        return self._summaries
+
+    def order_statistics(self, column: Any, ranks: List[int]) -> Dict[int, float]:
+        """Exact k-th smallest values, each histogram pass split across the partitions"""
+        known = self._quantiles.setdefault(column, {})
+        missing = [rank for rank in ranks if rank not in known]
+        if missing:
+            accumulator, _ = self.summaries()[column]
+            ref, index = self._shared(), self._positions[column]
+            ranges = self.pool.ranges(ref.rows)
+
+            def scan(specs: List[IntervalSpec]) -> List[IntervalScan]:
+                return merge_scans(self.pool.map(_scan, [(ref, index, start, stop, specs) for start, stop in ranges]))
+
+            # A low collect limit keeps the histogram passes in the workers; only small intervals come back
+            known.update(order_statistics(None, missing, accumulator.minimum, accumulator.maximum, accumulator.count,
+                                          collect_limit=COLLECT_LIMIT, scan=scan))
+        return {rank: known[rank] for rank in ranks}
+
+    def quantiles(self, column: Any, qs: List[float]) -> List[float]:
+        """Linear interpolation between order statistics, as pandas computes quantiles"""
+        count = self.summaries()[column][0].count
+        if not count:
+            return [np.nan] * len(qs)
+        positions = [(count - 1) * q for q in qs]
+        ranks = sorted({int(np.floor(p)) for p in positions} | {int(np.ceil(p)) for p in positions})
+        values = self.order_statistics(column, ranks)
+        results = []
+        for position in positions:
+            below, above = values[int(np.floor(position))], values[int(np.ceil(position))]
+            results.append(below + (above - below) * (position - np.floor(position)))
+        return results
+
+    def _describable(self) -> bool:
+        """describe() can be assembled from partials: numeric columns only, no datetimes"""
+        return bool(self.numeric_columns) and not any(
+            pd.api.types.is_datetime64_any_dtype(self.df[column]) or pd.api.types.is_timedelta64_dtype(self.df[column])
+            for column in self.df.columns
+        )
+
+    def describe(self) -> Dict[Any, Dict[str, Any]]:
+        if self._describe is not None:
+            return self._describe
+        if not self._describable():
+            return super().describe()
+        summaries = self.summaries()
+        # Quantile searches for different columns run concurrently; each fans out to the partitions
+        with ThreadPoolExecutor(max_workers=self.pool.workers) as threads:
+            quantiles = dict(zip(self.numeric_columns, threads.map(
+                lambda column: self.quantiles(column, list(DESCRIBE_PERCENTILES)), self.numeric_columns
+            )))
+        self._describe = {}
+        for column in self.numeric_columns:
+            accumulator, _ = summaries[column]
+            empty = not accumulator.count
+            stats = {
+                "count": float(accumulator.count),
+                "mean": np.nan if empty else accumulator.mean,
+                "std": accumulator.std,
+                "min": np.nan if empty else accumulator.minimum,
+            }
+            for q, value in zip(DESCRIBE_PERCENTILES, quantiles[column]):
+                stats[f"{q * 100:g}%"] = value
+            stats["max"] = np.nan if empty else accumulator.maximum
+            self._describe[column] = stats
+        return self._describe
+
+    def moments(self, column: Any) -> Dict[str, float]:
+        if column not in self._positions:
+            return super().moments(column)
+        accumulator, total = self.summaries()[column]
+        count = accumulator.count
+        var = accumulator.m2 / (count - 1) if count > 1 else np.nan
+        return {"count": count, "sum": total, "mean": accumulator.mean if count else np.nan, "var": var,
+                "std": float(np.sqrt(var))}
+
+    def aggregate(self, name: str, column_name: str) -> Any:
+        column = self.resolve(column_name)
+        if column in self._positions and name in ("min", "max", "median") and self._describe is None:
+            accumulator, _ = self.summaries()[column]
+            if not accumulator.count:
+                return np.nan
+            if name == "median":
+                return float(self.quantiles(column, [0.5])[0])
+            return accumulator.minimum if name == "min" else accumulator.maximum
+        return super().aggregate(name, column_name)
+
+
+class PartitionPool:
+    """Processes that run partition tasks for the analysis in this process.
+
+    Disabled unless ANALYZER_PARTITIONS is set; it then holds that many processes,
+    started on first use or by start(). Each analysis worker owns one pool (hosting's
+    shared_partitions(), whichever analyzers it runs), so size
+    ANALYZER_WORKERS x ANALYZER_PARTITIONS to the cores available (e.g. one analysis
+    worker with a partition per core for a few large sheets).
+    """
+
+    def __init__(self, workers: Optional[int] = None, min_rows: Optional[int] = None):
+        self.workers = workers if workers is not None else int(os.getenv("ANALYZER_PARTITIONS", "0"))
+        self.min_rows = min_rows if min_rows is not None else int(os.getenv("ANALYZER_PARTITION_MIN_ROWS", "250000"))
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def start(self):
+        if self.enabled and self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            # Inside an analysis worker process, multiprocessing joins child processes on exit
+            # before the executor's own exit hook runs; shut the partitions down ahead of that (and
+            # of the finalizers that close the executor's queues, which run at priority 10)
+            util.Finalize(self, self.shutdown, exitpriority=100)
+            for future in [self._executor.submit(os.getpid) for _ in range(self.workers)]:
+                future.result()
+            logger.info(f"Partition pool ready: {self.workers} processes")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def ranges(self, rows: int) -> List[Tuple[int, int]]:
+        bounds = np.linspace(0, rows, self.workers + 1).astype(int)
+        return [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+    def map(self, fn, argument_lists: List[tuple]) -> List[Any]:
+        self.start()
+        futures = [self._executor.submit(fn, *arguments) for arguments in argument_lists]
+        return [future.result() for future in futures]
+
+    def context(self, df: Any) -> ExecutionContext:
+        """Partitioned context for large frames, the serial one otherwise"""
+        if isinstance(df, OutOfCoreFrame):
+            return SpilledContext(df)
+        if self.enabled and isinstance(df, pd.DataFrame) and len(df) >= self.min_rows:
+            return PartitionedContext(df, self)
+        return ExecutionContext(df)
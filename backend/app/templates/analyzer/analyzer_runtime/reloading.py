@@ -0,0 +1,321 @@
+"""Hot code swap: serve main.py as numbered versions and switch to a new one without a restart.
+
+Every version of an analyzer's main.py is copied to a snapshot file named
+analyzer__<name>__<version>.py and imported from there, so its code stays fixed however
+often main.py changes afterwards. Analysis workers import the same snapshots when they
+unpickle a version's functions, so a request runs on one version from end to end. A new
+version is swapped in only after it has imported completely; requests already running
+finish on the version they started on, and its snapshot is deleted once they have.
+
+HotReloader is the ASGI app a generated analyzer serves (uvicorn analyzer_runtime.serve:app).
+It checks main.py every ANALYZER_RELOAD_INTERVAL seconds (default 0.25; 0 turns it off).
+"""
+import os
+import re
+import sys
+import time
+import shutil
+import asyncio
+import hashlib
+import logging
+import tempfile
+import importlib.abc
+import importlib.util
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from analyzer_runtime.executor import AnalysisExecutor
+from analyzer_runtime.hosting import drop_incremental, share_executor, shared_partitions
+
+logger = logging.getLogger(__name__)
+
+MODULE_NAME = re.compile(r"^analyzer__(?P<name>[A-Za-z0-9_-]{1,128})__(?P<version>\d+)$")
+
+# (modification time in ns, size) of a main.py
+Signature = Tuple[int, int]
+
+
+def module_name(name: str, version: int) -> str:
+    return f"analyzer__{name}__{version}"
+
+
+def code_version(module: str) -> Optional[int]:
+    """Version number of a module loaded by CodeLoader; None when main.py was imported directly"""
+    match = MODULE_NAME.match(module)
+    return int(match["version"]) if match else None
+
+
+def snapshot_directory() -> str:
+    """Directory of version snapshots, shared with analysis workers through ANALYZER_SNAPSHOT_DIR"""
+    directory = os.getenv("ANALYZER_SNAPSHOT_DIR")
+    if not directory:
+        directory = os.environ["ANALYZER_SNAPSHOT_DIR"] = tempfile.mkdtemp(prefix="analyzer-snapshots-")
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+class SnapshotFinder(importlib.abc.MetaPathFinder):
+    """Imports analyzer__<name>__<version> modules from their snapshot files.
+
+    Importing a version drops older versions of the same analyzer from sys.modules, so a
+    long-lived analysis worker keeps only what it still runs.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def find_spec(self, fullname: str, path: Any = None, target: Any = None):
+        match = MODULE_NAME.match(fullname)
+        if match is None:
+            return None
+        snapshot = os.path.join(self.directory, fullname + ".py")
+        if not os.path.exists(snapshot):
+            return None
+        prefix = module_name(match["name"], "")
+        for loaded in [name for name in sys.modules if name.startswith(prefix)]:
+            if code_version(loaded) is not None and code_version(loaded) < int(match["version"]):
+                del sys.modules[loaded]
+        return importlib.util.spec_from_file_location(fullname, snapshot)
+
+
+def install_finder(directory: str):
+    if not any(isinstance(finder, SnapshotFinder) for finder in sys.meta_path):
+        sys.meta_path.append(SnapshotFinder(directory))
+
+
+def start_worker():
+    """Analysis worker initializer: lets the worker import loaded versions by module name.
+
+    Also starts the worker's partition pool, which every version it imports shares.
+    """
+    install_finder(os.environ["ANALYZER_SNAPSHOT_DIR"])
+    shared_partitions().start()
+
+
+class LoadedVersion:
+    """One imported version of an analyzer and the requests it is serving"""
+
+    def __init__(self, name: str, version: int, module: Any, snapshot: str, digest: str,
+                 signature: Signature, load_seconds: float):
+        self.name = name
+        self.version = version
+        self.module = module
+        self.app = module.app
+        self.snapshot = snapshot
+        self.digest = digest
+        self.signature = signature
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+        self.in_flight = 0
+        self.requests = 0
+        self.retired = False
+
+    def retire(self):
+        self.retired = True
+        self.release()
+
+    def release(self):
+        """Forget a retired version once its last request is done; until then workers may still import it"""
+        if self.retired and not self.in_flight:
+            sys.modules.pop(self.module.__name__, None)
+            try:
+                os.remove(self.snapshot)
+            except FileNotFoundError:
+                pass
+
+    @contextmanager
+    def serving(self) -> Iterator[None]:
+        self.in_flight += 1
+        self.requests += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "load_ms": round(self.load_seconds * 1000, 1),
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+        }
+
+
+class CodeLoader:
+    """Successive versions of one analyzer's main.py; version numbers only ever go up"""
+
+    def __init__(self, name: str, path: str, snapshots: str):
+        if not MODULE_NAME.match(module_name(name, 0)):
+            raise ValueError(f"Invalid analyzer name: {name}")
+        self.name = name
+        self.path = path
+        self.snapshots = snapshots
+        self.current: Optional[LoadedVersion] = None
+        self.version = 0
+        # Signature of a main.py that failed to load and the error, so it is retried only once it changes
+        self.failed: Optional[Tuple[Signature, str]] = None
+        # Replaced versions still finishing requests
+        self.draining: List[LoadedVersion] = []
+
+    def signature(self) -> Optional[Signature]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def stale(self) -> bool:
+        """main.py exists and has changed since the current version, or a failed attempt, was read"""
+        signature = self.signature()
+        if signature is None or (self.failed is not None and self.failed[0] == signature):
+            return False
+        return self.current is None or self.current.signature != signature
+
+    def _import(self) -> Optional[LoadedVersion]:
+        """Import main.py as the next version; None when its content is that of the current one"""
+        signature = self.signature()
+        if signature is None:
+            raise FileNotFoundError(f"No analyzer code at {self.path}")
+        started = time.perf_counter()
+        with open(self.path, "rb") as f:
+            source = f.read()
+        digest = hashlib.blake2b(source, digest_size=16).hexdigest()
+        if self.current is not None and self.current.digest == digest:
+            self.current.signature = signature
+            return None
+        version = self.version + 1
+        fullname = module_name(self.name, version)
+        snapshot = os.path.join(self.snapshots, fullname + ".py")
+        partial = snapshot + ".tmp"
+        with open(partial, "wb") as f:
+            f.write(source)
+        os.replace(partial, snapshot)
+        spec = importlib.util.spec_from_file_location(fullname, snapshot)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[fullname] = module
+        try:
+            spec.loader.exec_module(module)
+            if not hasattr(module, "app"):
+                raise ValueError(f"{self.path} defines no app")
+        except BaseException:
+            sys.modules.pop(fullname, None)
+            os.remove(snapshot)
+            raise
+        self.version = version
+        return LoadedVersion(self.name, version, module, snapshot, digest, signature, time.perf_counter() - started)
+
+    async def load(self) -> LoadedVersion:
+        """Import main.py in a thread and serve it from the next request on; raises if it does not load"""
+        signature = self.signature()
+        try:
+            loaded = await asyncio.to_thread(self._import)
+        except Exception as e:
+            if signature is not None:
+                self.failed = (signature, str(e))
+            raise
+        self.failed = None
+        if loaded is None:
+            return self.current
+        previous, self.current = self.current, loaded
+        if previous is not None:
+            self._retire(previous)
+        logger.info(f"Serving {self.name} version {loaded.version} (loaded in {loaded.load_seconds * 1000:.0f}ms)")
+        return loaded
+
+    def _retire(self, version: LoadedVersion):
+        version.retire()
+        self.draining = [old for old in self.draining + [version] if old.in_flight]
+
+    def unload(self) -> bool:
+        if self.current is None:
+            return False
+        self._retire(self.current)
+        self.current = None
+        drop_incremental(module_name(self.name, self.version))
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        self.draining = [old for old in self.draining if old.in_flight]
+        return {
+            **(self.current.stats() if self.current is not None else {"version": None}),
+            "draining": {old.version: old.in_flight for old in self.draining},
+            "error": self.failed[1] if self.failed is not None else None,
+        }
+
+
+class HotReloader:
+    """ASGI app serving <directory>/main.py, switching to every new version of it as it is written.
+
+    The reloader owns the analysis worker pool and shares it with each version, as it
+    does the partition pools and incremental state (see hosting), so a swap costs one
+    import of main.py and no new processes.
+    """
+
+    def __init__(self, directory: Optional[str] = None, poll_interval: Optional[float] = None):
+        self.path = os.path.join(os.path.abspath(directory or os.getcwd()), "main.py")
+        self.poll_interval = (
+            poll_interval if poll_interval is not None else float(os.getenv("ANALYZER_RELOAD_INTERVAL", "0.25"))
+        )
+        self.executor = AnalysisExecutor(initializer=start_worker)
+        self.loader: Optional[CodeLoader] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        # Workers find snapshots through ANALYZER_SNAPSHOT_DIR, so it is set before they start
+        self.loader = CodeLoader("main", self.path, snapshot_directory())
+        share_executor(self.executor)
+        await self.executor.start()
+        await self.loader.load()
+        if self.poll_interval > 0:
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.executor.shutdown()
+        shared_partitions().shutdown()
+        share_executor(None)
+        if self.loader is not None:
+            shutil.rmtree(self.loader.snapshots, ignore_errors=True)
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if not self.loader.stale():
+                continue
+            try:
+                await self.loader.load()
+            except Exception as e:
+                logger.error(f"Still serving version {self.loader.version}: {self.path} failed to load: {e}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.start()
+                except Exception as e:
+                    logger.error(f"Analyzer failed to start: {e}")
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        # Bound once per request: a swap while it runs does not affect it
+        current = self.loader.current
+        with current.serving():
+            await current.app(scope, receive, send)
@@ -0,0 +1,121 @@
+"""Response encoding: analysis results straight to JSON bytes.
+
+orjson serializes dicts, NumPy arrays and scalars and datetimes natively in C; the
+default hook covers the pandas objects it does not know. NaN and +/-Inf become null,
+which keeps the body valid JSON (the standard encoder would emit bare NaN or fail).
+Results are encoded once, in the worker that computed them, and spliced into the
+response envelope without being parsed or validated again.
+"""
+import json
+import math
+import datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.analyzer.columnar+json"
+
+
+def _default(obj: Any) -> Any:
+    """Objects orjson (or the json fallback) cannot encode on its own"""
+    if isinstance(obj, pd.DataFrame):
+        return obj.to_dict()
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return obj.tolist()
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    if isinstance(obj, pd.Timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, pd.Interval):
+        return str(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _finite(obj: Any) -> Any:
+    """json fallback only: replace NaN/Inf with None the way orjson does"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key if isinstance(key, str) else str(key): _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(value) for value in obj]
+    if isinstance(obj, (np.generic, np.ndarray, pd.Series, pd.DataFrame, pd.Index)):
+        return _finite(_default(obj))
+    return obj
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(_finite(obj), default=_default, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+
+def _table(value: Dict[Any, Any]) -> Optional[Dict[str, Any]]:
+    """A dict of same-keyed dicts of scalars (e.g. describe().to_dict()) as columns/index/data"""
+    if len(value) < 2 or not all(isinstance(inner, dict) for inner in value.values()):
+        return None
+    inner_keys = None
+    for inner in value.values():
+        if any(isinstance(cell, (dict, list)) for cell in inner.values()):
+            return None
+        keys = list(inner)
+        if inner_keys is None:
+            inner_keys = keys
+        elif keys != inner_keys:
+            return None
+    columns = list(value)
+    return {
+        "columns": columns,
+        "index": inner_keys,
+        "data": [[value[column][key] for column in columns] for key in inner_keys],
+    }
+
+
+def columnar(results: Any) -> Any:
+    """Compact encoding: table-shaped dicts become {"columns", "index", "data"}, stats names sent once"""
+    if isinstance(results, dict):
+        table = _table(results)
+        if table is not None:
+            return table
+        return {key: columnar(value) for key, value in results.items()}
+    if isinstance(results, list):
+        return [columnar(value) for value in results]
+    return results
+
+
+def wants_columnar(accept: str, encoding: Optional[str] = None) -> bool:
+    return encoding == "columnar" or COLUMNAR_MEDIA_TYPE in (accept or "")
+
+
+def encode_results(results: Dict[str, Any], compact: bool = False) -> bytes:
+    return dumps(columnar(results) if compact else results)
+
+
+class AnalysisJSONResponse(Response):
+    """Envelope around results that are already encoded; only the metadata is serialized here"""
+
+    media_type = "application/json"
+
+    def __init__(self, results: bytes, metadata: Dict[str, Any], compact: bool = False, **kwargs):
+        body = b'{"results":' + results + b',"metadata":' + dumps(metadata) + b"}"
+        super().__init__(content=body, media_type=COLUMNAR_MEDIA_TYPE if compact else self.media_type, **kwargs)
@@ -0,0 +1,201 @@
+"""Input schema: coerce every column once into a compact, typed dtype.
+
+Columns named by the analyzer's inputs get the declared kind; every other column's kind
+is inferred from its values. Coercion downcasts integers to the smallest lossless dtype,
+stores low-cardinality text as categoricals and uses nullable extension types so
+missing values do not force integers and booleans back to float/object. Floats stay
+float64: pandas computes the statistics of a float32 column in float32.
+"""
+import os
+import warnings
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+KINDS = ("integer", "float", "boolean", "datetime", "category", "string")
+
+NULL_MARKERS = ["", " ", "-", "na", "NA", "n/a", "N/A", "nan", "NaN", "null", "NULL", "Null", "none", "None"]
+TRUE_VALUES = {"true", "yes"}
+FALSE_VALUES = {"false", "no"}
+# Exact-match lookup so coercion is a single hash map pass instead of per-value string work
+BOOLEAN_LOOKUP = {True: True, False: False}
+for _value in TRUE_VALUES | FALSE_VALUES:
+    for _variant in (_value, _value.capitalize(), _value.upper()):
+        BOOLEAN_LOOKUP[_variant] = _value in TRUE_VALUES
+NULLABLE_INTEGERS = ("Int8", "Int16", "Int32", "Int64")
+
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = "string[pyarrow]"
+except ImportError:
+    STRING_DTYPE = "string"
+
+
+def _normalize_nulls(series: pd.Series) -> pd.Series:
+    """Treat blank cells and common null markers in text columns as missing"""
+    if series.dtype != object:
+        return series
+    markers = series.isin(NULL_MARKERS)
+    return series.mask(markers) if markers.any() else series
+
+
+def _memory(series: pd.Series, sample_size: int = 1000) -> int:
+    """Bytes held by a column; object columns are estimated from a sample of their values"""
+    if series.dtype != object or len(series) <= sample_size:
+        return int(series.memory_usage(index=False, deep=True))
+    sample = series.iloc[:sample_size]
+    return int(sample.memory_usage(index=False, deep=True) / sample_size * len(series))
+
+
+class InputSchema:
+    """Declared column kinds plus inference settings, applied once per request frame"""
+
+    def __init__(self, schema: Optional[Dict[str, Any]] = None):
+        schema = schema or {}
+        self.declared: Dict[str, str] = {str(name).lower(): kind for name, kind in schema.get("columns", {}).items()}
+        self.numeric_ratio = float(os.getenv("SCHEMA_NUMERIC_RATIO", "0.95"))
+        self.category_ratio = float(os.getenv("SCHEMA_CATEGORY_RATIO", "0.5"))
+        self.sample_size = int(os.getenv("SCHEMA_SAMPLE_SIZE", "1000"))
+
+    def infer(self, series: pd.Series) -> str:
+        return self._infer(series)[0]
+
+    def _infer(self, series: pd.Series) -> Tuple[str, Optional[pd.Series]]:
+        """Pick a kind from the values; numeric-looking samples are checked on the full column.
+
+        When that full-column numeric conversion ran it is returned too, so coercion can
+        reuse it instead of converting the column a second time.
+        """
+        if pd.api.types.is_bool_dtype(series):
+            return "boolean", None
+        if pd.api.types.is_integer_dtype(series):
+            return "integer", None
+        if pd.api.types.is_float_dtype(series):
+            return ("integer" if self._integral(series.to_numpy(dtype=np.float64, na_value=np.nan)) else "float"), None
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return "datetime", None
+
+        present = series.dropna()
+        if present.empty:
+            return "string", None
+        sample = present.iloc[:self.sample_size]
+
+        # 0/1 hash equal to False/True, so only real booleans and strings may match the lookup
+        if sample.isin(BOOLEAN_LOOKUP).all() and all(isinstance(value, (bool, str)) for value in sample):
+            return "boolean", None
+
+        if pd.to_numeric(sample, errors="coerce").notna().mean() >= self.numeric_ratio:
+            numbers = pd.to_numeric(series, errors="coerce")
+            if numbers.notna().sum() >= self.numeric_ratio * len(present):
+                kind = "integer" if self._integral(numbers.to_numpy(dtype=np.float64, na_value=np.nan)) else "float"
+                return kind, numbers
+
+        if all(isinstance(value, str) for value in sample):
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                if pd.to_datetime(sample, errors="coerce").notna().all():
+                    return "datetime", None
+
+        if present.nunique() <= self.category_ratio * len(present):
+            return "category", None
+        return "string", None
+
+    @staticmethod
+    def _integral(values: np.ndarray) -> bool:
+        valid = values[~np.isnan(values)]
+        return bool(len(valid)) and bool(np.all(np.mod(valid, 1) == 0)) and bool(np.all(np.abs(valid) < 2 ** 63))
+
+    def _kind(self, column: Any, series: pd.Series) -> Tuple[str, Optional[pd.Series]]:
+        """Declared kind for columns the inputs name, inferred kind for the rest"""
+        declared = self.declared.get(str(column).strip().lower())
+        return (declared, None) if declared else self._infer(series)
+
+    def kinds(self, df: pd.DataFrame) -> Dict[Any, str]:
+        return {column: self._kind(column, _normalize_nulls(df[column]))[0] for column in df.columns}
+
+    def coerce_column(self, series: pd.Series, kind: str, numbers: Optional[pd.Series] = None) -> pd.Series:
+        """Convert a null-normalized column to the dtype for its kind"""
+        if kind in ("integer", "float"):
+            if numbers is None:
+                numbers = pd.to_numeric(series, errors="coerce")
+            values = numbers.to_numpy(dtype=np.float64, na_value=np.nan)
+            if kind == "integer" and self._integral(values):
+                return self._downcast_integer(numbers, values)
+            return pd.Series(values, index=series.index, name=series.name)
+        if kind == "boolean":
+            if pd.api.types.is_bool_dtype(series):
+                return series.astype("boolean")
+            return series.map(BOOLEAN_LOOKUP).astype("boolean")
+        if kind == "datetime":
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                return pd.to_datetime(series, errors="coerce")
+        if kind == "category":
+            return series.astype("category")
+        return series.astype(STRING_DTYPE)
+
+    @staticmethod
+    def _downcast_integer(numbers: pd.Series, values: np.ndarray) -> pd.Series:
+        valid = values[~np.isnan(values)]
+        if len(valid) == len(values):
+            return pd.to_numeric(numbers.astype(np.int64), downcast="integer")
+        low, high = valid.min(), valid.max()
+        for dtype in NULLABLE_INTEGERS:
+            info = np.iinfo(dtype.lower())
+            if info.min <= low and high <= info.max:
+                return numbers.astype(dtype)
+        return numbers.astype("Int64")
+
+    def coerce(self, df: pd.DataFrame, kinds: Optional[Dict[Any, str]] = None) -> pd.DataFrame:
+        """Coerce every column and record a per-column memory report in df.attrs['memory']"""
+        columns: Dict[Any, pd.Series] = {}
+        report: List[Dict[str, Any]] = []
+        for column in df.columns:
+            before = df[column]
+            normalized = _normalize_nulls(before)
+            kind, numbers = (kinds[column], None) if kinds else self._kind(column, normalized)
+            after = self.coerce_column(normalized, kind, numbers)
+            columns[column] = after
+            report.append({
+                "column": str(column),
+                "kind": kind,
+                "dtype_before": str(before.dtype),
+                "dtype_after": str(after.dtype),
+                "bytes_before": _memory(before),
+                "bytes_after": _memory(after),
+            })
+        coerced = pd.DataFrame(columns, index=df.index, copy=False)
+        total_before = sum(item["bytes_before"] for item in report)
+        total_after = sum(item["bytes_after"] for item in report)
+        coerced.attrs["memory"] = {
+            "bytes_before": total_before,
+            "bytes_after": total_after,
+            "reduction": round(1 - total_after / total_before, 4) if total_before else 0.0,
+            "columns": report,
+        }
+        return coerced
+
+    def bind(self, kinds: Optional[Dict[Any, str]] = None) -> "BoundSchema":
+        """Schema for a stream of chunks; kinds carries over those bound by an earlier stream"""
+        return BoundSchema(self, kinds)
+
+
+class BoundSchema:
+    """Infers kinds from the first chunk and applies them to every later chunk of a stream.
+
+    Categoricals are stored as strings here: chunks would otherwise carry different
+    category sets and lose their dtype when concatenated.
+    """
+
+    def __init__(self, schema: InputSchema, kinds: Optional[Dict[Any, str]] = None):
+        self.schema = schema
+        self.kinds = kinds
+
+    def __call__(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self.kinds is None:
+            self.kinds = {
+                column: "string" if kind == "category" else kind
+                for column, kind in self.schema.kinds(df).items()
+            }
+        return self.schema.coerce(df, {column: self.kinds.get(column, "string") for column in df.columns})
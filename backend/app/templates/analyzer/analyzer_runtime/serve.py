@@ -0,0 +1,8 @@
+"""Entry point of a generated analyzer service: uvicorn analyzer_runtime.serve:app.
+
+Serves main.py from the working directory through a HotReloader, so a regenerated
+main.py is live within a fraction of a second of being written, without a restart.
+"""
+from analyzer_runtime.reloading import HotReloader
+
+app = HotReloader()
@@ -0,0 +1,225 @@
+"""Mergeable sketches: bounded-size summaries whose merge equals the summary of all the data.
+
+QuantileSketch buckets values by the logarithm of their magnitude (DDSketch), so any
+order statistic it returns is within a fixed relative error of the true one, however
+many values it has seen. Merging adds bucket counts: the sketch of appended rows merged
+into a running sketch holds exactly what one sketch over every row would.
+
+HyperLogLog estimates distinct counts from a fixed array of registers, and Reservoir
+keeps a uniform random sample of rows; both merge as well.
+"""
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Magnitudes below this count as zero; their estimates are off by at most this much
+MIN_MAGNITUDE = 1e-12
+
+# (bucket keys ascending, counts)
+Store = Tuple[np.ndarray, np.ndarray]
+
+
+def _empty() -> Store:
+    return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+
+def _add(store: Store, keys: np.ndarray, counts: np.ndarray, max_buckets: int) -> Store:
+    """Bucket counts of both, collapsing the smallest magnitudes past max_buckets"""
+    if not len(keys):
+        return store
+    if len(store[0]):
+        keys = np.concatenate([store[0], keys])
+        counts = np.concatenate([store[1], counts])
+    merged, inverse = np.unique(keys, return_inverse=True)
+    totals = np.zeros(len(merged), dtype=np.int64)
+    np.add.at(totals, inverse, counts)
+    if len(merged) > max_buckets:
+        excess = len(merged) - max_buckets
+        totals[excess] += totals[:excess].sum()
+        merged, totals = merged[excess:], totals[excess:]
+    return merged, totals
+
+
+class QuantileSketch:
+    """Relative-error quantile sketch; every estimate is within relative_accuracy of the true value.
+
+    Bucket k holds magnitudes in (gamma^(k-1), gamma^k] with gamma = (1 + a) / (1 - a) and
+    reports 2 gamma^k / (gamma + 1), which is within a of everything in the bucket.
+    Positive and negative values keep separate stores of at most max_buckets buckets
+    each (beyond that the smallest magnitudes are merged, as in DDSketch).
+    """
+
+    __slots__ = ("relative_accuracy", "max_buckets", "_log_gamma", "zeros", "positive", "negative")
+
+    def __init__(self, relative_accuracy: float = 0.005, max_buckets: int = 4096):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self._log_gamma = float(np.log1p(2 * relative_accuracy / (1 - relative_accuracy)))
+        self.zeros = 0
+        self.positive: Store = _empty()
+        self.negative: Store = _empty()
+
+    @property
+    def count(self) -> int:
+        return self.zeros + int(self.positive[1].sum()) + int(self.negative[1].sum())
+
+    def _buckets(self, magnitudes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        keys = np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+        lowest = int(keys.min())
+        # Keys span a few thousand values at most, so counting is one bincount, not a sort
+        counts = np.bincount(keys - lowest)
+        present = np.flatnonzero(counts)
+        return present + lowest, counts[present].astype(np.int64)
+
+    def update(self, values: np.ndarray):
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        magnitudes = np.abs(values)
+        small = magnitudes < MIN_MAGNITUDE
+        self.zeros += int(np.count_nonzero(small))
+        for store, selected in (("positive", (values > 0) & ~small), ("negative", (values < 0) & ~small)):
+            if selected.any():
+                setattr(self, store, _add(getattr(self, store), *self._buckets(magnitudes[selected]), self.max_buckets))
+
+    def merge(self, other: "QuantileSketch"):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracies")
+        self.zeros += other.zeros
+        self.positive = _add(self.positive, *other.positive, self.max_buckets)
+        self.negative = _add(self.negative, *other.negative, self.max_buckets)
+
+    def _value(self, keys: np.ndarray) -> np.ndarray:
+        gamma = np.exp(self._log_gamma)
+        return 2 * np.exp(keys * self._log_gamma) / (gamma + 1)
+
+    def order_statistics(self, ranks: List[int], minimum: float, maximum: float) -> Dict[int, float]:
+        """Estimates of the k-th smallest values (0-based); the first and last are the exact min and max"""
+        count = self.count
+        # Buckets in value order: largest negative magnitudes first, then zero, then positives
+        values = np.concatenate([-self._value(self.negative[0][::-1]), [0.0], self._value(self.positive[0])])
+        counts = np.concatenate([self.negative[1][::-1], [self.zeros], self.positive[1]])
+        cumulative = np.cumsum(counts)
+        found = {}
+        for rank in ranks:
+            if rank <= 0:
+                found[rank] = minimum
+            elif rank >= count - 1:
+                found[rank] = maximum
+            else:
+                estimate = float(values[int(np.searchsorted(cumulative, rank, side="right"))])
+                found[rank] = min(max(estimate, minimum), maximum)
+        return found
+
+    def error_bound(self, estimate: float) -> float:
+        """Largest absolute distance between an estimate and the true value it stands for"""
+        a = self.relative_accuracy
+        return a / (1 - a) * abs(estimate) + MIN_MAGNITUDE
+
+
+def hash_values(values: pd.Series) -> np.ndarray:
+    """64-bit hashes of a column's non-null values; equal values of one dtype hash alike"""
+    return pd.util.hash_pandas_object(values.dropna(), index=False, categorize=False).to_numpy()
+
+
+class HyperLogLog:
+    """Distinct count estimate from 2^precision one-byte registers.
+
+    The top precision bits of a value's hash pick a register, which keeps the largest
+    position of the first 1 bit in the remaining bits. The estimate has a standard
+    error of 1.04 / sqrt(2^precision); small counts use linear counting. Merging keeps
+    the larger of each register pair.
+    """
+
+    __slots__ = ("precision", "registers")
+
+    def __init__(self, precision: int = 14):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        """Standard error of the estimate, relative to the true count"""
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def update(self, hashes: np.ndarray):
+        if not len(hashes):
+            return
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.intp)
+        # Rank: position of the first 1 bit after the index bits. The float exponent is the bit
+        # length except within 2^-53 of a power of two, far below anything the estimate resolves
+        rest = hashes << np.uint64(self.precision)
+        rank = np.minimum(65 - np.frexp(rest.astype(np.float64))[1], 65 - self.precision).astype(np.uint8)
+        # Only ranks above the current register matter; once registers fill up these are few
+        larger = rank > self.registers[index]
+        index, rank = index[larger], rank[larger]
+        if not len(rank):
+            return
+        # Written in ascending rank order (a radix sort of uint8), each register ends at its
+        # largest rank; far faster than np.maximum.at
+        order = np.argsort(rank, kind="stable")
+        index, rank = index[order], rank[order]
+        starts = np.flatnonzero(np.diff(rank)) + 1
+        for start, stop in zip(np.r_[0, starts], np.r_[starts, len(rank)]):
+            self.registers[index[start:stop]] = rank[start]
+
+    def merge(self, other: "HyperLogLog"):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLogs with different precisions")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> float:
+        m = len(self.registers)
+        raw = 0.7213 / (1 + 1.079 / m) * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)
+        return raw
+
+
+class Reservoir:
+    """Uniform random sample of up to size rows from frames seen one after another.
+
+    Every row draws a random key and the sample keeps the rows with the size smallest
+    keys: reservoir sampling in a form that vectorizes over a frame and merges (the
+    sample of two streams is the smallest keys of both samples).
+    """
+
+    __slots__ = ("size", "seen", "frame", "keys", "_rng")
+
+    def __init__(self, size: int, seed: Optional[int] = 0):
+        self.size = size
+        self.seen = 0
+        self.frame: Optional[pd.DataFrame] = None
+        self.keys = np.empty(0)
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, frame: pd.DataFrame):
+        keys = self._rng.random(len(frame))
+        self.seen += len(frame)
+        if len(self.keys) >= self.size:
+            selected = keys < self.keys.max()
+            if not selected.any():
+                return
+            frame, keys = frame[selected], keys[selected]
+        self._keep(frame, keys)
+
+    def merge(self, other: "Reservoir"):
+        self.seen += other.seen
+        if other.frame is not None:
+            self._keep(other.frame, other.keys)
+
+    def _keep(self, frame: pd.DataFrame, keys: np.ndarray):
+        if self.frame is not None:
+            frame = pd.concat([self.frame, frame], ignore_index=True)
+            keys = np.concatenate([self.keys, keys])
+        if len(keys) > self.size:
+            kept = np.sort(np.argpartition(keys, self.size - 1)[:self.size])
+            frame, keys = frame.iloc[kept], keys[kept]
+        self.frame, self.keys = frame.reset_index(drop=True), keys
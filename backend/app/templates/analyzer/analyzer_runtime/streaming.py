@@ -0,0 +1,645 @@
+"""Streaming ingestion: NDJSON bodies parsed chunk by chunk with bounded memory.
+
+The first record names the columns, either as a JSON array, {"columns": [...]} or a
+spreadsheet header row ({"cells": [{"value": ...}]}). Every following line is one row
+(an array, a cells row or an object keyed by column) or a chunk of rows ({"rows": [...]}).
+
+Chunks of at most STREAM_CHUNK_ROWS lines are summarized into mergeable accumulators as
+they arrive and kept in memory up to STREAM_MEMORY_LIMIT bytes. Past that everything is
+spilled to a temporary Parquet file, typed like the chunks, and the request is analyzed
+out of core through an OutOfCoreFrame.
+"""
+import os
+import json
+import logging
+import tempfile
+from collections import Counter
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from analyzer_runtime.engine import DESCRIBE_STATS, MOMENT_AGGREGATIONS, ExecutionContext, _number
+from analyzer_runtime.sketches import Reservoir
+
+logger = logging.getLogger(__name__)
+
+STREAMING_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines"}
+
+DESCRIBE_PERCENTILES = (0.25, 0.5, 0.75)
+
+# Dtypes spilled booleans and text are read back as, the ones coercion gives them in memory
+SPILL_DTYPES = {pa.bool_(): pd.BooleanDtype(), pa.string(): pd.StringDtype("pyarrow")}
+
+
+def is_streaming(content_type: str) -> bool:
+    return (content_type or "").split(";")[0].strip().lower() in STREAMING_TYPES
+
+
+def spill_type(series: pd.Series) -> pa.DataType:
+    """Spill type of a column: booleans and datetimes keep their type, other numbers are float64, the rest text"""
+    if pd.api.types.is_bool_dtype(series):
+        return pa.bool_()
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return pa.timestamp("ns", tz=str(series.dt.tz) if series.dt.tz is not None else None)
+    if pd.api.types.is_numeric_dtype(series):
+        return pa.float64()
+    return pa.string()
+
+
+async def iter_ndjson_batches(chunks: AsyncIterator[bytes], batch_lines: int) -> AsyncIterator[List[Any]]:
+    """Parse an NDJSON byte stream into lists of records, batch_lines at a time.
+
+    JSON escapes newlines inside strings, so a raw newline always ends a record. Each
+    batch is decoded with one json.loads call over the joined lines. A network chunk
+    holding more than batch_lines lines is split, so no batch is larger than that.
+    """
+    pending = bytearray()
+    lines: List[bytes] = []
+    async for chunk in chunks:
+        pending += chunk
+        end = pending.rfind(b"\n")
+        if end == -1:
+            continue
+        lines.extend(line for line in bytes(pending[:end]).split(b"\n") if line.strip())
+        del pending[:end + 1]
+        while len(lines) >= batch_lines:
+            yield json.loads(b"[" + b",".join(lines[:batch_lines]) + b"]")
+            del lines[:batch_lines]
+    if pending.strip():
+        lines.append(bytes(pending))
+    while lines:
+        yield json.loads(b"[" + b",".join(lines[:batch_lines]) + b"]")
+        del lines[:batch_lines]
+
+
+class RowDecoder:
+    """Turns NDJSON records into fixed-width value lists for the header's columns"""
+
+    def __init__(self):
+        self.columns: Optional[List[Any]] = None
+
+    @staticmethod
+    def _cell_values(cells: List[Dict[str, Any]]) -> List[Any]:
+        return [cell.get("value") if isinstance(cell, dict) else cell for cell in cells]
+
+    def _header(self, record: Any) -> bool:
+        """Read the column names; returns True if the record is also a data row"""
+        if isinstance(record, list):
+            names = record
+        elif isinstance(record, dict) and "columns" in record:
+            names = record["columns"]
+        elif isinstance(record, dict) and "cells" in record:
+            names = self._cell_values(record["cells"])
+        elif isinstance(record, dict):
+            self.columns = list(record)
+            return True
+        else:
+            raise ValueError("The first NDJSON record must name the columns")
+        self.columns = [name.strip() if isinstance(name, str) else name for name in names]
+        return False
+
+    def _row(self, record: Any) -> List[Any]:
+        if isinstance(record, list):
+            values = record
+        elif isinstance(record, dict) and "cells" in record:
+            values = self._cell_values(record["cells"])
+        elif isinstance(record, dict):
+            return [record.get(column) for column in self.columns]
+        else:
+            raise ValueError(f"Unsupported NDJSON record: {type(record).__name__}")
+        width = len(self.columns)
+        if len(values) != width:
+            values = (list(values) + [None] * width)[:width]
+        return values
+
+    def rows(self, records: List[Any]) -> List[List[Any]]:
+        rows = []
+        for record in records:
+            if self.columns is None and not self._header(record):
+                continue
+            if isinstance(record, dict) and "rows" in record:
+                rows.extend(self._row(row) for row in record["rows"])
+            else:
+                rows.append(self._row(record))
+        return rows
+
+
+class NumericAccumulator:
+    """Count, mean, variance (Welford/Chan), min and max; merging two is exact"""
+
+    __slots__ = ("count", "mean", "m2", "minimum", "maximum")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+
+    def update(self, values: np.ndarray):
+        missing = np.isnan(values)
+        if missing.any():
+            values = values[~missing]
+        if not len(values):
+            return
+        batch = NumericAccumulator()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        centered = values - batch.mean
+        batch.m2 = float(np.dot(centered, centered))
+        batch.minimum = float(values.min())
+        batch.maximum = float(values.max())
+        self.merge(batch)
+
+    def merge(self, other: "NumericAccumulator"):
+        if not other.count:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else np.nan
+
+
+class ValueCountAccumulator:
+    """Non-null count and value frequencies, dropped once there are more than max_distinct values"""
+
+    __slots__ = ("count", "counts", "max_distinct")
+
+    def __init__(self, max_distinct: int):
+        self.count = 0
+        self.counts: Optional[Counter] = Counter()
+        self.max_distinct = max_distinct
+
+    def update(self, values: pd.Series):
+        counts = values.value_counts(dropna=True)
+        self.count += int(counts.sum())
+        if self.counts is not None:
+            self.counts.update(dict(zip(counts.index, counts.to_numpy().tolist())))
+            self._check_overflow()
+
+    def merge(self, other: "ValueCountAccumulator"):
+        self.count += other.count
+        if self.counts is not None and other.counts is not None:
+            self.counts.update(other.counts)
+            self._check_overflow()
+        else:
+            self.counts = None
+
+    def _check_overflow(self):
+        if len(self.counts) > self.max_distinct:
+            self.counts = None
+
+
+class StreamSummary:
+    """Mergeable per-column accumulators for everything DataFrame.describe() reports"""
+
+    def __init__(self, columns: List[Any], numeric: List[Any], max_distinct: int):
+        self.columns = list(columns)
+        self.numeric = [column for column in columns if column in set(numeric)]
+        self.accumulators: Dict[Any, Union[NumericAccumulator, ValueCountAccumulator]] = {
+            column: NumericAccumulator() if column in self.numeric else ValueCountAccumulator(max_distinct)
+            for column in self.columns
+        }
+
+    def update(self, frame: pd.DataFrame):
+        for column, accumulator in self.accumulators.items():
+            if isinstance(accumulator, NumericAccumulator):
+                accumulator.update(frame[column].to_numpy(dtype=np.float64, na_value=np.nan))
+            else:
+                accumulator.update(frame[column])
+
+    def merge(self, other: "StreamSummary"):
+        for column, accumulator in self.accumulators.items():
+            accumulator.merge(other.accumulators[column])
+
+
+# (lo, hi, closed, bin edges, collect values instead of histogramming them)
+IntervalSpec = Tuple[float, float, bool, np.ndarray, bool]
+# (collected values or None, histogram, [observed min, observed max])
+IntervalScan = Tuple[Optional[np.ndarray], np.ndarray, List[float]]
+
+
+def _bin_index(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Bin b holds edges[b] <= value < edges[b + 1] (the last bin is closed).
+
+    Computed arithmetically instead of with a binary search per value; float rounding
+    can land a value one bin off its linspace edge, which the two comparisons correct.
+    """
+    bins = len(edges) - 1
+    index = ((values - edges[0]) * (bins / (edges[-1] - edges[0]))).astype(np.int64)
+    np.clip(index, 0, bins - 1, out=index)
+    index -= values < edges[index]
+    index += (index < bins - 1) & (values >= edges[np.minimum(index + 1, bins)])
+    return index
+
+
+def scan_intervals(batches: Iterable[np.ndarray], specs: List[IntervalSpec]) -> List[IntervalScan]:
+    """One pass of order_statistics over some values; scans of disjoint parts merge with merge_scans"""
+    scans = [([] if collect else None, np.zeros(len(edges) - 1, dtype=np.int64), [np.inf, -np.inf])
+             for _, _, _, edges, collect in specs]
+    for values in batches:
+        for (lo, hi, closed, edges, _), (collected, histogram, observed) in zip(specs, scans):
+            inside = values[(values >= lo) & ((values <= hi) if closed else (values < hi))]
+            if collected is not None:
+                collected.append(inside)
+            elif len(inside):
+                observed[0] = min(observed[0], float(inside.min()))
+                observed[1] = max(observed[1], float(inside.max()))
+                histogram += np.bincount(_bin_index(inside, edges), minlength=len(histogram))
+    return [
+        (None if collected is None else (np.concatenate(collected) if collected else np.empty(0)), histogram, observed)
+        for collected, histogram, observed in scans
+    ]
+
+
+def merge_scans(parts: List[List[IntervalScan]]) -> List[IntervalScan]:
+    merged = []
+    for scans in zip(*parts):
+        collected = None if scans[0][0] is None else np.concatenate([scan[0] for scan in scans])
+        merged.append((
+            collected,
+            np.sum([scan[1] for scan in scans], axis=0),
+            [min(scan[2][0] for scan in scans), max(scan[2][1] for scan in scans)],
+        ))
+    return merged
+
+
+def order_statistics(
+    batches: Optional[Callable[[], Iterator[np.ndarray]]],
+    ranks: List[int],
+    lower: float,
+    upper: float,
+    count: int,
+    bins: int = 4096,
+    collect_limit: int = 1 << 20,
+    max_passes: int = 8,
+    scan: Optional[Callable[[List[IntervalSpec]], List[IntervalScan]]] = None,
+) -> Dict[int, float]:
+    """Exact k-th smallest values of a column that does not fit in memory.
+
+    Each pass histograms the values inside every unresolved interval and narrows it to
+    the bin holding the wanted rank. Once an interval holds at most collect_limit values
+    they are collected and the rank is selected with np.partition; an interval whose
+    values all land in one bin shrinks to their observed range, so repeated values
+    collapse in one pass. Memory is bounded by bins and collect_limit, not by the column
+    length. A pass reads batches() unless scan is given, which lets callers split a pass
+    across processes and merge the partial scans.
+    """
+    if scan is None:
+        def scan(specs: List[IntervalSpec]) -> List[IntervalScan]:
+            return scan_intervals(batches(), specs)
+
+    # (lo, hi, closed) -> {rank: rank within the interval}
+    intervals: Dict[Tuple[float, float, bool], Dict[int, int]] = {(lower, upper, True): {rank: rank for rank in set(ranks)}}
+    sizes: Dict[Tuple[float, float, bool], int] = {(lower, upper, True): count}
+    found: Dict[int, float] = {}
+
+    for attempt in range(max_passes + 1):
+        for key in [key for key in intervals if key[0] == key[1]]:
+            found.update((rank, key[0]) for rank in intervals.pop(key))
+        if not intervals:
+            break
+
+        keys = list(intervals)
+        specs = []
+        for lo, hi, closed in keys:
+            edges = np.linspace(lo, hi, bins + 1)
+            collect = sizes[(lo, hi, closed)] <= collect_limit or attempt == max_passes or len(np.unique(edges)) <= bins
+            specs.append((lo, hi, closed, edges, collect))
+
+        narrowed: Dict[Tuple[float, float, bool], Dict[int, int]] = {}
+        for key, (_, _, _, edges, _), (collected, histogram, observed) in zip(keys, specs, scan(specs)):
+            targets = intervals[key]
+            if collected is not None:
+                local = sorted(set(targets.values()))
+                selected = np.partition(collected, local)
+                found.update((rank, float(selected[k])) for rank, k in targets.items())
+                continue
+            cumulative = np.cumsum(histogram)
+            for rank, k in targets.items():
+                b = int(np.searchsorted(cumulative, k, side="right"))
+                below = int(cumulative[b - 1]) if b else 0
+                if histogram[b] == cumulative[-1]:
+                    child = (observed[0], observed[1], True)
+                else:
+                    child = (float(edges[b]), float(edges[b + 1]), key[2] and b == bins - 1)
+                narrowed.setdefault(child, {})[rank] = k - below
+                sizes[child] = int(histogram[b])
+        intervals = narrowed
+    return found
+
+
+class OutOfCoreFrame:
+    """Spilled request data: the aggregations generated rules use, computed from the Parquet spill.
+
+    describe() matches DataFrame.describe() of the same rows in memory. Count, mean, std,
+    min and max come from the streaming accumulators; quantiles are exact order
+    statistics found in a few bounded-memory passes over one column at a time. Datetime
+    columns are read whole, one at a time (8 bytes a row), and described by pandas.
+    batches() reads the rows back in frames typed as they were in memory, for everything
+    else (see SpilledContext). sample holds a uniform sample of the rows when the ingest
+    kept one.
+    """
+
+    def __init__(
+        self, path: str, summary: StreamSummary, rows: int, batch_size: int = 65536, sample: Optional[pd.DataFrame] = None,
+        integers: Optional[Set[Any]] = None,
+    ):
+        self.path = path
+        self.summary = summary
+        self.rows = rows
+        self.sample = sample
+        self.batch_size = batch_size
+        self.columns = pd.Index(summary.columns)
+        # Integer columns are spilled as float64 and read back as Int64
+        self.integers = integers or set()
+        schema = pq.ParquetFile(path).schema_arrow
+        self.datetimes = [column for column, field in zip(self.columns, schema) if pa.types.is_timestamp(field.type)]
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def batches(self, columns: Optional[List[Any]] = None) -> Iterator[pd.DataFrame]:
+        """The spilled rows, batch_size at a time, with the dtypes they had in memory"""
+        columns = list(self.columns) if columns is None else list(columns)
+        for batch in pq.ParquetFile(self.path).iter_batches(columns=[str(column) for column in columns], batch_size=self.batch_size):
+            frame = batch.to_pandas(types_mapper=SPILL_DTYPES.get)
+            frame.columns = columns
+            for column in columns:
+                if column in self.integers:
+                    frame[column] = frame[column].astype("Int64")
+            yield frame
+
+    def _column_batches(self, column: Any) -> Callable[[], Iterator[np.ndarray]]:
+        name = str(column)
+
+        def batches() -> Iterator[np.ndarray]:
+            for batch in pq.ParquetFile(self.path).iter_batches(columns=[name], batch_size=self.batch_size):
+                values = batch.column(0).to_numpy(zero_copy_only=False)
+                yield values[~np.isnan(values)]
+        return batches
+
+    def _describe_numeric(self, column: Any, accumulator: NumericAccumulator, percentiles) -> Dict[str, float]:
+        count = accumulator.count
+        stats = {"count": float(count), "mean": accumulator.mean if count else np.nan, "std": accumulator.std}
+        stats["min"] = accumulator.minimum if count else np.nan
+        positions = {q: (count - 1) * q for q in percentiles}
+        ranks = sorted({int(np.floor(p)) for p in positions.values()} | {int(np.ceil(p)) for p in positions.values()})
+        values = order_statistics(self._column_batches(column), ranks, accumulator.minimum, accumulator.maximum, count) if count else {}
+        for q, position in positions.items():
+            label = f"{q * 100:g}%"
+            if not count:
+                stats[label] = np.nan
+                continue
+            below, above = values[int(np.floor(position))], values[int(np.ceil(position))]
+            stats[label] = below + (above - below) * (position - np.floor(position))
+        stats["max"] = accumulator.maximum if count else np.nan
+        return stats
+
+    def _describe_values(self, column: Any, accumulator: ValueCountAccumulator) -> Dict[str, Any]:
+        if accumulator.counts is not None:
+            counts = accumulator.counts
+        else:
+            # Too many distinct values to track while streaming; count them from the spilled column
+            table = pq.read_table(self.path, columns=[str(column)])
+            value_counts = pc.value_counts(table.column(0).drop_null())
+            counts = Counter(dict(zip(value_counts.field("values").to_pylist(), value_counts.field("counts").to_pylist())))
+        top, freq = counts.most_common(1)[0] if counts else (np.nan, np.nan)
+        return {"count": accumulator.count, "unique": len(counts), "top": top, "freq": freq}
+
+    def _describe_datetimes(self, column: Any, percentiles) -> pd.Series:
+        series = pq.read_table(self.path, columns=[str(column)]).column(0).to_pandas()
+        return series.describe(percentiles=list(percentiles))
+
+    def describe(self, percentiles=DESCRIBE_PERCENTILES) -> pd.DataFrame:
+        """Same as DataFrame.describe(): numeric and datetime columns if there are any, otherwise all"""
+        described = [column for column in self.columns if column in self.summary.numeric or column in self.datetimes]
+        if not described:
+            stats = {
+                column: self._describe_values(column, accumulator)
+                for column, accumulator in self.summary.accumulators.items()
+            }
+            return pd.DataFrame(stats, columns=list(stats))
+        series = [
+            self._describe_datetimes(column, percentiles) if column in self.datetimes
+            else pd.Series(self._describe_numeric(column, self.summary.accumulators[column], percentiles))
+            for column in described
+        ]
+        # Rows in the order pandas gives them: those of the shortest description first
+        names = list(dict.fromkeys(name for stats in sorted(series, key=len) for name in stats.index))
+        frame = pd.concat([stats.reindex(names) for stats in series], axis=1, sort=False)
+        frame.columns = described
+        return frame
+
+
+class SpilledContext(ExecutionContext):
+    """ExecutionContext over an OutOfCoreFrame: what describe() does not answer is read from the spill.
+
+    Every batch of the spill is an in-memory ExecutionContext: validation and score
+    tallies are summed over them (parts()), moments merge as NumericAccumulators,
+    distinct values are collected across them and medians are exact order statistics
+    of their values. Memory holds one batch, plus the distinct values of a column for
+    nunique, as it would in memory.
+    """
+
+    def __init__(self, frame: OutOfCoreFrame):
+        super().__init__(frame)
+        self._summaries: Dict[Any, Tuple[NumericAccumulator, float]] = {}
+
+    def parts(self) -> Iterator[ExecutionContext]:
+        for batch in self.df.batches():
+            yield ExecutionContext(batch)
+
+    def _values(self, column: Any) -> Iterator[np.ndarray]:
+        """float64 values of a column a batch at a time, converted as ExecutionContext.numeric converts them"""
+        for batch in self.df.batches([column]):
+            yield ExecutionContext(batch).numeric(column)
+
+    def summary(self, column: Any) -> Tuple[NumericAccumulator, float]:
+        """Count, mean, variance, min, max and sum of a column, from one pass over the spill"""
+        if column not in self._summaries:
+            accumulator, total = NumericAccumulator(), 0.0
+            for values in self._values(column):
+                accumulator.update(values)
+                total += float(np.nansum(values))
+            self._summaries[column] = (accumulator, total)
+        return self._summaries[column]
+
+    def moments(self, column: Any) -> Dict[str, float]:
+        moments = self._moments.get(column)
+        if moments is None:
+            accumulator, total = self.summary(column)
+            count = accumulator.count
+            var = accumulator.m2 / (count - 1) if count > 1 else np.nan
+            moments = {"count": count, "sum": total, "mean": total / count if count else np.nan, "var": var,
+                       "std": float(np.sqrt(var))}
+            self._moments[column] = moments
+        return moments
+
+    def distinct(self, column: Any) -> int:
+        counts = getattr(self.df.summary.accumulators[column], "counts", None)
+        if counts is not None:
+            return len(counts)
+        seen = set()
+        for batch in self.df.batches([column]):
+            seen.update(batch[column].dropna().unique().tolist())
+        return len(seen)
+
+    def aggregate(self, name: str, column_name: str) -> Any:
+        column = self.resolve(column_name)
+        if self._describe is not None and name in DESCRIBE_STATS:
+            stats = self._describe.get(column, {})
+            if DESCRIBE_STATS[name] in stats:
+                return _number(stats[DESCRIBE_STATS[name]])
+        if name == "count":
+            return self.df.summary.accumulators[column].count
+        if name == "nunique":
+            return self.distinct(column)
+        if name in MOMENT_AGGREGATIONS:
+            return self.moments(column)[name]
+        if name not in ("min", "max", "median"):
+            raise ValueError(f"Unsupported aggregation: {name}")
+        accumulator, _ = self.summary(column)
+        count = accumulator.count
+        if not count:
+            return np.nan
+        if name != "median":
+            return accumulator.minimum if name == "min" else accumulator.maximum
+        ranks = [(count - 1) // 2, count // 2]
+
+        def batches() -> Iterator[np.ndarray]:
+            for values in self._values(column):
+                yield values[~np.isnan(values)]
+        values = order_statistics(batches, ranks, accumulator.minimum, accumulator.maximum, count)
+        return float(np.mean([values[rank] for rank in ranks]))
+
+
+class StreamingIngest:
+    """Builds the request frame from an NDJSON stream, spilling to Parquet past a memory limit.
+
+    With sample_rows, a reservoir sample of that many rows is kept on the way, so an
+    approximate analysis of a spilled stream needs no pass over the spill.
+    """
+
+    def __init__(
+        self,
+        prepare: Callable[[pd.DataFrame], pd.DataFrame] = lambda frame: frame,
+        memory_limit: Optional[int] = None,
+        chunk_rows: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+        max_distinct: Optional[int] = None,
+        sample_rows: Optional[int] = None,
+    ):
+        self.prepare = prepare
+        self.memory_limit = memory_limit or int(os.getenv("STREAM_MEMORY_LIMIT", str(256 * 1024 * 1024)))
+        self.chunk_rows = chunk_rows or int(os.getenv("STREAM_CHUNK_ROWS", "10000"))
+        self.spill_dir = spill_dir or os.getenv("STREAM_SPILL_DIR") or tempfile.gettempdir()
+        self.max_distinct = max_distinct or int(os.getenv("STREAM_MAX_DISTINCT", "100000"))
+
+        self.reservoir = Reservoir(sample_rows) if sample_rows else None
+        self.decoder = RowDecoder()
+        self.summary: Optional[StreamSummary] = None
+        self.schema: Optional[pa.Schema] = None
+        # Columns of an integer dtype in every chunk so far
+        self.integers: Set[Any] = set()
+        self.rows = 0
+        self.chunks = 0
+        self._buffered: List[pd.DataFrame] = []
+        self._buffered_bytes = 0
+        self._writer: Optional[pq.ParquetWriter] = None
+        self.spill_path: Optional[str] = None
+
+    @property
+    def spilled(self) -> bool:
+        return self.spill_path is not None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "chunks": self.chunks,
+            "spilled": self.spilled,
+            "spill_bytes": os.path.getsize(self.spill_path) if self.spilled and os.path.exists(self.spill_path) else 0,
+        }
+
+    async def consume(self, chunks: AsyncIterator[bytes]) -> Union[pd.DataFrame, OutOfCoreFrame]:
+        async for records in iter_ndjson_batches(chunks, self.chunk_rows):
+            rows = self.decoder.rows(records)
+            if rows:
+                self.add(pd.DataFrame(rows, columns=self.decoder.columns, dtype=object))
+        return self.result()
+
+    def add(self, frame: pd.DataFrame):
+        frame = self.prepare(frame)
+        if self.summary is None:
+            numeric = [
+                column for column in frame.columns
+                if pd.api.types.is_numeric_dtype(frame[column]) and not pd.api.types.is_bool_dtype(frame[column])
+            ]
+            self.summary = StreamSummary(list(frame.columns), numeric, self.max_distinct)
+            self.schema = pa.schema([(str(column), spill_type(frame[column])) for column in frame.columns])
+            self.integers = set(frame.columns)
+        self.integers = {column for column in self.integers if pd.api.types.is_integer_dtype(frame[column])}
+        self.summary.update(frame)
+        if self.reservoir is not None:
+            self.reservoir.update(frame)
+        self.rows += len(frame)
+        self.chunks += 1
+
+        if self.spilled:
+            self._spill(frame)
+            return
+        self._buffered.append(frame)
+        self._buffered_bytes += int(frame.memory_usage(index=False, deep=True).sum())
+        if self._buffered_bytes > self.memory_limit:
+            fd, self.spill_path = tempfile.mkstemp(prefix="analyze-", suffix=".parquet", dir=self.spill_dir)
+            os.close(fd)
+            self._writer = pq.ParquetWriter(self.spill_path, self.schema)
+            logger.info(f"Buffered {self._buffered_bytes} bytes after {self.rows} rows; spilling to {self.spill_path}")
+            for buffered in self._buffered:
+                self._spill(buffered)
+            self._buffered = []
+            self._buffered_bytes = 0
+
+    def _spill(self, frame: pd.DataFrame):
+        """Write a chunk with the fixed spill schema of spill_type()"""
+        arrays = []
+        for column, field in zip(frame.columns, self.schema):
+            values = frame[column]
+            if pa.types.is_floating(field.type):
+                arrays.append(pa.array(pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan), from_pandas=True))
+            elif pa.types.is_string(field.type):
+                arrays.append(pa.array(values.map(lambda value: None if pd.isna(value) else str(value)), type=pa.string()))
+            else:
+                # Booleans and datetimes: a bound schema gives every chunk the type of the first
+                arrays.append(pa.array(values, type=field.type, from_pandas=True))
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def result(self) -> Union[pd.DataFrame, OutOfCoreFrame]:
+        if self.summary is None:
+            raise ValueError("No rows in NDJSON body")
+        if not self.spilled:
+            frame = pd.concat(self._buffered, ignore_index=True) if len(self._buffered) > 1 else self._buffered[0]
+            self._buffered = []
+            return frame
+        self._writer.close()
+        self._writer = None
+        sample = self.reservoir.frame if self.reservoir is not None else None
+        return OutOfCoreFrame(self.spill_path, self.summary, self.rows, sample=sample, integers=self.integers)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self.spill_path and os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
@@ -0,0 +1,63 @@
+"""Columnar request bodies: Arrow IPC and Parquet, selected by content type."""
+from typing import List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+ARROW_STREAM_TYPES = {"application/vnd.apache.arrow.stream", "application/x-arrow-stream"}
+ARROW_FILE_TYPES = {"application/vnd.apache.arrow.file", "application/x-arrow", "application/vnd.apache.arrow"}
+PARQUET_TYPES = {"application/vnd.apache.parquet", "application/x-parquet", "application/parquet"}
+COLUMNAR_TYPES = ARROW_STREAM_TYPES | ARROW_FILE_TYPES | PARQUET_TYPES
+
+
+def media_type(content_type: str) -> str:
+    return (content_type or "application/json").split(";")[0].strip().lower()
+
+
+def is_columnar(content_type: str) -> bool:
+    return media_type(content_type) in COLUMNAR_TYPES
+
+
+def select_columns(names: List[str], wanted: Optional[List[str]]) -> Optional[List[str]]:
+    """The requested columns present in names, matched case-insensitively; None keeps all"""
+    if wanted is None:
+        return None
+    lookup = {name.lower(): name for name in names}
+    return [lookup[name.lower()] for name in wanted if name.lower() in lookup]
+
+
+def read_table(body: bytes, content_type: str, columns: Optional[List[str]] = None) -> pa.Table:
+    """Decode an Arrow IPC stream/file or Parquet body without copying the request buffer.
+
+    When columns is given only those are materialized: Parquet skips the other column
+    chunks entirely and Arrow drops them without touching their buffers.
+    """
+    kind = media_type(content_type)
+    buffer = pa.py_buffer(body)
+    if kind in ARROW_STREAM_TYPES:
+        table = ipc.open_stream(buffer).read_all()
+    elif kind in ARROW_FILE_TYPES:
+        table = ipc.open_file(buffer).read_all()
+    elif kind in PARQUET_TYPES:
+        parquet = pq.ParquetFile(pa.BufferReader(buffer))
+        return parquet.read(columns=select_columns(parquet.schema_arrow.names, columns))
+    else:
+        raise ValueError(f"Unsupported content type: {content_type}")
+    selected = select_columns(table.column_names, columns)
+    return table if selected is None else table.select(selected)
+
+
+def table_to_frame(table: pa.Table) -> pd.DataFrame:
+    """Arrow to pandas with as few copies as possible.
+
+    Null-free numeric columns are wrapped zero-copy; split_blocks keeps pandas from
+    consolidating them into one 2D block and self_destruct releases each Arrow column
+    as soon as it is converted, so peak memory stays near one copy of the data.
+    """
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def read_frame(body: bytes, content_type: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    return table_to_frame(read_table(body, content_type, columns))
@@ -0,0 +1,95 @@
+import re
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = Path(__file__).parent / "templates"
+
+# %%name%% placeholders; chosen so they never collide with Python, TSX or YAML syntax
+PLACEHOLDER = re.compile(r"%%(\w+)%%")
+
+
+class Template:
+    """A template compiled once into literal chunks and placeholder slots.
+
+    A placeholder that sits alone on a line is a block slot: every line of its value
+    is indented to the placeholder's column, so multi-line code can be spliced into
+    function bodies.
+    """
+
+    def __init__(self, source: str, name: str = "<string>"):
+        self.name = name
+        self._chunks: List[str] = []
+        self._slots: List[Tuple[int, str, Optional[str]]] = []
+
+        position = 0
+        for match in PLACEHOLDER.finditer(source):
+            literal = source[position:match.start()]
+            indent = None
+            line_start = literal.rfind("\n") + 1
+            line_end = source.find("\n", match.end())
+            line_end = len(source) if line_end == -1 else line_end
+            prefix = literal[line_start:]
+            if not prefix.strip() and not source[match.end():line_end].strip():
+                indent = prefix
+                literal = literal[:line_start]
+            self._chunks.append(literal)
+            self._slots.append((len(self._chunks), match.group(1), indent))
+            self._chunks.append("")
+            position = match.end()
+        self._chunks.append(source[position:])
+        self.placeholders = frozenset(slot[1] for slot in self._slots)
+
+    def render(self, **values: Any) -> str:
+        chunks = list(self._chunks)
+        for index, key, indent in self._slots:
+            try:
+                value = str(values[key])
+            except KeyError:
+                raise KeyError(f"Template {self.name} is missing a value for '{key}'")
+            if indent is not None:
+                value = "\n".join(indent + line if line.strip() else line for line in value.split("\n"))
+            chunks[index] = value
+        return "".join(chunks)
+
+
+class TemplateRegistry:
+    """Loads and compiles every template in a directory once; static files are cached verbatim"""
+
+    def __init__(self, directory: Path = TEMPLATES_DIR):
+        self.directory = Path(directory)
+        self._templates: Dict[str, Template] = {}
+        self._static: Dict[str, str] = {}
+        for path in sorted(self.directory.rglob("*")):
+            if not path.is_file() or "__pycache__" in path.parts:
+                continue
+            name = path.relative_to(self.directory).as_posix()
+            source = path.read_text()
+            if name.endswith(".tmpl"):
+                self._templates[name[:-len(".tmpl")]] = Template(source, name)
+            else:
+                self._static[name] = source
+        logger.info(f"Loaded {len(self._templates)} templates and {len(self._static)} static files from {self.directory}")
+
+    def render(self, name: str, **values: Any) -> str:
+        return self._templates[name].render(**values)
+
+    def static(self, name: str) -> str:
+        return self._static[name]
+
+    def static_files(self, prefix: str) -> Dict[str, str]:
+        """Static files under a directory prefix, keyed by their path relative to it"""
+        prefix = prefix.rstrip("/") + "/"
+        return {name[len(prefix):]: source for name, source in self._static.items() if name.startswith(prefix)}
+
+
+_registry: Optional[TemplateRegistry] = None
+
+
+def get_templates() -> TemplateRegistry:
+    global _registry
+    if _registry is None:
+        _registry = TemplateRegistry()
+    return _registry
@@ -0,0 +1,84 @@
+"""Benchmark: throughput of a generated analyzer as ANALYZER_WORKERS grows, plus /health latency under load.
+
+Each request posts an Arrow IPC sheet whose analysis is CPU-bound (describe, distinct
+counts, medians and a score rule over every column). Requests beyond
+ANALYZER_MAX_IN_FLIGHT are shed with 503 and retried after a short pause.
+
+    python benchmarks/analysis_concurrency.py --workers 1 2 4 8 --concurrency 16 --requests 64
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+from generated_service import GeneratedService
+from wire_formats import arrow_body, make_frame
+
+COLUMNS = [f"col{j}" for j in range(8)]
+HEAVY_RULES = [
+    {"type": "calculation", "description": "Summary statistics"},
+    {"type": "calculation", "description": "Distinct values and medians",
+     "criteria": [f"nunique({column})" for column in COLUMNS] + [f"median({column})" for column in COLUMNS]},
+    {"type": "score", "description": "Positive columns", "criteria": [f"{column} > 0" for column in COLUMNS]},
+]
+
+
+async def health_probe(client: httpx.AsyncClient, url: str, stop: asyncio.Event, latencies: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get(f"{url}/health")
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.05)
+
+
+async def load(url: str, body: bytes, concurrency: int, total: int):
+    statuses = {}
+    health_latencies = []
+    remaining = iter(range(total))
+    async with httpx.AsyncClient(timeout=600, limits=httpx.Limits(max_connections=concurrency + 1)) as client:
+        async def caller():
+            for _ in remaining:
+                # Shed requests are retried, so every request eventually completes
+                while True:
+                    response = await client.post(f"{url}/analyze", content=body,
+                                                 headers={"content-type": "application/vnd.apache.arrow.stream"})
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                    if response.status_code != 503:
+                        break
+                    await asyncio.sleep(float(response.headers.get("retry-after", "1")) / 10)
+
+        stop = asyncio.Event()
+        probe = asyncio.create_task(health_probe(client, url, stop, health_latencies))
+        started = time.perf_counter()
+        await asyncio.gather(*(caller() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await probe
+    return elapsed, statuses, health_latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=48)
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    body = arrow_body(make_frame(args.rows, 8))
+    print(f"cpus={os.cpu_count()} rows={args.rows} concurrency={args.concurrency} requests={args.requests}")
+    print(f"{'workers':>7} {'ok/s':>8} {'200':>5} {'503':>5} {'health p50 ms':>14} {'health max ms':>14}")
+    for workers in args.workers:
+        env = {"ANALYZER_WORKERS": str(workers)}
+        with GeneratedService(env=env, rules=HEAVY_RULES) as service:
+            elapsed, statuses, health = asyncio.run(load(service.url, body, args.concurrency, args.requests))
+        ok = statuses.get(200, 0)
+        print(f"{workers:>7} {ok / elapsed:>8.2f} {ok:>5} {statuses.get(503, 0):>5} "
+              f"{statistics.median(health) * 1000:>14.1f} {max(health) * 1000:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Benchmark: N generated analyzers as one process each vs. loaded into one shared analyzer host.
+
+Per-service mode starts every analyzer under its own uvicorn (ANALYZER_WORKERS=1), as
+its container would run it. Host mode starts host/main.py on an empty code directory,
+then renders each analyzer into it and asks the host to load it (PUT /analyzers/<name>).
+Both report the time from creation to the first 200 from /analyze, and the resident
+memory each analyzer adds (process tree RSS; for the host, the growth of the host and
+its shared worker). Container and image overhead is not included, so the per-service
+numbers are a lower bound for per-container deployment.
+
+    python benchmarks/analyzer_host.py --analyzers 8
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from generated_service import BACKEND_DIR, DESCRIBE_RULES, free_port, render_analyzer
+from wire_formats import arrow_body, make_frame
+
+HOST_DIR = os.path.join(BACKEND_DIR, "..", "host")
+TEMPLATE_DIR = os.path.join(BACKEND_DIR, "app", "templates", "analyzer")
+ARROW = {"content-type": "application/vnd.apache.arrow.stream"}
+
+
+def tree_rss(pid: int) -> int:
+    """Resident bytes of a process and all its descendants"""
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                total += next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:"))
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as f:
+                    pending.extend(int(child) for child in f.read().split())
+        except (FileNotFoundError, ProcessLookupError, StopIteration):
+            continue
+    return total
+
+
+def wait_for(url: str, body: bytes, deadline: float = 60) -> float:
+    """Seconds until POST url returns 200"""
+    started = time.perf_counter()
+    while time.perf_counter() - started < deadline:
+        try:
+            if httpx.post(url, content=body, headers=ARROW, timeout=30).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.TransportError:
+            pass
+        time.sleep(0.02)
+    raise RuntimeError(f"{url} did not answer within {deadline}s")
+
+
+def per_service(count: int, body: bytes, root: Path):
+    processes = []
+    results = []
+    try:
+        for i in range(count):
+            started = time.perf_counter()
+            directory = render_analyzer(root / f"service{i}", name=f"Bench{i}", rules=DESCRIBE_RULES)
+            port = free_port()
+            process = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+                 "--log-level", "warning"],
+                cwd=directory, env={**os.environ, "ANALYZER_WORKERS": "1"},
+            )
+            processes.append(process)
+            wait_for(f"http://127.0.0.1:{port}/analyze", body)
+            results.append((time.perf_counter() - started, tree_rss(process.pid)))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+    return results
+
+
+def hosted(count: int, body: bytes, root: Path):
+    code_dir = root / "analyzers"
+    code_dir.mkdir()
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    env = {**os.environ, "ANALYZER_WORKERS": "1", "ANALYZER_CODE_DIR": str(code_dir),
+           "PYTHONPATH": os.pathsep.join([HOST_DIR, TEMPLATE_DIR])}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=HOST_DIR, env=env,
+    )
+    results = []
+    try:
+        deadline = time.time() + 60
+        while True:
+            try:
+                if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                    break
+            except httpx.TransportError:
+                if time.time() > deadline:
+                    raise RuntimeError("Analyzer host did not start")
+                time.sleep(0.1)
+        baseline = previous = tree_rss(process.pid)
+        for i in range(count):
+            name = f"bench{i}analyzer"
+            started = time.perf_counter()
+            render_analyzer(code_dir / name, name=f"Bench{i}", rules=DESCRIBE_RULES)
+            httpx.put(f"{url}/analyzers/{name}", timeout=60).raise_for_status()
+            wait_for(f"{url}/{name}/analyze", body)
+            rss = tree_rss(process.pid)
+            results.append((time.perf_counter() - started, rss - previous))
+            previous = rss
+        info = httpx.get(f"{url}/info").json()
+        assert len(info["analyzers"]) == count, info
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return baseline, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--analyzers", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    body = arrow_body(make_frame(args.rows, 8))
+    with tempfile.TemporaryDirectory() as tmp:
+        services = per_service(args.analyzers, body, Path(tmp))
+        baseline, loaded = hosted(args.analyzers, body, Path(tmp))
+
+    mb = 2 ** 20
+    service_times = [seconds for seconds, _ in services]
+    service_rss = [rss for _, rss in services]
+    host_times = [seconds for seconds, _ in loaded]
+    host_rss = [rss for _, rss in loaded]
+    host_total = baseline + sum(host_rss)
+    print(f"analyzers={args.analyzers} rows={args.rows} cpus={os.cpu_count()}")
+    print(f"{'mode':<12} {'serve p50':>10} {'serve max':>10} {'RSS/analyzer':>13} {'total RSS':>10}")
+    print(f"{'per-service':<12} {statistics.median(service_times) * 1000:>8.0f}ms {max(service_times) * 1000:>8.0f}ms "
+          f"{statistics.mean(service_rss) / mb:>11.1f}MB {sum(service_rss) / mb:>8.0f}MB")
+    print(f"{'host':<12} {statistics.median(host_times) * 1000:>8.0f}ms {max(host_times) * 1000:>8.0f}ms "
+          f"{statistics.mean(host_rss) / mb:>11.1f}MB {host_total / mb:>8.0f}MB  "
+          f"(host with no analyzers: {baseline / mb:.0f}MB; first analyzer added {host_rss[0] / mb:.1f}MB)")
+
+
+if __name__ == "__main__":
+    main()
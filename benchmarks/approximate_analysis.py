@@ -0,0 +1,121 @@
+"""Benchmark: exact vs. approximate (?approximate=true) rule plan execution on a large frame.
+
+Runs describe(), per-column aggregations (sum, mean, std, min, max, median, nunique) and
+a score rule on a synthetic sheet, exactly and through analyzer_runtime.approximate at
+each --accuracy. Prints the time and the peak memory allocated during execution on top
+of the frame (both modes include the score rule's per-row masks), then checks every
+approximate value against the exact one: it must be within its reported error bound.
+The same check then runs on the frame streamed through a StreamingIngest that spills it
+to disk, as a large NDJSON request would be.
+
+    python benchmarks/approximate_analysis.py --rows 5000000 --accuracy 0.01 0.005
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "app", "templates", "analyzer"))
+from app.rule_engine import compile_rules  # noqa: E402
+from analyzer_runtime.approximate import Approximation  # noqa: E402
+from analyzer_runtime.engine import RulePlan  # noqa: E402
+from analyzer_runtime.incremental import compare  # noqa: E402
+from analyzer_runtime.streaming import StreamingIngest  # noqa: E402
+
+COLUMNS = [f"num{j}" for j in range(6)]
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    frame = {f"num{j}": rng.lognormal(j, 1, size=rows) for j in range(4)}
+    frame["num4"] = rng.normal(100, 25, size=rows)
+    frame["num5"] = np.where(rng.random(rows) < 0.05, np.nan, rng.exponential(10, size=rows))
+    frame["customer"] = rng.integers(0, rows // 4, size=rows)
+    return pd.DataFrame(frame)
+
+
+def make_plan() -> RulePlan:
+    rules = [
+        SimpleNamespace(type="calculation", description="Summary statistics", criteria=[]),
+        SimpleNamespace(type="calculation", description="Aggregations", criteria=[
+            f"{name}({column})" for column in COLUMNS for name in ("sum", "mean", "std", "min", "max", "median", "nunique")
+        ] + ["nunique(customer)"]),
+        SimpleNamespace(type="score", description="Above average", criteria=[f"{column} > 10" for column in COLUMNS]),
+    ]
+    return RulePlan(compile_rules(rules))
+
+
+def measured(fn):
+    """(seconds, peak bytes allocated, result); the peak comes from a second, traced call"""
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def spilled(df: pd.DataFrame, sample_rows: int, chunk_rows: int = 65536) -> StreamingIngest:
+    """An ingest holding df spilled to Parquet, with a reservoir sample of sample_rows rows"""
+    ingest = StreamingIngest(memory_limit=1, chunk_rows=chunk_rows, sample_rows=sample_rows)
+    for start in range(0, len(df), chunk_rows):
+        ingest.add(df.iloc[start:start + chunk_rows].reset_index(drop=True))
+    return ingest
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000000)
+    parser.add_argument("--accuracy", type=float, nargs="+", default=[0.01, 0.005])
+    parser.add_argument("--confidence", type=float, default=0.99)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    plan = make_plan()
+    print(f"rows={args.rows} columns={len(df.columns)} frame={df.memory_usage(index=False).sum() / 2**20:.0f}MB")
+
+    exact_time, exact_peak, exact = measured(lambda: plan.execute(df))
+    print(f"{'exact':<18} {exact_time * 1000:>8.0f}ms  peak {exact_peak / 2**20:>7.1f}MB")
+
+    failed = False
+    for accuracy in args.accuracy:
+        approximation = Approximation(accuracy, args.confidence)
+        bounds = {}
+        elapsed, peak, approximate = measured(lambda: plan.execute(df, approximation.context, bounds))
+        report = compare(exact, approximate, bounds)
+        print(f"{f'accuracy={accuracy:g}':<18} {elapsed * 1000:>8.0f}ms  peak {peak / 2**20:>7.1f}MB  "
+              f"{exact_time / elapsed:.1f}x faster  sample={approximation.sample_rows} rows  "
+              f"within bounds: {report['matches']} ({report['compared']} values, "
+              f"max relative error {report['max_relative_error']:.2e})")
+        for mismatch in report["mismatches"][:10]:
+            print("  " + str(mismatch))
+        failed = failed or not report["matches"]
+
+        ingest = spilled(df, approximation.sample_rows)
+        try:
+            bounds = {}
+            approximate = plan.execute(ingest.result(), approximation.context, bounds)
+        finally:
+            ingest.close()
+        report = compare(exact, approximate, bounds)
+        errors = [key for key in approximate if key.endswith("_error")]
+        print(f"{'  spilled':<18} within bounds: {report['matches']} ({report['compared']} values, "
+              f"max relative error {report['max_relative_error']:.2e})  rule errors={errors}")
+        for mismatch in report["mismatches"][:10]:
+            print("  " + str(mismatch))
+        failed = failed or not report["matches"] or bool(errors)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
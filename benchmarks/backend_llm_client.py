@@ -0,0 +1,78 @@
+"""Exercise the backend LLM client against the fake OpenAI server.
+
+Fires concurrent chat calls through LLMClient while a heartbeat task measures
+event-loop lag, and reports retries, queue positions and wall time.
+
+    python benchmarks/backend_llm_client.py --calls 20 --concurrency 4 --rate-limit 0.3
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from app.llm_client import LLMClient, LLMError  # noqa: E402
+from fake_openai_server import create_app, start_in_thread  # noqa: E402
+
+
+async def heartbeat(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - start - 0.01)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--rate-limit", type=float, default=0.3)
+    parser.add_argument("--server-error", type=float, default=0.1)
+    parser.add_argument("--port", type=int, default=18100)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    fake = create_app(args.latency, args.rate_limit, args.server_error)
+    server = start_in_thread(fake, args.port)
+
+    client = LLMClient(
+        api_key="test",
+        base_url=f"http://127.0.0.1:{args.port}/v1",
+        max_concurrency=args.concurrency,
+        timeout=10,
+        max_retries=6,
+        backoff_base=0.05,
+    )
+    positions = {}
+
+    async def one(i):
+        def on_position(position):
+            positions.setdefault(i, []).append(position)
+        try:
+            await client.chat([{"role": "user", "content": f"prompt {i}"}], on_queue_position=on_position)
+            return True
+        except LLMError as e:
+            print(f"call {i} failed: {e}")
+            return False
+
+    stop = asyncio.Event()
+    lags = []
+    beat = asyncio.create_task(heartbeat(stop, lags))
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(args.calls)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await beat
+    await client.aclose()
+    server.should_exit = True
+
+    print(f"calls={args.calls} ok={sum(results)} server_calls={fake.state.calls} injected_failures={fake.state.failures}")
+    print(f"wall={elapsed:.2f}s max_loop_lag={max(lags) * 1000:.1f}ms")
+    print(f"queued callers={len(positions)} first positions seen={[p[0] for p in positions.values()][:10]}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
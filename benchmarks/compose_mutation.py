@@ -0,0 +1,103 @@
+"""Benchmark: per-delete yaml.safe_load/dump vs. the backend ComposeStore.
+
+Builds a docker-compose.yml with N analyzer services (shaped like the ones the
+service watcher writes) and deletes a burst of them both ways.
+
+    python benchmarks/compose_mutation.py --services 500 --deletes 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from app.compose_store import ComposeStore  # noqa: E402
+
+HEADER = """# Core services are managed by hand; analyzers are added by the service watcher
+version: "3.8"
+services:
+  gateway:
+    build:
+      context: ./gateway
+      dockerfile: Dockerfile
+    ports:
+      - 8000:8000
+"""
+
+
+def service_block(name: str) -> str:
+    return f"""  {name}:
+    build:
+      context: src/app/analyticscode/{name}
+      dockerfile: Dockerfile
+    networks:
+      - analyzer-network
+    volumes:
+      - ./src/app/analyticscode/{name}:/app:ro
+    environment:
+      - SERVICE_NAME={name}
+      - SERVICE_PORT=8000
+      - PYTHONPATH=/app
+    user: ${{DOCKER_UID}}:${{DOCKER_GID}}
+    restart: unless-stopped
+    healthcheck:
+      test: ["CMD", "curl", "-f", "http://localhost:8000/health"]
+      interval: 30s
+"""
+
+
+def build_compose(path: Path, services: int):
+    body = "".join(service_block(f"analyzer{i}analyzer") for i in range(services))
+    path.write_text(HEADER + body + "networks:\n  analyzer-network:\n    driver: bridge\n")
+
+
+def baseline_delete(path: Path, name: str):
+    with open(path) as f:
+        compose = yaml.safe_load(f)
+    if name in compose.get("services", {}):
+        del compose["services"][name]
+        with open(path, "w") as f:
+            yaml.dump(compose, f)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--services", type=int, default=500)
+    parser.add_argument("--deletes", type=int, default=50)
+    args = parser.parse_args()
+    names = [f"analyzer{i}analyzer" for i in range(args.deletes)]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = Path(workdir) / "docker-compose.yml"
+
+        build_compose(path, args.services)
+        started = time.perf_counter()
+        for name in names:
+            baseline_delete(path, name)
+        baseline = time.perf_counter() - started
+        baseline_comments = path.read_text().startswith("#")
+
+        build_compose(path, args.services)
+        store = ComposeStore(path, debounce=0.05)
+        started = time.perf_counter()
+        for name in names:
+            store.remove_service(name)
+        store.flush()
+        managed = time.perf_counter() - started
+        managed_comments = path.read_text().startswith("#")
+        remaining = len(yaml.safe_load(path.read_text())["services"])
+
+    print(f"services={args.services} deletes={args.deletes}")
+    print(f"baseline safe_load/dump per delete: {baseline * 1000:9.1f}ms total  "
+          f"{baseline / args.deletes * 1000:7.2f}ms/delete  comments kept={baseline_comments}")
+    print(f"ComposeStore (parse once, 1 flush): {managed * 1000:9.1f}ms total  "
+          f"{managed / args.deletes * 1000:7.2f}ms/delete  comments kept={managed_comments}  "
+          f"remaining services={remaining}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark: analyzing one sheet several times inline vs. through a dataset handle.
+
+Starts a generated analyzer and the gateway (both sharing a temporary DATASET_DIR) and
+posts the same spreadsheet JSON through the gateway --calls times, then uploads it once
+to /api/datasets and repeats the calls with {"dataset": handle}. The result cache is
+disabled so every call is analyzed. Both ways must give the same results; the sheet
+includes a zip code column with leading zeros, which the analyzer declares as text.
+
+    python benchmarks/dataset_store.py --rows 200000 --calls 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from generated_service import DESCRIBE_RULES, GeneratedService, free_port
+from wire_formats import json_body, make_frame
+
+RULES = DESCRIBE_RULES + [{"type": "validation", "description": "Zip", "criteria": ["zip == '00042'"]}]
+GATEWAY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "gateway")
+
+
+def start_gateway(port: int, env: dict) -> subprocess.Popen:
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--log-level", "warning"]
+    process = subprocess.Popen(command, cwd=GATEWAY_DIR, env={**os.environ, **env})
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return process
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Gateway did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--columns", type=int, default=8)
+    parser.add_argument("--calls", type=int, default=5)
+    args = parser.parse_args()
+
+    frame = make_frame(args.rows, args.columns)
+    frame["zip"] = [f"{i % 1000:05d}" for i in range(args.rows)]
+    body = json_body(frame)
+    print(f"rows={args.rows} columns={args.columns} sheet={len(body) / 1e6:.1f}MB calls={args.calls}")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        dataset_dir = os.path.join(workdir, "datasets")
+        env = {"DATASET_DIR": dataset_dir, "ANALYZER_CACHE_BYTES": "0", "ANALYZER_WORKERS": "1"}
+        with GeneratedService(env=env, rules=RULES, input_schema={"columns": {"zip": "string"}}) as service:
+            services_path = os.path.join(workdir, "services.json")
+            with open(services_path, "w") as f:
+                json.dump([{"name": "bench", "url": service.url,
+                            "routes": [{"path": "/api/bench", "methods": ["POST"], "target": "/analyze"}]}], f)
+            port = free_port()
+            gateway = start_gateway(port, {**env, "SERVICES_PATH": services_path, "BACKEND_URL": "http://127.0.0.1:9"})
+            url = f"http://127.0.0.1:{port}"
+            try:
+                with httpx.Client(timeout=600) as client:
+                    started = time.perf_counter()
+                    for _ in range(args.calls):
+                        response = client.post(f"{url}/api/bench", content=body,
+                                               headers={"content-type": "application/json"})
+                        response.raise_for_status()
+                    inline = time.perf_counter() - started
+                    inline_results = response.json()["results"]
+
+                    started = time.perf_counter()
+                    upload = client.post(f"{url}/api/datasets", content=body,
+                                         headers={"content-type": "application/json"})
+                    upload.raise_for_status()
+                    uploaded = time.perf_counter() - started
+                    request = json.dumps({"dataset": upload.json()["handle"]}).encode()
+                    for _ in range(args.calls):
+                        response = client.post(f"{url}/api/bench", content=request,
+                                               headers={"content-type": "application/json"})
+                        response.raise_for_status()
+                    handles = time.perf_counter() - started
+                    assert response.json()["results"] == inline_results, "results differ between inline and handle"
+                    stored = upload.json()["bytes"]
+            finally:
+                gateway.terminate()
+                gateway.wait(timeout=10)
+
+    print(f"{'inline JSON':<22} {inline:>7.2f}s  {inline / args.calls * 1000:>8.0f}ms/call  "
+          f"sent {len(body) * args.calls / 1e6:>7.1f}MB")
+    print(f"{'upload + handles':<22} {handles:>7.2f}s  {(handles - uploaded) / args.calls * 1000:>8.0f}ms/call  "
+          f"sent {(len(body) + len(request) * args.calls) / 1e6:>7.1f}MB  (upload {uploaded * 1000:.0f}ms, "
+          f"stored {stored / 1e6:.1f}MB Arrow)")
+
+
+if __name__ == "__main__":
+    main()
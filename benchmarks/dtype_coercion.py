@@ -0,0 +1,101 @@
+"""Benchmark: DataFrame memory and aggregation time before and after schema coercion.
+
+Builds the object-dtype frame spreadsheet ingestion produces, coerces it with
+analyzer_runtime.schema and prints the per-column memory report plus describe() and
+rule-plan timings on both frames. Then checks that describe() mean and std of every
+numeric column equal the float64 values; exits 1 if one does not.
+
+    python benchmarks/dtype_coercion.py --rows 500000
+"""
+import argparse
+import math
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "app", "templates", "analyzer"))
+from app.rule_engine import compile_rules  # noqa: E402
+from analyzer_runtime.engine import RulePlan  # noqa: E402
+from analyzer_runtime.schema import InputSchema  # noqa: E402
+
+
+def sheet_frame(rows: int) -> pd.DataFrame:
+    """Every cell a string, as the spreadsheet JSON delivers them"""
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "amount": rng.normal(100, 20, rows).round(2).astype(str),
+        "quantity": rng.integers(0, 100, rows).astype(str),
+        # Quarters below 2^22 are exact in float32, which coercion must still not use
+        "weight": (rng.integers(0, 1 << 24, rows) / 4).astype(str),
+        "returns": np.where(rng.random(rows) < 0.1, "", rng.integers(0, 1000, rows).astype(str)),
+        "region": rng.choice(["north", "south", "east", "west"], rows),
+        "priority": rng.choice(["true", "false"], rows),
+        "ordered_at": pd.date_range("2020-01-01", periods=rows, freq="min").strftime("%Y-%m-%d %H:%M").to_numpy(),
+        "customer": [f"customer-{i}" for i in range(rows)],
+    }).astype(object)
+
+
+def precision_errors(raw: pd.DataFrame, typed: pd.DataFrame):
+    """describe() mean/std of coerced numeric columns that differ from float64 arithmetic"""
+    errors = []
+    summary = typed.select_dtypes("number").describe()
+    for column in summary.columns:
+        values = pd.to_numeric(raw[column].replace("", np.nan)).to_numpy(dtype=np.float64)
+        expected = {"mean": np.nanmean(values), "std": np.nanstd(values, ddof=1)}
+        for stat, value in expected.items():
+            if not math.isclose(summary.at[stat, column], value, rel_tol=1e-12):
+                errors.append((column, stat, summary.at[stat, column], value))
+    return errors
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500000)
+    args = parser.parse_args()
+
+    raw = sheet_frame(args.rows)
+    typed, coerce_seconds = timed(lambda: InputSchema({"columns": {"amount": "float"}}).coerce(raw))
+    report = typed.attrs["memory"]
+
+    print(f"rows={args.rows} coerce={coerce_seconds * 1000:.0f}ms")
+    print(f"{'column':<12} {'kind':<9} {'before':>16} {'after':>16} {'MB before':>10} {'MB after':>9}")
+    for column in report["columns"]:
+        print(f"{column['column']:<12} {column['kind']:<9} {column['dtype_before']:>16} {column['dtype_after']:>16} "
+              f"{column['bytes_before'] / 1e6:>10.1f} {column['bytes_after'] / 1e6:>9.1f}")
+    print(f"{'total':<12} {'':<9} {'':>16} {'':>16} {report['bytes_before'] / 1e6:>10.1f} "
+          f"{report['bytes_after'] / 1e6:>9.1f}  ({report['reduction']:.0%} smaller)")
+
+    plan = RulePlan(compile_rules([
+        SimpleNamespace(type="calculation", description="totals",
+                        criteria=["sum(amount)", "mean(quantity)", "median(returns)", "nunique(region)"]),
+        SimpleNamespace(type="validation", description="checks",
+                        criteria=["amount > 0", "region in [north, south]", "returns is not null"]),
+    ]))
+    print()
+    for label, fn in (("describe()", lambda df: df.describe()), ("rule plan", plan.execute)):
+        _, before = timed(lambda: fn(raw))
+        _, after = timed(lambda: fn(typed))
+        print(f"{label:<12} object {before * 1000:8.1f}ms  typed {after * 1000:8.1f}ms  {before / after:5.1f}x")
+
+    errors = precision_errors(raw, typed)
+    print(f"\ndescribe() mean/std equal to float64: {not errors}")
+    for error in errors:
+        print("  " + str(error))
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Local OpenAI-compatible chat completions server with injected latency and failures.
+
+    python benchmarks/fake_openai_server.py --port 18100 --latency 1.0 --rate-limit 0.3 --server-error 0.1
+
+Point the backend at it with OPENAI_BASE_URL=http://127.0.0.1:18100/v1.
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def create_app(latency: float = 0.5, rate_limit: float = 0.0, server_error: float = 0.0) -> FastAPI:
+    app = FastAPI()
+    app.state.calls = 0
+    app.state.failures = 0
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.calls += 1
+        await asyncio.sleep(latency * random.uniform(0.5, 1.5))
+
+        roll = random.random()
+        if roll < rate_limit:
+            app.state.failures += 1
+            return JSONResponse({"error": {"message": "Rate limit reached"}}, status_code=429, headers={"Retry-After": "0.1"})
+        if roll < rate_limit + server_error:
+            app.state.failures += 1
+            return JSONResponse({"error": {"message": "Upstream overloaded"}}, status_code=503)
+
+        prompt = body["messages"][-1]["content"]
+        return {
+            "id": f"chatcmpl-{app.state.calls}",
+            "object": "chat.completion",
+            "model": body.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": f"Formatted: {prompt}"}, "finish_reason": "stop"}],
+        }
+
+    return app
+
+
+def start_in_thread(app: FastAPI, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=18100)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--rate-limit", type=float, default=0.0)
+    parser.add_argument("--server-error", type=float, default=0.0)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency, args.rate_limit, args.server_error), host="127.0.0.1", port=args.port)
@@ -0,0 +1,114 @@
+"""Benchmark: calling analyzers one by one through the gateway vs. one /api/fanout call.
+
+Starts stand-in analyzer services with fixed response latencies (the analyzers run in
+their own containers, so their work overlaps regardless of gateway cores), registers
+them with an in-process gateway and compares the sequential wall time with the fan-out
+wall time and the time to the first streamed result. One extra stand-in never answers
+within the deadline, to show per-analyzer failures.
+
+    python benchmarks/fanout.py --analyzers 8 --latency 0.2 0.4 0.8
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+
+from generated_service import free_port
+
+GATEWAY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "gateway")
+
+
+def stand_in(delay: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/analyze")
+    async def analyze(request: Request):
+        body = await request.body()
+        await asyncio.sleep(delay)
+        return {"results": {"bytes": len(body), "delay": delay}, "metadata": {}}
+
+    return app
+
+
+def serve(app: FastAPI, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--analyzers", type=int, default=8)
+    parser.add_argument("--latency", type=float, nargs="+", default=[0.2, 0.4, 0.8])
+    parser.add_argument("--deadline", type=float, default=2.0)
+    args = parser.parse_args()
+
+    services = []
+    delays = {}
+    for index in range(args.analyzers):
+        delay = args.latency[index % len(args.latency)]
+        port = free_port()
+        serve(stand_in(delay), port)
+        name = f"bench{index}analyzer"
+        delays[name] = delay
+        services.append({"name": name, "url": f"http://127.0.0.1:{port}",
+                         "routes": [{"path": f"/api/{name}", "methods": ["POST"], "target": "/analyze"}]})
+    slow_port = free_port()
+    serve(stand_in(args.deadline * 5), slow_port)
+    services.append({"name": "slowanalyzer", "url": f"http://127.0.0.1:{slow_port}",
+                     "routes": [{"path": "/api/slowanalyzer", "methods": ["POST"], "target": "/analyze"}]})
+
+    with tempfile.TemporaryDirectory() as workdir:
+        services_path = os.path.join(workdir, "services.json")
+        with open(services_path, "w") as f:
+            json.dump(services, f)
+        os.environ.update({"SERVICES_PATH": services_path, "DATASET_DIR": os.path.join(workdir, "datasets"),
+                           "BACKEND_URL": "http://127.0.0.1:9"})
+        sys.path.insert(0, GATEWAY_DIR)
+        import main as gateway  # noqa: E402
+
+        port = free_port()
+        serve(gateway.app, port)
+        url = f"http://127.0.0.1:{port}"
+        body = json.dumps({"dataset": "0" * 32}).encode()
+        names = list(delays)
+
+        with httpx.Client(timeout=60) as client:
+            started = time.perf_counter()
+            for name in names:
+                client.post(f"{url}/api/{name}", content=body, headers={"content-type": "application/json"})
+            sequential = time.perf_counter() - started
+
+            started = time.perf_counter()
+            first = None
+            events = []
+            with client.stream("POST", f"{url}/api/fanout",
+                               params={"analyzers": ",".join(names + ["slowanalyzer", "missing"]),
+                                       "deadline": str(args.deadline)},
+                               content=body, headers={"content-type": "application/json"}) as response:
+                for line in response.iter_lines():
+                    if first is None:
+                        first = time.perf_counter() - started
+                    events.append(json.loads(line))
+            fanned = time.perf_counter() - started
+
+    print(f"analyzers={len(names)} latencies={args.latency} sum={sum(delays.values()):.2f}s max={max(delays.values()):.2f}s")
+    print(f"{'sequential':<22} {sequential:>7.2f}s")
+    print(f"{'fan-out (all results)':<22} {fanned:>7.2f}s  first result after {first:.2f}s "
+          f"(includes the {args.deadline}s timeout of slowanalyzer)")
+    for event in events:
+        print("  " + json.dumps({key: value for key, value in event.items() if key != "response"}))
+
+
+if __name__ == "__main__":
+    main()
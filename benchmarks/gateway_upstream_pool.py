@@ -0,0 +1,90 @@
+"""Benchmark: per-request httpx clients vs. the gateway's pooled upstream client.
+
+Starts a local stand-in backend and drives it with the two client strategies,
+reporting p50/p99 latency and requests/sec for each.
+
+    python benchmarks/gateway_upstream_pool.py --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "gateway"))
+from upstream import UpstreamPool, UpstreamSettings  # noqa: E402
+
+stand_in = FastAPI()
+
+
+@stand_in.get("/health")
+async def health():
+    return {"status": "healthy", "service": "backend"}
+
+
+def start_stand_in(port: int) -> uvicorn.Server:
+    config = uvicorn.Config(stand_in, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def run(label: str, total: int, concurrency: int, do_request):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await do_request()
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{label:<22} p50={p50:7.2f}ms  p99={p99:7.2f}ms  rps={total / elapsed:9.1f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--port", type=int, default=18081)
+    args = parser.parse_args()
+
+    server = start_stand_in(args.port)
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    async def per_request_client():
+        async with httpx.AsyncClient() as client:
+            await client.get(f"{base_url}/health")
+
+    pool = UpstreamPool(UpstreamSettings(max_connections=args.concurrency, max_keepalive_connections=args.concurrency))
+    pool.register(base_url)
+
+    async def pooled_client():
+        await pool.client(base_url).get("/health")
+
+    try:
+        await run("before: per-request", args.requests, args.concurrency, per_request_client)
+        await run("after: pooled", args.requests, args.concurrency, pooled_client)
+    finally:
+        await pool.aclose()
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+"""Helpers for benchmarks that run a real generated analyzer service.
+
+Renders backend/app/templates/analyzer into a temp directory the same way
+generate_python_code does and starts it under uvicorn in a subprocess.
+"""
+import os
+import pprint
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+from app.rule_engine import compile_rules  # noqa: E402
+from app.templating import TemplateRegistry  # noqa: E402
+
+DESCRIBE_RULES = [{"type": "calculation", "description": "Summary statistics"}]
+
+
+def rule_plan_literal(rules: List[Dict[str, Any]]) -> str:
+    """Compile rule dicts the way generate_python_code compiles AnalyzerStructure.rules"""
+    parsed = [SimpleNamespace(**{"criteria": [], **rule}) for rule in rules]
+    return pprint.pformat(compile_rules(parsed), sort_dicts=False)
+
+
+def render_analyzer(directory: Path, name: str = "Bench", rules: Optional[List[Dict[str, Any]]] = None,
+                    input_schema: Optional[Dict[str, Any]] = None, **extra_values) -> Path:
+    templates = TemplateRegistry()
+    route_name = f"{name.lower()}analyzer"
+    files = {(".gitignore" if key == "gitignore" else key): value
+             for key, value in templates.static_files("analyzer").items()}
+    files["main.py"] = templates.render(
+        "analyzer/main.py",
+        analyzer_name_literal=repr(name),
+        route_name_literal=repr(route_name),
+        component_name_literal=repr(f"{name}Analyzer"),
+        input_schema_literal=repr(input_schema or {"columns": {}}),
+        rule_plan_literal=rule_plan_literal(rules or DESCRIBE_RULES),
+        **extra_values,
+    )
+    for filename, content in files.items():
+        path = directory / filename
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    return directory
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class GeneratedService:
+    """Context manager running a rendered analyzer under uvicorn"""
+
+    def __init__(self, env=None, workers: int = 1, app: str = "main:app", **render_values):
+        self.env = env or {}
+        self.workers = workers
+        self.app = app
+        self.render_values = render_values
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = render_analyzer(Path(self._tmp.name), **self.render_values)
+        command = [sys.executable, "-m", "uvicorn", self.app, "--host", "127.0.0.1",
+                   "--port", str(self.port), "--log-level", "warning", "--workers", str(self.workers)]
+        self.process = subprocess.Popen(command, cwd=self.directory, env={**os.environ, **self.env})
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            try:
+                if httpx.get(f"{self.url}/health", timeout=1).status_code == 200:
+                    return self
+            except httpx.TransportError:
+                time.sleep(0.1)
+        self.__exit__(None, None, None)
+        raise RuntimeError("Generated service did not start")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait(timeout=10)
+        self._tmp.cleanup()
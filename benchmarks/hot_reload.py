@@ -0,0 +1,136 @@
+"""Benchmark: rolling out a changed analyzer by hot reload vs. by restarting the service.
+
+Restart: time from starting a fresh uvicorn process (as a rebuilt container would, minus
+the image build) to its first 200 from /analyze. Hot reload: the service runs
+analyzer_runtime.serve:app; each round renames a regenerated main.py over the old one
+and times until /info reports the next code_version, and until /analyze answers with the
+new analyzer. During every swap, slow requests started on the old version must finish with
+200 on the old version. Reloads must not leave processes or shared memory behind (the
+requests run on partitions), and must keep the rows appended to an incremental dataset.
+
+    python benchmarks/hot_reload.py --rounds 10
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from generated_service import DESCRIBE_RULES, GeneratedService, render_analyzer
+from wire_formats import arrow_body, make_frame
+
+ARROW = {"content-type": "application/vnd.apache.arrow.stream"}
+SLOW_RULES = DESCRIBE_RULES + [
+    {"type": "calculation", "description": "Distinct values and medians",
+     "criteria": [f"nunique(col{j})" for j in range(8)] + [f"median(col{j})" for j in range(8)]},
+]
+
+
+def regenerated(name: str) -> str:
+    """main.py of the analyzer regenerated with another name, so responses show which version ran"""
+    with tempfile.TemporaryDirectory() as tmp:
+        return (render_analyzer(Path(tmp), name=name, rules=SLOW_RULES) / "main.py").read_text()
+
+
+def swap(directory: Path, content: str):
+    """Replace main.py the way the backend writes it: a temp file renamed over the target"""
+    partial = directory / ".main.py.tmp"
+    partial.write_text(content)
+    os.replace(partial, directory / "main.py")
+
+
+async def analyzer_of(client: httpx.AsyncClient, url: str, body: bytes):
+    response = await client.post(f"{url}/analyze", content=body, headers=ARROW)
+    return response.status_code, response.json()["metadata"]["analyzer"] if response.status_code == 200 else None
+
+
+def descendants(pid: int) -> int:
+    """Processes below pid, such as analysis workers and their partition processes"""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                parents[int(entry)] = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (ValueError, OSError):
+            continue
+    found, frontier = 0, [pid]
+    while frontier:
+        children = [child for child, parent in parents.items() if parent in frontier]
+        found += len(children)
+        frontier = children
+    return found
+
+
+def shared_segments() -> int:
+    return sum(1 for name in os.listdir("/dev/shm") if name.startswith("psm_"))
+
+
+async def rollout(url: str, directory: Path, rounds: int, small: bytes, large: bytes, in_flight: int):
+    switched = []
+    answered = []
+    survivors = []
+    async with httpx.AsyncClient(timeout=120) as client:
+        version = (await client.get(f"{url}/info")).json()["code_version"]
+        assert (await client.post(f"{url}/incremental/sheet", content=small, headers=ARROW)).status_code == 200
+        for i in range(rounds):
+            content = regenerated(f"Round{i}")
+            old = (await analyzer_of(client, url, small))[1]
+            slow = [asyncio.create_task(analyzer_of(client, url, large)) for _ in range(in_flight)]
+            await asyncio.sleep(0.05)
+            started = time.perf_counter()
+            swap(directory, content)
+            while (await client.get(f"{url}/info")).json()["code_version"] != version + 1:
+                await asyncio.sleep(0.005)
+            switched.append(time.perf_counter() - started)
+            # On one worker this queues behind the in-flight requests
+            status, analyzer = await analyzer_of(client, url, small)
+            answered.append(time.perf_counter() - started)
+            assert (status, analyzer) == (200, f"Round{i}Analyzer"), (status, analyzer)
+            version += 1
+            survivors.extend(result == (200, old) for result in await asyncio.gather(*slow))
+        state = await client.get(f"{url}/incremental/sheet")
+        kept = state.json()["metadata"]["incremental"]["rows"] if state.status_code == 200 else 0
+    return switched, answered, survivors, kept
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--in-flight", type=int, default=2)
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    small = arrow_body(make_frame(1000, 8))
+    large = arrow_body(make_frame(args.rows, 8))
+    env = {"ANALYZER_WORKERS": "1", "ANALYZER_MAX_IN_FLIGHT": str(args.in_flight + 4),
+           "ANALYZER_PARTITIONS": "2", "ANALYZER_PARTITION_MIN_ROWS": str(args.rows)}
+
+    started = time.perf_counter()
+    with GeneratedService(env=env, rules=SLOW_RULES) as service:
+        assert httpx.post(f"{service.url}/analyze", content=small, headers=ARROW, timeout=60).status_code == 200
+        restart = time.perf_counter() - started
+
+    with GeneratedService(env=env, app="analyzer_runtime.serve:app", rules=SLOW_RULES) as service:
+        assert httpx.post(f"{service.url}/analyze", content=large, headers=ARROW, timeout=120).status_code == 200
+        processes, segments = descendants(service.process.pid), shared_segments()
+        switched, answered, survivors, kept = asyncio.run(rollout(service.url, service.directory, args.rounds, small, large, args.in_flight))
+        leaked = descendants(service.process.pid) - processes, shared_segments() - segments
+
+    print(f"rounds={args.rounds} in-flight per swap={args.in_flight} rows={args.rows} cpus={os.cpu_count()}")
+    print(f"restart:    {restart * 1000:.0f}ms to first 200 (no image build)")
+    print(f"hot reload: new version served after p50 {statistics.median(switched) * 1000:.0f}ms "
+          f"(max {max(switched) * 1000:.0f}ms), its first response after p50 {statistics.median(answered) * 1000:.0f}ms "
+          f"(max {max(answered) * 1000:.0f}ms)")
+    print(f"in-flight requests finished on the old version: {sum(survivors)}/{len(survivors)}")
+    print(f"after {args.rounds} reloads: {leaked[0]} more processes, {leaked[1]} more shared memory segments, "
+          f"{kept} incremental rows kept")
+    if leaked != (0, 0) or kept != 1000:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
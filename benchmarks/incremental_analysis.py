@@ -0,0 +1,117 @@
+"""Benchmark: re-analyzing a growing sheet in full vs. appending only the new rows.
+
+Starts a generated analyzer with describe(), per-column aggregations, a validation and
+a score rule. The sheet is first appended whole, then grown by --appends chunks of
+--chunk rows. The time per append is compared with a full /analyze of the grown sheet.
+At the end /incremental/{dataset}/verify recomputes everything from the full sheet and
+checks the running state against it. The state's quantiles are sketched, so they must
+be within their reported bounds. A second dataset of one small append must verify as
+well, and no rule may fail on either; the script exits 1 otherwise.
+
+    python benchmarks/incremental_analysis.py --rows 1000000 --chunk 10000 --appends 10
+"""
+import argparse
+import statistics
+import sys
+import time
+
+import httpx
+import numpy as np
+import pandas as pd
+
+from generated_service import GeneratedService
+from wire_formats import arrow_body
+
+ARROW = {"content-type": "application/vnd.apache.arrow.stream"}
+COLUMNS = [f"col{j}" for j in range(6)]
+RULES = [
+    {"type": "calculation", "description": "Summary statistics"},
+    {"type": "calculation", "description": "Aggregations", "criteria": [
+        f"{name}({column})" for column in COLUMNS for name in ("sum", "mean", "std", "min", "max", "median", "count")
+    ] + ["nunique(grade)"]},
+    {"type": "validation", "description": "Checks", "criteria": ["col0 > -2", "col1 <= 1.5", "grade == 'a'"]},
+    {"type": "score", "description": "Score", "criteria": [f"{column} > 0" for column in COLUMNS]},
+]
+
+
+def make_frame(rows: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    frame = {column: rng.normal(loc=j * 10, scale=j + 1, size=rows).round(4) for j, column in enumerate(COLUMNS)}
+    frame["col5"][rng.random(rows) < 0.02] = np.nan
+    frame["grade"] = rng.choice(["a", "b", "c", "d"], size=rows)
+    return pd.DataFrame(frame)
+
+
+def rule_errors(results: dict) -> list:
+    return [key for key in results if key.endswith("_error")]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--chunk", type=int, default=10000)
+    parser.add_argument("--appends", type=int, default=10)
+    args = parser.parse_args()
+
+    base = make_frame(args.rows, 0)
+    chunks = [make_frame(args.chunk, seed) for seed in range(1, args.appends + 1)]
+    full = pd.concat([base] + chunks, ignore_index=True)
+    print(f"rows={args.rows} + {args.appends} appends of {args.chunk} rows, columns={len(full.columns)}")
+
+    env = {"ANALYZER_WORKERS": "1", "ANALYZER_CACHE_BYTES": "0"}
+    with GeneratedService(env=env, rules=RULES) as service, httpx.Client(timeout=600) as client:
+        url = f"{service.url}/incremental/bench"
+        started = time.perf_counter()
+        client.post(url, content=arrow_body(base), headers=ARROW, params={"offset": 0}).raise_for_status()
+        initial = time.perf_counter() - started
+
+        appends, rows = [], len(base)
+        for chunk in chunks:
+            body = arrow_body(chunk)
+            started = time.perf_counter()
+            response = client.post(url, content=body, headers=ARROW, params={"offset": rows})
+            appends.append(time.perf_counter() - started)
+            response.raise_for_status()
+            rows += len(chunk)
+        incremental = response.json()
+        stale = client.post(url, content=arrow_body(chunks[0]), headers=ARROW, params={"offset": len(base)})
+
+        full_body = arrow_body(full)
+        started = time.perf_counter()
+        analyzed = client.post(f"{service.url}/analyze", content=full_body, headers=ARROW)
+        recompute = time.perf_counter() - started
+        analyzed.raise_for_status()
+
+        report = client.post(f"{url}/verify", content=full_body, headers=ARROW).json()
+
+        # One append of float32-exact values in the same columns, verified against the same rows
+        single_frame = pd.DataFrame({column: np.arange(50) / 4 + 1000 * j for j, column in enumerate(COLUMNS)})
+        single_frame["grade"] = ["a", "b"] * 25
+        single = arrow_body(single_frame)
+        single_url = f"{service.url}/incremental/single"
+        single_append = client.post(single_url, content=single, headers=ARROW, params={"offset": 0})
+        single_append.raise_for_status()
+        single_report = client.post(f"{single_url}/verify", content=single, headers=ARROW).json()
+
+    assert incremental["metadata"]["row_count"] == len(full)
+    errors = rule_errors(incremental["results"]) + rule_errors(single_append.json()["results"])
+    assert stale.status_code == 409, stale.status_code
+    print(f"{'initial append':<26} {initial * 1000:>9.0f}ms  ({len(base)} rows)")
+    print(f"{'append (median)':<26} {statistics.median(appends) * 1000:>9.0f}ms  ({args.chunk} rows)")
+    print(f"{'full /analyze':<26} {recompute * 1000:>9.0f}ms  ({len(full)} rows)  "
+          f"{recompute / statistics.median(appends):.0f}x the append")
+    print(f"stale offset refused: HTTP {stale.status_code} {stale.json()['detail']['error']}")
+    print(f"verify: matches={report['matches']} compared={report['compared']} "
+          f"mismatched={report['mismatched']} max_relative_error={report['max_relative_error']:.2e}")
+    for mismatch in report["mismatches"][:10]:
+        print("  " + str(mismatch))
+    print(f"verify after one append: matches={single_report['matches']} compared={single_report['compared']}")
+    for mismatch in single_report["mismatches"][:10]:
+        print("  " + str(mismatch))
+    print(f"rule errors: {errors}")
+    if not (report["matches"] and single_report["matches"]) or errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
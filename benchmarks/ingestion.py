@@ -0,0 +1,68 @@
+"""Benchmark: spreadsheet payload to DataFrame, legacy nested comprehensions vs. analyzer_runtime.
+
+sheet_to_frame decodes every cell into one object block and leaves typing to the input
+schema, while the legacy DataFrame constructor infers a dtype per column; the check
+compares the values and ignores dtypes.
+
+    python benchmarks/ingestion.py --sizes 1000 10000 100000 --columns 10
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "app", "templates", "analyzer"))
+from analyzer_runtime.ingest import sheet_to_frame  # noqa: E402
+
+
+def legacy_convert(data):
+    rows_data = data["rows"]
+    headers = [cell['value'] for cell in rows_data[0]['cells']]
+    processed_rows = []
+    for row in rows_data[1:]:
+        row_values = [cell['value'] for cell in row['cells']]
+        processed_rows.append(row_values)
+    df = pd.DataFrame(processed_rows, columns=headers)
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def make_sheet(rows: int, columns: int):
+    header = {"cells": [{"value": f"col{j}"} for j in range(columns)]}
+    # Numbers in even columns, text in odd ones, as sheets send both
+    body = [
+        {"cells": [{"value": i * columns + j if j % 2 == 0 else str(i * columns + j)} for j in range(columns)]}
+        for i in range(rows)
+    ]
+    return {"rows": [header] + body}
+
+
+def best_of(fn, data, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(data)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--columns", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'cells':>10} {'legacy ms':>11} {'runtime ms':>11} {'speedup':>8}")
+    for rows in args.sizes:
+        data = make_sheet(rows, args.columns)
+        pd.testing.assert_frame_equal(legacy_convert(data), sheet_to_frame(data), check_dtype=False)
+        legacy = best_of(legacy_convert, data, args.repeat)
+        runtime = best_of(sheet_to_frame, data, args.repeat)
+        print(f"{rows:>8} {rows * args.columns:>10} {legacy * 1000:>11.1f} {runtime * 1000:>11.1f} {legacy / runtime:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
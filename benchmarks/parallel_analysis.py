@@ -0,0 +1,93 @@
+"""Benchmark: rule plan execution on one large frame, serial vs. ANALYZER_PARTITIONS processes.
+
+Runs describe(), per-column aggregations (sum, mean, std, min, max, median) and a score
+rule on a synthetic numeric sheet through analyzer_runtime.parallel with 1..N partition
+processes, checks every result against the serial execution and prints the speedup.
+Scaling needs that many free cores; the shared-memory copy and merge are included.
+Results are compared to 1e-6: pandas summarizes float32 columns in float32, the
+partitions always in float64.
+
+    python benchmarks/parallel_analysis.py --rows 2000000 --partitions 1 2 4 8
+"""
+import argparse
+import math
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "app", "templates", "analyzer"))
+from app.rule_engine import compile_rules  # noqa: E402
+from analyzer_runtime.engine import ExecutionContext, RulePlan  # noqa: E402
+from analyzer_runtime.parallel import PartitionPool  # noqa: E402
+
+COLUMNS = [f"num{j}" for j in range(8)]
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    frame = {f"num{j}": rng.normal(100, 25, size=rows) for j in range(6)}
+    frame["num6"] = rng.integers(0, 1000, size=rows).astype(np.int32)
+    frame["num7"] = np.where(rng.random(rows) < 0.05, np.nan, rng.exponential(10, size=rows)).astype(np.float32)
+    return pd.DataFrame(frame)
+
+
+def make_plan() -> RulePlan:
+    rules = [
+        SimpleNamespace(type="calculation", description="Summary statistics", criteria=[]),
+        SimpleNamespace(type="calculation", description="Aggregations", criteria=[
+            f"{name}({column})" for column in COLUMNS for name in ("sum", "mean", "std", "min", "max", "median")
+        ]),
+        SimpleNamespace(type="score", description="Above average", criteria=[f"{column} > 100" for column in COLUMNS]),
+    ]
+    return RulePlan(compile_rules(rules))
+
+
+def same(left, right) -> bool:
+    if isinstance(left, dict):
+        return left.keys() == right.keys() and all(same(left[key], right[key]) for key in left)
+    if isinstance(left, float) and isinstance(right, float):
+        return (math.isnan(left) and math.isnan(right)) or math.isclose(left, right, rel_tol=1e-6, abs_tol=1e-9)
+    return left == right
+
+
+def timed(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000000)
+    parser.add_argument("--partitions", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    plan = make_plan()
+    print(f"rows={args.rows} columns={len(df.columns)} cpus={os.cpu_count()}")
+
+    expected, serial = timed(lambda: plan.execute(df, ExecutionContext), args.repeat)
+    print(f"{'serial':<14} {serial * 1000:>9.0f}ms")
+    for workers in args.partitions:
+        pool = PartitionPool(workers=workers, min_rows=0)
+        pool.start()
+        try:
+            result, seconds = timed(lambda: plan.execute(df, pool.context), args.repeat)
+        finally:
+            pool.shutdown()
+        print(f"{f'{workers} partitions':<14} {seconds * 1000:>9.0f}ms  speedup {serial / seconds:>5.2f}x  "
+              f"matches serial: {same(expected, result)}")
+
+
+if __name__ == "__main__":
+    main()
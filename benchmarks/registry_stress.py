@@ -0,0 +1,112 @@
+"""Stress test: concurrent creates and deletes against the backend registry store.
+
+Several processes, each with several threads, add analyzers and delete every
+other one they added. With proper locking the final registry holds exactly the
+surviving keys; the unlocked read-modify-write used previously loses updates.
+
+    python benchmarks/registry_stress.py --processes 4 --threads 4 --ops 50
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from app.registry_store import JsonRegistryStore, SqliteRegistryStore  # noqa: E402
+
+
+def naive_put(path: Path, key: str, entry):
+    try:
+        registry = json.loads(path.read_text())
+    except Exception:
+        registry = {}
+    registry[key] = entry
+    path.write_text(json.dumps(registry, indent=2))
+
+
+def naive_remove(path: Path, key: str):
+    try:
+        registry = json.loads(path.read_text())
+    except Exception:
+        registry = {}
+    registry.pop(key, None)
+    path.write_text(json.dumps(registry, indent=2))
+
+
+def open_store(backend: str, workdir: Path):
+    if backend == "sqlite":
+        return SqliteRegistryStore(workdir / "registry.sqlite3", export_path=workdir / "registry.json")
+    return JsonRegistryStore(workdir / "registry.json")
+
+
+def worker(backend: str, workdir: str, process_index: int, threads: int, ops: int):
+    workdir = Path(workdir)
+    store = None if backend == "naive" else open_store(backend, workdir)
+
+    def run(thread_index: int):
+        for op in range(ops):
+            key = f"p{process_index}t{thread_index}op{op}analyzer"
+            entry = {"name": key, "componentName": key}
+            if store is None:
+                naive_put(workdir / "registry.json", key, entry)
+            else:
+                store.put(key, entry)
+            if op % 2:
+                if store is None:
+                    naive_remove(workdir / "registry.json", key)
+                else:
+                    store.remove(key)
+
+    pool = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+
+def expected_keys(processes: int, threads: int, ops: int):
+    return {
+        f"p{p}t{t}op{op}analyzer"
+        for p in range(processes) for t in range(threads) for op in range(ops) if op % 2 == 0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--ops", type=int, default=50)
+    args = parser.parse_args()
+
+    expected = expected_keys(args.processes, args.threads, args.ops)
+    for backend in ("naive", "json", "sqlite"):
+        with tempfile.TemporaryDirectory() as workdir:
+            started = time.perf_counter()
+            procs = [
+                multiprocessing.Process(target=worker, args=(backend, workdir, i, args.threads, args.ops))
+                for i in range(args.processes)
+            ]
+            for proc in procs:
+                proc.start()
+            for proc in procs:
+                proc.join()
+            elapsed = time.perf_counter() - started
+
+            try:
+                final = set(json.loads((Path(workdir) / "registry.json").read_text()))
+            except Exception:
+                final = set()
+            lost = len(expected - final)
+            stale = len(final - expected)
+            total_ops = args.processes * args.threads * args.ops * 3 // 2
+            print(f"{backend:<7} ops={total_ops:<6} time={elapsed:6.2f}s  expected={len(expected)} "
+                  f"final={len(final)} lost={lost} stale={stale}")
+
+
+if __name__ == "__main__":
+    main()
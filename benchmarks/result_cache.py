@@ -0,0 +1,70 @@
+"""Benchmark: repeated /analyze calls on an unchanged sheet with the result cache.
+
+Posts the same spreadsheet JSON several times to a generated analyzer and reports the
+latency of the first (computed) call, of cache hits, of conditional requests answered
+with 304, and of the first call after a restart with ANALYZER_CACHE_DIR persisted.
+Responses with a failed rule must be computed again on every call, without an ETag.
+
+    python benchmarks/result_cache.py --rows 100000 --repeat 5
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+import httpx
+
+from generated_service import DESCRIBE_RULES, GeneratedService
+from wire_formats import json_body, make_frame
+
+FAILING_RULES = DESCRIBE_RULES + [{"type": "calculation", "description": "Missing column", "criteria": ["mean(missing)"]}]
+
+
+def timed_post(client: httpx.Client, url: str, body: bytes, headers=None):
+    started = time.perf_counter()
+    response = client.post(f"{url}/analyze", content=body,
+                           headers={"content-type": "application/json", **(headers or {})})
+    return response, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--columns", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    body = json_body(make_frame(args.rows, args.columns))
+    print(f"rows={args.rows} columns={args.columns} body={len(body) / 1e6:.1f}MB")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = {"ANALYZER_WORKERS": "1", "ANALYZER_CACHE_DIR": cache_dir}
+        with httpx.Client(timeout=300) as client:
+            with GeneratedService(env=env) as service:
+                first, computed = timed_post(client, service.url, body)
+                etag = first.headers["etag"]
+                hits = [timed_post(client, service.url, body)[1] for _ in range(args.repeat)]
+                conditional = [timed_post(client, service.url, body, {"if-none-match": etag}) for _ in range(args.repeat)]
+                assert all(response.status_code == 304 for response, _ in conditional)
+                stats = client.get(f"{service.url}/info").json()["cache"]
+
+            with GeneratedService(env=env) as service:
+                restarted, after_restart = timed_post(client, service.url, body)
+                assert restarted.headers.get("x-cache") == "hit" and restarted.content == first.content
+
+            with GeneratedService(env=env, rules=FAILING_RULES) as service:
+                failed = [timed_post(client, service.url, body)[0] for _ in range(2)]
+                assert all("calculation_2_error" in response.json()["results"] for response in failed)
+                assert not any("etag" in response.headers or "x-cache" in response.headers for response in failed)
+                assert client.get(f"{service.url}/info").json()["cache"]["entries"] == 0
+
+    print(f"{'computed':<24} {computed * 1000:>9.1f}ms")
+    print(f"{'cache hit (median)':<24} {statistics.median(hits) * 1000:>9.1f}ms")
+    print(f"{'304 (median)':<24} {statistics.median(seconds for _, seconds in conditional) * 1000:>9.1f}ms")
+    print(f"{'disk hit after restart':<24} {after_restart * 1000:>9.1f}ms")
+    print(f"hit_rate={stats['hit_rate']} hits={stats['hits']} not_modified={stats['not_modified']} "
+          f"misses={stats['misses']} bytes={stats['bytes']}")
+
+
+if __name__ == "__main__":
+    main()
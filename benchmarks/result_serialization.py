@@ -0,0 +1,93 @@
+"""Benchmark: encoding analysis results for the /analyze response.
+
+Compares the previous path (Pydantic response model, jsonable_encoder, json.dumps) with
+analyzer_runtime.responses on describe()-shaped results for a wide frame, including NaN,
+Inf and timestamps, and prints the size of the default and columnar bodies.
+
+    python benchmarks/result_serialization.py --columns 2000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, os.path.join(ROOT, "app", "templates", "analyzer"))
+from analyzer_runtime.responses import AnalysisJSONResponse, dumps, encode_results  # noqa: E402
+
+
+class AnalysisResponse(BaseModel):
+    results: Dict[str, Any]
+    metadata: Dict[str, Any]
+
+
+def make_results(columns: int, rows: int) -> Dict[str, Any]:
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame(rng.normal(size=(rows, columns)), columns=[f"metric_{i}" for i in range(columns)])
+    frame.iloc[:, ::7] = np.nan
+    frame.iloc[0, 1::11] = np.inf
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        describe = frame.describe().to_dict()
+    return {
+        "calculation": describe,
+        "validation": {"rows": rows, "criteria": {f"metric_{i} > 0": {"passed": 1, "failed": 2, "pass_rate": 1 / 3}
+                                                  for i in range(columns)}},
+        "generated_at": pd.Timestamp("2024-01-01 12:00"),
+    }
+
+
+def legacy(results: Dict[str, Any], metadata: Dict[str, Any]) -> bytes:
+    """Validate into the response model, walk it with jsonable_encoder, then json.dumps.
+
+    allow_nan is left on so the comparison can run at all: JSONResponse itself refuses
+    NaN/Inf with a 500.
+    """
+    model = AnalysisResponse(results=results, metadata=metadata)
+    content = jsonable_encoder(model, custom_encoder={pd.Timestamp: lambda value: value.isoformat()})
+    return json.dumps(content, separators=(",", ":")).encode("utf-8")
+
+
+def current(results: Dict[str, Any], metadata: Dict[str, Any], compact: bool = False) -> bytes:
+    return AnalysisJSONResponse(encode_results(results, compact), metadata, compact=compact).body
+
+
+def timed(fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        best = min(best, time.perf_counter() - started)
+    return body, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--columns", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = make_results(args.columns, args.rows)
+    metadata = {"analyzer": "Bench", "row_count": args.rows, "columns": [f"metric_{i}" for i in range(args.columns)]}
+
+    for label, fn in [
+        ("pydantic + jsonable_encoder + json", lambda: legacy(results, metadata)),
+        ("responses (default)", lambda: current(results, metadata)),
+        ("responses (columnar)", lambda: current(results, metadata, compact=True)),
+        ("dumps only", lambda: dumps(results)),
+    ]:
+        body, seconds = timed(fn, args.repeat)
+        print(f"{label:<36} {seconds * 1000:>8.1f}ms {len(body) / 1e6:>7.2f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Microbenchmarks: compiled rule plans vs. evaluating every rule on its own.
+
+For each rule type, N rules sharing columns and criteria are run two ways:
+  per-rule  - each rule executed alone on the full frame (what inline generated code did)
+  plan      - all rules compiled into one plan: shared aggregations/predicates once,
+              unreferenced columns projected away
+
+    python benchmarks/rule_engine.py --rows 200000 --rules 1 5 10
+"""
+import argparse
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "app", "templates", "analyzer"))
+from app.rule_engine import compile_rules  # noqa: E402
+from analyzer_runtime.engine import RulePlan  # noqa: E402
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    frame = {f"num{j}": rng.normal(100, 25, size=rows) for j in range(8)}
+    frame.update({f"cat{j}": rng.choice(["north", "south", "east", "west"], size=rows) for j in range(4)})
+    return pd.DataFrame(frame)
+
+
+def rules_for(kind: str, count: int):
+    rules = []
+    for i in range(count):
+        column = f"num{i % 3}"
+        if kind == "describe":
+            criteria = []
+            rule_type = "calculation"
+        elif kind == "aggregations":
+            criteria = [f"sum({column})", f"mean({column})", f"std({column})", f"median({column})", "nunique(cat0)"]
+            rule_type = "calculation"
+        else:
+            criteria = [f"{column} > 100", "num0 >= 50", "cat0 in [north, south]", "cat1 is not null"]
+            rule_type = kind
+        rules.append(SimpleNamespace(type=rule_type, description=f"{kind} {i}", criteria=criteria))
+    return rules
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--rules", type=int, nargs="+", default=[1, 5, 10])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    print(f"rows={args.rows} columns={len(df.columns)}")
+    print(f"{'rule type':<14} {'rules':>5} {'per-rule ms':>12} {'plan ms':>10} {'speedup':>8}")
+    for kind in ("describe", "aggregations", "validation", "score"):
+        for count in args.rules:
+            rules = rules_for(kind, count)
+            separate = [RulePlan(compile_rules([rule])) for rule in rules]
+            combined = RulePlan(compile_rules(rules))
+            per_rule = best_of(args.repeat, lambda: [plan.execute(df) for plan in separate])
+            planned = best_of(args.repeat, lambda: combined.execute(df))
+            print(f"{kind:<14} {count:>5} {per_rule * 1000:>12.1f} {planned * 1000:>10.1f} {per_rule / planned:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
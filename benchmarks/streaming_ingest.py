@@ -0,0 +1,145 @@
+"""Benchmark: peak RSS of a generated analyzer for JSON vs. streamed NDJSON bodies.
+
+Every (format, size) pair runs in a fresh service so VmHWM reflects that request alone.
+First, one NDJSON body sent as a single chunk is analyzed in memory and spilled: both
+must give the same results, and the spilled one must be read in STREAM_CHUNK_ROWS batches.
+
+    python benchmarks/streaming_ingest.py --sizes 100000 500000 1000000 --memory-limit 67108864
+"""
+import argparse
+import json
+import math
+import sys
+import time
+
+import httpx
+import numpy as np
+
+from generated_service import DESCRIBE_RULES, GeneratedService
+
+INPUT_SCHEMA = {"columns": {"amount": "float", "quantity": "integer", "region": "category"}}
+SPILL_SCHEMA = {"columns": {**INPUT_SCHEMA["columns"], "placed": "datetime"}}
+SPILL_RULES = DESCRIBE_RULES + [
+    {"type": "calculation", "description": "Aggregates",
+     "criteria": ["nunique(region)", "nunique(amount)", "count(placed)", "median(amount)", "sum(quantity)", "std(amount)", "max(placed)"]},
+    {"type": "validation", "description": "Checks",
+     "criteria": ["amount > 100", "region == 'north'", "quantity in [1, 2, 3]", "placed is not null"]},
+    {"type": "score", "description": "Score", "criteria": ["quantity >= 25", "amount < 90", "region in [east, west]"]},
+]
+
+
+def rows(count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    amounts = rng.normal(100, 15, size=count).round(2)
+    quantities = rng.integers(0, 50, size=count)
+    regions = rng.choice(["north", "south", "east", "west"], size=count)
+    for amount, quantity, region in zip(amounts.tolist(), quantities.tolist(), regions.tolist()):
+        yield [amount, quantity, region]
+
+
+def json_body(count: int) -> bytes:
+    header = {"cells": [{"value": name} for name in ("amount", "quantity", "region")]}
+    sheet_rows = [header] + [{"cells": [{"value": value} for value in row]} for row in rows(count)]
+    return json.dumps({"spreadsheet": {"rows": sheet_rows}}).encode()
+
+
+def ndjson_chunks(count: int, lines_per_chunk: int = 5000):
+    yield b'["amount", "quantity", "region"]\n'
+    batch = []
+    for row in rows(count):
+        batch.append(json.dumps(row))
+        if len(batch) == lines_per_chunk:
+            yield ("\n".join(batch) + "\n").encode()
+            batch = []
+    if batch:
+        yield ("\n".join(batch) + "\n").encode()
+
+
+def spill_body(count: int) -> bytes:
+    """Rows with a datetime column and missing values, as one NDJSON body"""
+    placed = np.datetime64("2024-01-01T00:00:00") + np.random.default_rng(1).integers(0, 86400 * 365, size=count).astype("timedelta64[s]")
+    lines = [json.dumps(["amount", "quantity", "region", "placed"])]
+    for i, (row, when) in enumerate(zip(rows(count), placed.astype(str).tolist())):
+        lines.append(json.dumps(row + [when if i % 97 else None]))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def differences(expected, actual, path=""):
+    """Paths where two result trees differ, numbers compared to a relative 1e-9"""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        found = [f"{path}/{key}: missing" for key in expected.keys() - actual.keys()]
+        found += [f"{path}/{key}: unexpected" for key in actual.keys() - expected.keys()]
+        for key in expected.keys() & actual.keys():
+            found += differences(expected[key], actual[key], f"{path}/{key}")
+        return found
+    if isinstance(expected, (int, float)) and isinstance(actual, (int, float)) and not isinstance(expected, bool):
+        return [] if math.isclose(expected, actual, rel_tol=1e-9, abs_tol=1e-9) else [f"{path}: {expected} != {actual}"]
+    return [] if expected == actual else [f"{path}: {expected!r} != {actual!r}"]
+
+
+def check_spill(count: int, chunk_rows: int) -> bool:
+    body = spill_body(count)
+    responses = {}
+    for label, limit in (("memory", 1 << 30), ("spilled", 10000)):
+        env = {"STREAM_MEMORY_LIMIT": str(limit), "STREAM_CHUNK_ROWS": str(chunk_rows), "ANALYZER_WORKERS": "0"}
+        with GeneratedService(env=env, input_schema=SPILL_SCHEMA, rules=SPILL_RULES) as service:
+            response = httpx.post(f"{service.url}/analyze", content=body,
+                                  headers={"content-type": "application/x-ndjson"}, timeout=600)
+            response.raise_for_status()
+            responses[label] = response.json()
+    streaming = responses["spilled"]["metadata"]["streaming"]
+    errors = [key for key in responses["spilled"]["results"] if key.endswith("_error")]
+    mismatches = differences(responses["memory"]["results"], responses["spilled"]["results"])
+    print(f"spill check: {count:,} rows in {streaming['chunks']} chunks, spilled={streaming['spilled']}, "
+          f"rule errors={errors}, differences from memory={len(mismatches)}")
+    for mismatch in mismatches[:10]:
+        print(f"  {mismatch}")
+    return (streaming["spilled"] and streaming["chunks"] >= count // chunk_rows
+            and not responses["memory"]["metadata"]["streaming"]["spilled"] and not errors and not mismatches)
+
+
+def peak_rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def run(label: str, count: int, memory_limit: int):
+    # Analysis stays in the server process so its VmHWM covers ingestion and analysis
+    env = {"STREAM_MEMORY_LIMIT": str(memory_limit), "ANALYZER_WORKERS": "0"}
+    with GeneratedService(env=env, input_schema=INPUT_SCHEMA) as service, httpx.Client(timeout=600) as client:
+        baseline = peak_rss_mb(service.process.pid)
+        if label == "json":
+            body, headers = json_body(count), {"content-type": "application/json"}
+        else:
+            body, headers = ndjson_chunks(count), {"content-type": "application/x-ndjson"}
+        started = time.perf_counter()
+        response = client.post(f"{service.url}/analyze", content=body, headers=headers)
+        elapsed = time.perf_counter() - started
+        response.raise_for_status()
+        streaming = response.json()["metadata"].get("streaming", {})
+        print(f"{label:<7} {count:>10,} {elapsed:>8.2f}s {baseline:>9.0f} {peak_rss_mb(service.process.pid):>9.0f}"
+              f" {str(streaming.get('spilled', '-')):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 500000, 1000000])
+    parser.add_argument("--memory-limit", type=int, default=64 * 1024 * 1024)
+    parser.add_argument("--check-rows", type=int, default=5000)
+    args = parser.parse_args()
+
+    if not check_spill(args.check_rows, chunk_rows=1000):
+        sys.exit(1)
+
+    print(f"STREAM_MEMORY_LIMIT={args.memory_limit:,}")
+    print(f"{'format':<7} {'rows':>10} {'latency':>9} {'idle MB':>9} {'peak MB':>9} {'spilled':>8}")
+    for count in args.sizes:
+        for label in ("json", "ndjson"):
+            run(label, count, args.memory_limit)
+
+
+if __name__ == "__main__":
+    main()
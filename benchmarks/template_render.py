@@ -0,0 +1,79 @@
+"""Benchmark: rendering generated analyzer files from the pre-compiled templates.
+
+Reports one-time load/compile cost and renders/sec for each template, plus a
+full analyzer file set (main.py, README.md and the cached static files).
+
+    python benchmarks/template_render.py --renders 20000
+"""
+import argparse
+import json
+import os
+import pprint
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from app.rule_engine import compile_rules  # noqa: E402
+from app.templating import TemplateRegistry  # noqa: E402
+
+RULE_PLAN = pprint.pformat(compile_rules([
+    SimpleNamespace(type="calculation", description="Summary statistics", criteria=[]),
+    SimpleNamespace(type="validation", description="Amounts are positive", criteria=["amount > 0"]),
+]), sort_dicts=False)
+
+
+def main_py_values(i: int):
+    return dict(
+        analyzer_name_literal=repr(f"Sales {i}"),
+        route_name_literal=repr(f"sales{i}analyzer"),
+        component_name_literal=repr(f"Sales{i}Analyzer"),
+        input_schema_literal=repr({"columns": {"amount": "float"}}),
+        rule_plan_literal=RULE_PLAN,
+    )
+
+
+def readme_values(i: int):
+    return dict(
+        analyzer_name=f"Sales {i}",
+        description="Summarises sales",
+        user_prompt="Describe every numeric column",
+        inputs_json=json.dumps([{"type": "number", "description": "amount", "format": []}], indent=2),
+        outputs_json=json.dumps([{"name": "summary", "type": "object", "description": "stats", "format": ""}], indent=2),
+    )
+
+
+def measure(label: str, renders: int, render):
+    started = time.perf_counter()
+    for i in range(renders):
+        render(i)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {renders / elapsed:12,.0f} renders/sec  {elapsed / renders * 1e6:8.2f}us/render")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--renders", type=int, default=20000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    templates = TemplateRegistry()
+    print(f"load + compile once: {(time.perf_counter() - started) * 1000:.2f}ms")
+
+    measure("analyzer/main.py", args.renders, lambda i: templates.render("analyzer/main.py", **main_py_values(i)))
+    measure("analyzer/README.md", args.renders, lambda i: templates.render("analyzer/README.md", **readme_values(i)))
+    measure("component.tsx", args.renders, lambda i: templates.render(
+        "component.tsx", component_name=f"Sales{i}Analyzer", route_name=f"sales{i}analyzer",
+        analyzer_name=f"Sales {i}", result_interface="summary: Record<string, any>;"))
+
+    def full_set(i: int):
+        files = dict(templates.static_files("analyzer"))
+        files["main.py"] = templates.render("analyzer/main.py", **main_py_values(i))
+        files["README.md"] = templates.render("analyzer/README.md", **readme_values(i))
+        return files
+
+    measure("full analyzer file set", args.renders, full_set)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark: JSON spreadsheet vs. Arrow IPC vs. Parquet bodies for a generated /analyze.
+
+Reports payload size and end-to-end request latency against a real rendered
+analyzer service.
+
+    python benchmarks/wire_formats.py --rows 100000 --columns 10
+"""
+import argparse
+import io
+import json
+import statistics
+import time
+
+import httpx
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from generated_service import GeneratedService
+
+
+def make_frame(rows: int, columns: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({f"col{j}": rng.normal(size=rows).round(4) for j in range(columns)})
+
+
+def json_body(df: pd.DataFrame) -> bytes:
+    header = {"cells": [{"value": column} for column in df.columns]}
+    rows = [{"cells": [{"value": str(value)} for value in row]} for row in df.itertuples(index=False)]
+    return json.dumps({"spreadsheet": {"rows": [header] + rows}}).encode()
+
+
+def arrow_body(df: pd.DataFrame) -> bytes:
+    sink = io.BytesIO()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def parquet_body(df: pd.DataFrame) -> bytes:
+    sink = io.BytesIO()
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), sink)
+    return sink.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--columns", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows, args.columns)
+    bodies = {
+        "json": (json_body(df), "application/json"),
+        "arrow-ipc": (arrow_body(df), "application/vnd.apache.arrow.stream"),
+        "parquet": (parquet_body(df), "application/vnd.apache.parquet"),
+    }
+
+    with GeneratedService() as service, httpx.Client(timeout=120) as client:
+        print(f"rows={args.rows} columns={args.columns}")
+        print(f"{'format':<10} {'bytes':>12} {'vs json':>8} {'p50 ms':>9} {'min ms':>9}")
+        json_size = len(bodies["json"][0])
+        for label, (body, content_type) in bodies.items():
+            latencies = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                response = client.post(f"{service.url}/analyze", content=body, headers={"content-type": content_type})
+                latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+            print(f"{label:<10} {len(body):>12,} {len(body) / json_size:>7.2f}x "
+                  f"{statistics.median(latencies) * 1000:>9.1f} {min(latencies) * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
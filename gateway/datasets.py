@@ -0,0 +1,203 @@
+import os
+import json
+import asyncio
+import hashlib
+import logging
+import tempfile
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+SUFFIX = ".arrow"
+ARROW_STREAM_TYPES = {"application/vnd.apache.arrow.stream", "application/x-arrow-stream"}
+ARROW_FILE_TYPES = {"application/vnd.apache.arrow.file", "application/x-arrow", "application/vnd.apache.arrow"}
+PARQUET_TYPES = {"application/vnd.apache.parquet", "application/x-parquet", "application/parquet"}
+
+
+class DatasetTooLarge(Exception):
+    """The converted dataset alone exceeds the store's size limit"""
+
+
+def media_type(content_type: Optional[str]) -> str:
+    return (content_type or "application/json").split(";")[0].strip().lower()
+
+
+def _column(values: List[Any]) -> pa.Array:
+    """Typed Arrow column where the cells agree on a type, strings where they are mixed.
+
+    Text stays text even when it looks numeric (zip codes, ids with leading zeros): the
+    analyzer's InputSchema coerces it exactly as it would the same sheet sent inline.
+    """
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+        return pa.array([None if value is None else str(value) for value in values], pa.string())
+
+
+def sheet_to_table(data: Dict[str, Any]) -> pa.Table:
+    """The {rows: [{cells: [{value}]}]} spreadsheet payload (bare or under "spreadsheet") as a table"""
+    sheet = data.get("spreadsheet", data) if isinstance(data, dict) else None
+    rows = sheet.get("rows") if isinstance(sheet, dict) else None
+    if not isinstance(rows, list) or not rows or "cells" not in rows[0]:
+        raise ValueError("Invalid data structure")
+
+    headers = []
+    for cell in rows[0]["cells"]:
+        value = cell.get("value")
+        headers.append("" if value is None else str(value).strip())
+    columns: List[List[Any]] = [[] for _ in headers]
+    for row in rows[1:]:
+        cells = row.get("cells", [])
+        for index, values in enumerate(columns):
+            values.append(cells[index].get("value") if index < len(cells) else None)
+    return pa.Table.from_arrays([_column(values) for values in columns], names=headers)
+
+
+def read_upload(path: str, content_type: str) -> pa.Table:
+    kind = media_type(content_type)
+    if kind in PARQUET_TYPES:
+        return pq.read_table(path)
+    if kind in ARROW_STREAM_TYPES or kind in ARROW_FILE_TYPES:
+        with pa.memory_map(path) as source:
+            reader = ipc.open_stream(source) if kind in ARROW_STREAM_TYPES else ipc.open_file(source)
+            return reader.read_all()
+    if kind == "application/json":
+        with open(path, "rb") as f:
+            return sheet_to_table(json.load(f))
+    raise ValueError(f"Unsupported content type: {content_type}")
+
+
+class DatasetStore:
+    """Sheets uploaded once and kept as Arrow IPC files named by a hash of their content.
+
+    Files are written uncompressed to DATASET_DIR, a volume shared with the analyzer
+    containers, which memory-map them instead of receiving the sheet in every request.
+    The store is bounded by DATASET_STORE_BYTES: past it, the datasets least recently
+    uploaded or read (file mtime, touched as requests naming them pass the gateway) are
+    deleted. Analyzers mount the volume read-only.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.directory = directory or os.getenv("DATASET_DIR", "/datasets")
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("DATASET_STORE_BYTES", str(2 << 30)))
+        self.counters = {"uploads": 0, "deduplicated": 0, "evicted": 0}
+        self._sizes: Dict[str, int] = {}
+
+    def start(self):
+        """Create the directory and index datasets kept from earlier runs"""
+        os.makedirs(self.directory, exist_ok=True)
+        for name in os.listdir(self.directory):
+            if name.endswith(SUFFIX):
+                self._sizes[name[:-len(SUFFIX)]] = os.path.getsize(os.path.join(self.directory, name))
+        logger.info(f"Dataset store: {len(self._sizes)} datasets ({self.total_bytes} bytes) in {self.directory}")
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def path(self, handle: str) -> str:
+        if not handle.isalnum():
+            raise KeyError(handle)
+        return os.path.join(self.directory, handle + SUFFIX)
+
+    async def put(self, chunks: AsyncIterator[bytes], content_type: str) -> Dict[str, Any]:
+        """Store an upload and return its handle; re-uploading identical bytes reuses the stored file"""
+        digest = hashlib.blake2b(media_type(content_type).encode("utf-8") + b"\0", digest_size=16)
+        fd, upload = tempfile.mkstemp(dir=self.directory, suffix=".upload")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async for chunk in chunks:
+                    digest.update(chunk)
+                    f.write(chunk)
+            handle = digest.hexdigest()
+            self.counters["uploads"] += 1
+            if handle in self._sizes and os.path.exists(self.path(handle)):
+                self.counters["deduplicated"] += 1
+                os.utime(self.path(handle))
+                return self.info(handle)
+            # Parsing and conversion are CPU-bound; keep them off the event loop
+            size = await asyncio.get_running_loop().run_in_executor(None, self._convert, upload, content_type, handle)
+        finally:
+            os.remove(upload)
+        self._sizes[handle] = size
+        self._evict(keep=handle)
+        return self.info(handle)
+
+    def _convert(self, upload: str, content_type: str, handle: str) -> int:
+        try:
+            table = read_upload(upload, content_type)
+        except pa.ArrowException as e:
+            raise ValueError(f"Could not read {media_type(content_type)} upload: {e}")
+        fd, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f, ipc.new_file(f, table.schema) as writer:
+                writer.write_table(table)
+            size = os.path.getsize(temporary)
+            if size > self.max_bytes:
+                raise DatasetTooLarge(f"Dataset is {size} bytes, the store holds at most {self.max_bytes}")
+            # Rename into place so analyzers never map a partially written file
+            os.replace(temporary, self.path(handle))
+        except BaseException:
+            os.remove(temporary)
+            raise
+        return size
+
+    def info(self, handle: str) -> Dict[str, Any]:
+        """Shape of a stored dataset, read from the Arrow file footer and batch headers only"""
+        path = self.path(handle)
+        try:
+            with pa.memory_map(path) as source:
+                reader = ipc.open_file(source)
+                rows = sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+                columns = reader.schema.names
+        except FileNotFoundError:
+            self._sizes.pop(handle, None)
+            raise KeyError(handle)
+        return {"handle": handle, "rows": rows, "columns": columns, "bytes": self._sizes.get(handle, os.path.getsize(path))}
+
+    def delete(self, handle: str) -> bool:
+        self._sizes.pop(handle, None)
+        try:
+            os.remove(self.path(handle))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def touch(self, handle: Optional[str]):
+        """Record a read of a dataset for eviction; unknown handles are ignored"""
+        if not handle or handle not in self._sizes:
+            return
+        try:
+            os.utime(self.path(handle))
+        except (OSError, KeyError):
+            pass
+
+    def _evict(self, keep: str):
+        """Delete the least recently used datasets until the store fits its size limit"""
+        if self.total_bytes <= self.max_bytes:
+            return
+        candidates = []
+        for handle in self._sizes:
+            if handle != keep:
+                try:
+                    candidates.append((os.path.getmtime(self.path(handle)), handle))
+                except OSError:
+                    candidates.append((0.0, handle))
+        for _, handle in sorted(candidates):
+            if self.total_bytes <= self.max_bytes:
+                break
+            self.delete(handle)
+            self.counters["evicted"] += 1
+            logger.info(f"Evicted dataset {handle}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "datasets": len(self._sizes),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            **self.counters,
+        }
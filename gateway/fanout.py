@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+from router import Route
+from upstream import UpstreamPool
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+DEFAULT_DEADLINE = float(os.getenv("FANOUT_DEADLINE", "30"))
+MAX_DEADLINE = float(os.getenv("FANOUT_MAX_DEADLINE", "300"))
+
+
+def parse_analyzers(values: List[str]) -> List[str]:
+    """Analyzer keys from repeated and/or comma-separated query values, duplicates dropped"""
+    keys: List[str] = []
+    for value in values:
+        for key in value.split(","):
+            key = key.strip()
+            if key and key not in keys:
+                keys.append(key)
+    return keys
+
+
+def parse_deadline(value: Optional[str]) -> float:
+    if value is None:
+        return DEFAULT_DEADLINE
+    deadline = float(value)
+    if deadline <= 0:
+        raise ValueError("deadline must be positive")
+    return min(deadline, MAX_DEADLINE)
+
+
+def _event(fields: Dict[str, Any], response: Optional[bytes] = None) -> bytes:
+    """One result object; a JSON upstream response is spliced in as bytes, not re-encoded"""
+    head = json.dumps(fields, separators=(",", ":")).encode("utf-8")
+    if response is None:
+        return head
+    return head[:-1] + b',"response":' + response + b"}"
+
+
+def _frame(event: bytes, sse: bool, name: str = "result") -> bytes:
+    if sse:
+        return b"event: " + name.encode("ascii") + b"\ndata: " + event + b"\n\n"
+    return event + b"\n"
+
+
+def _json_body(response: httpx.Response) -> Optional[bytes]:
+    """The upstream body if it is JSON that fits on one line, else None"""
+    if "json" not in response.headers.get("content-type", ""):
+        return None
+    content = response.content
+    if b"\n" in content or b"\r" in content:
+        try:
+            return json.dumps(json.loads(content), separators=(",", ":")).encode("utf-8")
+        except ValueError:
+            return None
+    return content
+
+
+async def call_analyzer(
+    client: httpx.AsyncClient,
+    key: str,
+    route: Route,
+    body: bytes,
+    headers: Dict[str, str],
+    params: Dict[str, str],
+    deadline: float,
+) -> Tuple[str, bytes]:
+    """POST the dataset to one analyzer; returns (status, event) and never raises"""
+    started = time.perf_counter()
+
+    def elapsed_ms() -> float:
+        return round((time.perf_counter() - started) * 1000, 1)
+
+    try:
+        response = await asyncio.wait_for(
+            client.post(route.target, content=body, headers=headers, params=params, timeout=deadline),
+            deadline,
+        )
+    except asyncio.TimeoutError:
+        return "timeout", _event({"analyzer": key, "status": "timeout", "elapsed_ms": elapsed_ms(),
+                                  "error": f"No response within {deadline}s"})
+    except httpx.HTTPError as e:
+        logger.error(f"Fan-out call to {key} failed: {e}")
+        return "error", _event({"analyzer": key, "status": "error", "elapsed_ms": elapsed_ms(),
+                                "error": str(e) or type(e).__name__})
+
+    status = "ok" if response.is_success else "error"
+    fields = {"analyzer": key, "status": status, "http_status": response.status_code, "elapsed_ms": elapsed_ms()}
+    content = _json_body(response)
+    if content is None:
+        fields["error"] = response.text[:1000]
+    return status, _event(fields, content)
+
+
+async def fan_out(
+    upstreams: UpstreamPool,
+    calls: List[Tuple[str, Optional[Route]]],
+    body: bytes,
+    headers: Dict[str, str],
+    params: Dict[str, str],
+    deadline: float,
+    sse: bool = False,
+) -> AsyncIterator[bytes]:
+    """Dispatch every call at once and yield each result as soon as it finishes.
+
+    Each call gets the same deadline, so the stream ends after the slowest analyzer (or
+    the deadline), not after the sum of them. A final "done" event carries the counts.
+    """
+    started = time.perf_counter()
+    counts = {"ok": 0, "error": 0, "timeout": 0, "not_found": 0}
+    tasks = []
+    for key, route in calls:
+        if route is None:
+            counts["not_found"] += 1
+            yield _frame(_event({"analyzer": key, "status": "not_found", "error": f"No analyzer registered as {key}"}), sse)
+            continue
+        tasks.append(asyncio.ensure_future(
+            call_analyzer(upstreams.client(route.url), key, route, body, headers, params, deadline)
+        ))
+    try:
+        for finished in asyncio.as_completed(tasks):
+            status, event = await finished
+            counts[status] += 1
+            yield _frame(event, sse)
+    finally:
+        # The client went away or the stream failed: stop the calls still running
+        for task in tasks:
+            task.cancel()
+    summary = {"done": True, **counts, "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)}
+    yield _frame(_event(summary), sse, name="done")
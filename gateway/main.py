@@ -1,5 +1,5 @@
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import httpx
 import json
@@ -8,12 +8,30 @@ import yaml
 import logging
 from datetime import datetime
 
+from upstream import UpstreamPool
+from datasets import DatasetStore, DatasetTooLarge, media_type
+from fanout import NDJSON_MEDIA_TYPE, SSE_MEDIA_TYPE, fan_out, parse_analyzers, parse_deadline
+from router import ServiceRegistry
+from proxy import find_top_level_string, peek_field, stream_upstream
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Analyzer API Gateway")
 
+BACKEND_URL = os.getenv("BACKEND_URL", "http://backend:8000")
+
+# Long-lived upstream connections, opened on startup and closed on shutdown
+upstreams = UpstreamPool()
+
+# Analyzer routes registered by the backend, hot-reloaded when the file changes
+SERVICES_PATH = os.getenv("SERVICES_PATH", "/app/services.json")
+services = ServiceRegistry(SERVICES_PATH, poll_interval=float(os.getenv("SERVICES_RELOAD_INTERVAL", "1.0")))
+
+# Sheets uploaded once as Arrow files on a volume the analyzers memory-map them from
+datasets = DatasetStore()
+
 # Configure CORS
 origins = [
     "http://localhost:3000",
@@ -31,16 +49,30 @@ app.add_middleware(
     max_age=3600,
 )
 
+@app.on_event("startup")
+async def startup():
+    """Open the shared upstream connection pools"""
+    upstreams.register(BACKEND_URL)
+    upstreams.client(BACKEND_URL)
+    services.start()
+    datasets.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Close the shared upstream connection pools"""
+    await services.stop()
+    await upstreams.aclose()
+
 @app.get("/api/backend/health")
 async def backend_health():
     """Forward health check to backend service"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get("http://backend:8000/health")
-            return JSONResponse(
-                content=response.json(),
-                status_code=response.status_code
-            )
+        client = upstreams.client(BACKEND_URL)
+        response = await client.get("/health")
+        return JSONResponse(
+            content=response.json(),
+            status_code=response.status_code
+        )
     except Exception as e:
         logger.error(f"Backend health check failed: {e}")
         return JSONResponse(
@@ -52,25 +84,20 @@ async def backend_health():
 async def create_analyzer(request: Request):
     """Handle analyzer creation requests"""
     try:
-        body = await request.json()
-        logger.info(f"Received create analyzer request for: {body.get('name', 'unknown')}")
-        
-        async with httpx.AsyncClient() as client:
-            logger.info("Forwarding request to backend service")
-            response = await client.post(
-                "http://backend:8000/create-analyzer",
-                json=body,
-                timeout=30.0
-            )
-            
-            logger.info(f"Backend response status: {response.status_code}")
-            response_data = response.json()
-            logger.info(f"Backend response data: {response_data}")
-            
-            return JSONResponse(
-                content=response_data,
-                status_code=response.status_code
-            )
+        def log_name(name):
+            logger.info(f"Received create analyzer request for: {name or 'unknown'}")
+
+        # Pass the raw bytes through both ways; only the leading bytes are scanned for the name
+        client = upstreams.client(BACKEND_URL)
+        logger.info("Forwarding request to backend service")
+        response = await stream_upstream(
+            client,
+            request,
+            "/create-analyzer",
+            content=peek_field(request.stream(), "name", log_name),
+        )
+        logger.info(f"Backend response status: {response.status_code}")
+        return response
     except Exception as e:
         logger.error(f"Error creating analyzer: {e}")
         return JSONResponse(
@@ -78,6 +105,105 @@ async def create_analyzer(request: Request):
             status_code=500
         )
 
+@app.post("/api/backend/create-analyzers")
+async def create_analyzers(request: Request):
+    """Forward batch analyzer creation requests"""
+    try:
+        client = upstreams.client(BACKEND_URL)
+        logger.info("Forwarding batch create request to backend service")
+        return await stream_upstream(client, request, "/create-analyzers")
+    except Exception as e:
+        logger.error(f"Error creating analyzers: {e}")
+        return JSONResponse(
+            content={"error": str(e)},
+            status_code=500
+        )
+
+@app.get("/api/backend/jobs/{job_path:path}")
+async def backend_jobs(job_path: str, request: Request):
+    """Forward job status and progress event streams to backend service"""
+    try:
+        client = upstreams.client(BACKEND_URL)
+        return await stream_upstream(client, request, f"/jobs/{job_path}")
+    except Exception as e:
+        logger.error(f"Error fetching job {job_path}: {e}")
+        return JSONResponse(
+            content={"error": str(e)},
+            status_code=500
+        )
+
+@app.post("/api/datasets")
+async def upload_dataset(request: Request):
+    """Store a sheet once and return the handle analyzers accept in place of the inline payload"""
+    try:
+        info = await datasets.put(request.stream(), request.headers.get("content-type", "application/json"))
+        logger.info(f"Stored dataset {info['handle']} ({info['rows']} rows, {info['bytes']} bytes)")
+        return JSONResponse(content=info, status_code=201)
+    except DatasetTooLarge as e:
+        return JSONResponse(content={"error": str(e)}, status_code=413)
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+    except Exception as e:
+        logger.error(f"Error storing dataset: {e}")
+        return JSONResponse(
+            content={"error": str(e)},
+            status_code=500
+        )
+
+@app.get("/api/datasets")
+async def dataset_stats():
+    """Dataset store usage"""
+    return datasets.stats()
+
+@app.get("/api/datasets/{handle}")
+async def dataset_info(handle: str):
+    """Shape of a stored dataset; 404 once it has been evicted"""
+    try:
+        return datasets.info(handle)
+    except KeyError:
+        return JSONResponse(content={"error": f"Unknown dataset: {handle}"}, status_code=404)
+
+@app.delete("/api/datasets/{handle}")
+async def delete_dataset(handle: str):
+    """Remove a stored dataset"""
+    try:
+        deleted = datasets.delete(handle)
+    except KeyError:
+        deleted = False
+    if not deleted:
+        return JSONResponse(content={"error": f"Unknown dataset: {handle}"}, status_code=404)
+    return {"handle": handle, "deleted": True}
+
+@app.post("/api/fanout")
+async def fan_out_analyzers(request: Request):
+    """Run one dataset through several analyzers concurrently, streaming each result as it finishes.
+
+    ?analyzers=a,b,c names the analyzers by registry key; the body is any /analyze body
+    (a {"dataset": handle} reference, spreadsheet JSON, Arrow or Parquet) and is sent to
+    each of them unchanged. Results stream as NDJSON, or as SSE when the client accepts
+    text/event-stream.
+    """
+    keys = parse_analyzers(request.query_params.getlist("analyzers"))
+    if not keys:
+        return JSONResponse(content={"error": "No analyzers given"}, status_code=400)
+    try:
+        deadline = parse_deadline(request.query_params.get("deadline"))
+    except ValueError as e:
+        return JSONResponse(content={"error": f"Invalid deadline: {e}"}, status_code=400)
+
+    body = await request.body()
+    headers = {"content-type": request.headers.get("content-type", "application/json")}
+    if media_type(headers["content-type"]) == "application/json":
+        datasets.touch(find_top_level_string(body[:64 * 1024], "dataset"))
+    params = {key: value for key, value in request.query_params.items() if key == "encoding"}
+    sse = SSE_MEDIA_TYPE in request.headers.get("accept", "")
+    logger.info(f"Fanning out to {len(keys)} analyzers with a {deadline}s deadline")
+    return StreamingResponse(
+        fan_out(upstreams, [(key, services.service(key)) for key in keys], body, headers, params, deadline, sse),
+        media_type=SSE_MEDIA_TYPE if sse else NDJSON_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/health")
 async def gateway_health():
     """Gateway health check"""
@@ -107,21 +233,18 @@ async def delete_analyzer(analyzer_name: str):
     try:
         logger.info(f"Received delete analyzer request for: {analyzer_name}")
         
-        async with httpx.AsyncClient() as client:
-            logger.info("Forwarding delete request to backend service")
-            response = await client.delete(
-                f"http://backend:8000/delete-analyzer/{analyzer_name}",
-                timeout=30.0
-            )
-            
-            logger.info(f"Backend response status: {response.status_code}")
-            response_data = response.json()
-            logger.info(f"Backend response data: {response_data}")
-            
-            return JSONResponse(
-                content=response_data,
-                status_code=response.status_code
-            )
+        client = upstreams.client(BACKEND_URL)
+        logger.info("Forwarding delete request to backend service")
+        response = await client.delete(f"/delete-analyzer/{analyzer_name}")
+        
+        logger.info(f"Backend response status: {response.status_code}")
+        response_data = response.json()
+        logger.info(f"Backend response data: {response_data}")
+        
+        return JSONResponse(
+            content=response_data,
+            status_code=response.status_code
+        )
     except Exception as e:
         logger.error(f"Error deleting analyzer: {e}")
         return JSONResponse(
@@ -129,4 +252,35 @@ async def delete_analyzer(analyzer_name: str):
             status_code=500
         )
 
-# Remove the general middleware since we have specific endpoints now 
\ No newline at end of file
+# Remove the general middleware since we have specific endpoints now
+
+@app.api_route("/{full_path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
+async def proxy_service(full_path: str, request: Request):
+    """Proxy any other request to the analyzer service registered for its path"""
+    match = services.lookup(request.url.path)
+    if match is None:
+        return JSONResponse(
+            content={"error": f"No service registered for {request.url.path}"},
+            status_code=404
+        )
+
+    route, remainder = match
+    if not route.allows(request.method):
+        return JSONResponse(
+            content={"error": f"Method {request.method} not allowed for {route.path}"},
+            status_code=405
+        )
+
+    try:
+        client = upstreams.client(route.url)
+        content = None
+        if request.method == "POST" and media_type(request.headers.get("content-type")) == "application/json":
+            # Analyzers mount datasets read-only, so reads of a {"dataset": handle} are recorded here
+            content = peek_field(request.stream(), "dataset", datasets.touch)
+        return await stream_upstream(client, request, route.upstream_path(remainder), content=content)
+    except Exception as e:
+        logger.error(f"Error proxying {request.url.path} to {route.service}: {e}")
+        return JSONResponse(
+            content={"error": str(e)},
+            status_code=502
+        )
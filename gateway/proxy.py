@@ -0,0 +1,99 @@
+import re
+import json
+import logging
+from typing import AsyncIterator, Callable, Dict, Iterable, Optional, Tuple
+
+import httpx
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+logger = logging.getLogger(__name__)
+
+# Connection-scoped headers that must not be forwarded by a proxy (RFC 7230 section 6.1)
+HOP_BY_HOP_HEADERS = frozenset([
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "transfer-encoding",
+    "upgrade",
+    "host",
+    "content-length",
+])
+
+
+def filter_headers(headers: Iterable[Tuple[str, str]]) -> Dict[str, str]:
+    """Drop hop-by-hop headers before forwarding"""
+    return {key: value for key, value in headers if key.lower() not in HOP_BY_HOP_HEADERS}
+
+
+_JSON_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[{}\[\]:,]')
+
+
+def find_top_level_string(head: bytes, field: str) -> Optional[str]:
+    """Find a top-level string field in a (possibly truncated) JSON object prefix"""
+    key = json.dumps(field).encode()
+    depth = 0
+    previous = []
+    for match in _JSON_TOKEN.finditer(head):
+        token = match.group()
+        if token in (b"{", b"["):
+            depth += 1
+        elif token in (b"}", b"]"):
+            depth -= 1
+        elif token.startswith(b'"') and depth == 1 and previous[-2:] == [key, b":"]:
+            return json.loads(token)
+        previous = (previous + [token])[-2:]
+    return None
+
+
+async def peek_field(
+    stream: AsyncIterator[bytes],
+    field: str,
+    on_peek: Callable[[Optional[str]], None],
+    limit: int = 64 * 1024,
+) -> AsyncIterator[bytes]:
+    """Pass a JSON byte stream through unchanged while peeking at a top-level string field.
+
+    Only the first `limit` bytes are retained for the peek, so memory stays constant for
+    any body size. `on_peek` is called once, with None if the field is not within the limit.
+    """
+    head = b""
+    peeked = False
+    async for chunk in stream:
+        if not peeked:
+            head += chunk[:limit - len(head)]
+            if len(head) >= limit:
+                on_peek(find_top_level_string(head, field))
+                peeked = True
+                head = b""
+        yield chunk
+    if not peeked:
+        on_peek(find_top_level_string(head, field))
+
+
+async def stream_upstream(
+    client: httpx.AsyncClient,
+    request: Request,
+    path: str,
+    content: Optional[AsyncIterator[bytes]] = None,
+) -> StreamingResponse:
+    """Forward a request to an upstream, streaming the body both ways without buffering it"""
+    has_body = "content-length" in request.headers or "transfer-encoding" in request.headers
+    upstream_request = client.build_request(
+        request.method,
+        path,
+        params=request.query_params,
+        headers=filter_headers(request.headers.items()),
+        content=(content or request.stream()) if has_body else None,
+    )
+    response = await client.send(upstream_request, stream=True)
+    return StreamingResponse(
+        response.aiter_raw(),
+        status_code=response.status_code,
+        headers=filter_headers(response.headers.items()),
+        background=BackgroundTask(response.aclose),
+    )
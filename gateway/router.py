@@ -0,0 +1,164 @@
+import os
+import json
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Route:
+    """A single proxied route compiled from services.json"""
+
+    __slots__ = ("service", "url", "path", "methods", "target")
+
+    def __init__(self, service: str, url: str, path: str, methods: List[str], target: str):
+        self.service = service
+        self.url = url.rstrip("/")
+        self.path = path
+        self.methods = frozenset(m.upper() for m in methods) if methods else None
+        self.target = target or "/"
+
+    def allows(self, method: str) -> bool:
+        return self.methods is None or method.upper() in self.methods
+
+    def upstream_path(self, remainder: str) -> str:
+        """Exact matches go to the route target, deeper paths are forwarded with the prefix stripped"""
+        return remainder if remainder else self.target
+
+
+class _Node:
+    __slots__ = ("children", "route")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.route: Optional[Route] = None
+
+
+def _segments(path: str) -> List[str]:
+    return [segment for segment in path.split("/") if segment]
+
+
+class RouteTable:
+    """Prefix trie of path segments; lookups cost O(path length) regardless of route count"""
+
+    def __init__(self, routes: Optional[List[Route]] = None):
+        self._root = _Node()
+        self.routes: List[Route] = []
+        self._services: Dict[str, Route] = {}
+        for route in routes or []:
+            self.add(route)
+
+    def add(self, route: Route):
+        node = self._root
+        for segment in _segments(route.path):
+            node = node.children.setdefault(segment, _Node())
+        if node.route is not None:
+            logger.warning(f"Route {route.path} from {route.service} overrides {node.route.service}")
+        node.route = route
+        self.routes.append(route)
+        self._services.setdefault(route.service, route)
+
+    def lookup(self, path: str) -> Optional[Tuple[Route, str]]:
+        """Return the longest-prefix route for a path and the unmatched remainder"""
+        segments = _segments(path)
+        node = self._root
+        best: Optional[Tuple[Route, int]] = (node.route, 0) if node.route else None
+        for depth, segment in enumerate(segments, start=1):
+            node = node.children.get(segment)
+            if node is None:
+                break
+            if node.route is not None:
+                best = (node.route, depth)
+        if best is None:
+            return None
+        route, depth = best
+        remainder = "/".join(segments[depth:])
+        return route, f"/{remainder}" if remainder else ""
+
+    def service(self, name: str) -> Optional[Route]:
+        """The first route registered by a service (an analyzer's /analyze route)"""
+        return self._services.get(name)
+
+    @classmethod
+    def from_services(cls, services: List[Dict[str, Any]]) -> "RouteTable":
+        table = cls()
+        for service in services:
+            url = service.get("url")
+            if not url:
+                logger.warning(f"Skipping service without url: {service.get('name', 'unknown')}")
+                continue
+            for entry in service.get("routes", []):
+                table.add(Route(
+                    service=service.get("name", url),
+                    url=url,
+                    path=entry["path"],
+                    methods=entry.get("methods", []),
+                    target=entry.get("target", "/"),
+                ))
+        return table
+
+
+class ServiceRegistry:
+    """Keeps a compiled RouteTable in sync with services.json without restarts"""
+
+    def __init__(self, services_path: str, poll_interval: float = 1.0):
+        self.services_path = services_path
+        self.poll_interval = poll_interval
+        self.table = RouteTable()
+        self._mtime: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def reload(self, force: bool = False) -> bool:
+        """Recompile the route table if services.json changed; returns True when swapped"""
+        try:
+            mtime = os.stat(self.services_path).st_mtime
+        except FileNotFoundError:
+            if self._mtime is not None or force:
+                logger.info(f"Services file {self.services_path} not found, clearing routes")
+                self.table = RouteTable()
+                self._mtime = None
+                return True
+            return False
+
+        if not force and mtime == self._mtime:
+            return False
+
+        try:
+            with open(self.services_path) as f:
+                services = json.load(f)
+            table = RouteTable.from_services(services)
+        except Exception as e:
+            # Keep serving the previous table if the file is mid-write or invalid
+            logger.error(f"Failed to load services from {self.services_path}: {e}")
+            return False
+
+        self.table = table
+        self._mtime = mtime
+        logger.info(f"Loaded {len(table.routes)} routes from {self.services_path}")
+        return True
+
+    def lookup(self, path: str) -> Optional[Tuple[Route, str]]:
+        return self.table.lookup(path)
+
+    def service(self, name: str) -> Optional[Route]:
+        return self.table.service(name)
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            self.reload()
+
+    def start(self):
+        self.reload(force=True)
+        if self._task is None:
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
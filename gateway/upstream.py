@@ -0,0 +1,120 @@
+import os
+import logging
+from typing import Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class UpstreamSettings:
+    """Connection settings for a single upstream service"""
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        http2: Optional[bool] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        write_timeout: Optional[float] = None,
+        pool_timeout: Optional[float] = None,
+    ):
+        self.max_connections = max_connections if max_connections is not None else _env_int("UPSTREAM_MAX_CONNECTIONS", 100)
+        self.max_keepalive_connections = (
+            max_keepalive_connections if max_keepalive_connections is not None
+            else _env_int("UPSTREAM_MAX_KEEPALIVE", 20)
+        )
+        self.keepalive_expiry = keepalive_expiry if keepalive_expiry is not None else _env_float("UPSTREAM_KEEPALIVE_EXPIRY", 30.0)
+        self.http2 = http2 if http2 is not None else _env_bool("UPSTREAM_HTTP2", False)
+        self.connect_timeout = connect_timeout if connect_timeout is not None else _env_float("UPSTREAM_CONNECT_TIMEOUT", 5.0)
+        self.read_timeout = read_timeout if read_timeout is not None else _env_float("UPSTREAM_READ_TIMEOUT", 30.0)
+        self.write_timeout = write_timeout if write_timeout is not None else _env_float("UPSTREAM_WRITE_TIMEOUT", 30.0)
+        self.pool_timeout = pool_timeout if pool_timeout is not None else _env_float("UPSTREAM_POOL_TIMEOUT", 10.0)
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=self.read_timeout,
+            write=self.write_timeout,
+            pool=self.pool_timeout,
+        )
+
+
+class UpstreamPool:
+    """App-lifetime pool of keep-alive HTTP clients, one per upstream base URL"""
+
+    def __init__(self, default_settings: Optional[UpstreamSettings] = None):
+        self.default_settings = default_settings or UpstreamSettings()
+        self._settings: Dict[str, UpstreamSettings] = {}
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def register(self, base_url: str, settings: Optional[UpstreamSettings] = None):
+        """Register per-upstream settings; takes effect the next time the client is created"""
+        self._settings[base_url.rstrip("/")] = settings or self.default_settings
+
+    def client(self, base_url: str) -> httpx.AsyncClient:
+        """Return the shared client for an upstream, creating it on first use"""
+        key = base_url.rstrip("/")
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            settings = self._settings.get(key, self.default_settings)
+            http2 = settings.http2
+            if http2 and not _http2_available():
+                logger.warning("HTTP/2 requested but the 'h2' package is not installed, falling back to HTTP/1.1")
+                http2 = False
+            client = httpx.AsyncClient(
+                base_url=key,
+                limits=settings.limits(),
+                timeout=settings.timeout(),
+                http2=http2,
+            )
+            self._clients[key] = client
+            logger.info(
+                f"Opened upstream pool for {key} (max_connections={settings.max_connections}, "
+                f"keepalive={settings.max_keepalive_connections}, http2={http2})"
+            )
+        return client
+
+    async def aclose(self):
+        """Close every pooled client"""
+        for key, client in list(self._clients.items()):
+            try:
+                await client.aclose()
+                logger.info(f"Closed upstream pool for {key}")
+            except Exception as e:
+                logger.error(f"Error closing upstream pool for {key}: {e}")
+        self._clients.clear()
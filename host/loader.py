@@ -0,0 +1,117 @@
+import os
+import re
+import shutil
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from analyzer_runtime.reloading import CodeLoader, LoadedVersion, snapshot_directory
+
+logger = logging.getLogger(__name__)
+
+ANALYZER_NAME = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+
+
+class AnalyzerHost:
+    """Generated analyzers imported from ANALYZER_CODE_DIR into this process.
+
+    Every subdirectory with a main.py is one analyzer, served under its directory
+    name. The directory is polled: new analyzers are loaded, changed ones loaded
+    again as a new version, and removed ones dropped, all without a restart.
+    Requests already running keep the version they started on.
+    """
+
+    def __init__(self, code_dir: Optional[str] = None, poll_interval: Optional[float] = None):
+        self.code_dir = os.path.abspath(code_dir or os.getenv("ANALYZER_CODE_DIR", "/analyzers"))
+        self.poll_interval = poll_interval if poll_interval is not None else float(os.getenv("HOST_SCAN_INTERVAL", "1.0"))
+        # Loaders outlive unloads so an analyzer added back continues its version numbers
+        self.loaders: Dict[str, CodeLoader] = {}
+        # Analysis workers import versions from here; set up before the executor starts them
+        self.snapshots = snapshot_directory()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, name: str) -> Optional[LoadedVersion]:
+        loader = self.loaders.get(name)
+        return loader.current if loader is not None else None
+
+    @property
+    def served(self) -> Dict[str, CodeLoader]:
+        return {name: loader for name, loader in self.loaders.items() if loader.current is not None}
+
+    def _loader(self, name: str) -> CodeLoader:
+        if not ANALYZER_NAME.match(name):
+            raise ValueError(f"Invalid analyzer name: {name}")
+        if name not in self.loaders:
+            self.loaders[name] = CodeLoader(name, os.path.join(self.code_dir, name, "main.py"), self.snapshots)
+        return self.loaders[name]
+
+    async def load(self, name: str) -> LoadedVersion:
+        """Load an analyzer, or its changed code if it is already served; new requests switch at once"""
+        async with self._lock:
+            return await self._loader(name).load()
+
+    async def unload(self, name: str) -> bool:
+        async with self._lock:
+            loader = self.loaders.get(name)
+            if loader is None:
+                return False
+            loader.failed = None
+            if not loader.unload():
+                return False
+            logger.info(f"Unloaded analyzer {name}")
+            return True
+
+    def _discover(self) -> Dict[str, str]:
+        """Analyzer directories that have a main.py"""
+        found = {}
+        try:
+            entries = list(os.scandir(self.code_dir))
+        except FileNotFoundError:
+            return found
+        for entry in entries:
+            if entry.is_dir() and ANALYZER_NAME.match(entry.name) and os.path.exists(os.path.join(entry.path, "main.py")):
+                found[entry.name] = entry.path
+        return found
+
+    async def scan(self):
+        """Bring the served analyzers in line with the code directory"""
+        found = await asyncio.to_thread(self._discover)
+        for name in [name for name in self.loaders if name not in found]:
+            await self.unload(name)
+        for name in found:
+            if not self._loader(name).stale():
+                continue
+            try:
+                await self.load(name)
+            except Exception as e:
+                logger.error(f"Failed to load analyzer {name}: {e}")
+
+    async def _poll(self):
+        while True:
+            try:
+                await self.scan()
+            except Exception as e:
+                logger.error(f"Scanning {self.code_dir} failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._poll())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        shutil.rmtree(self.snapshots, ignore_errors=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "code_dir": self.code_dir,
+            "analyzers": {name: loader.stats() for name, loader in sorted(self.served.items())},
+            "failed": {name: loader.failed[1] for name, loader in sorted(self.loaders.items()) if loader.failed},
+        }
@@ -0,0 +1,111 @@
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+import os
+import logging
+from datetime import datetime
+
+from analyzer_runtime.executor import AnalysisExecutor
+from analyzer_runtime.hosting import share_executor, shared_partitions
+from analyzer_runtime.reloading import start_worker
+from loader import AnalyzerHost
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Generated analyzers under ANALYZER_CODE_DIR, loaded and dropped as their directories come and go
+host = AnalyzerHost()
+
+# One pool of analysis workers for every hosted analyzer; workers import an analyzer's module
+# the first time they run its code, so pandas and numpy are loaded once per worker, not per analyzer
+executor = AnalysisExecutor(initializer=start_worker)
+share_executor(executor)
+
+admin = FastAPI(title="Analyzer Host")
+
+
+@admin.on_event("startup")
+async def startup():
+    await executor.start()
+    await host.scan()
+    host.start()
+
+
+@admin.on_event("shutdown")
+async def shutdown():
+    await host.stop()
+    executor.shutdown()
+    shared_partitions().shutdown()
+
+
+@admin.get("/health")
+async def health_check():
+    return {
+        "status": "healthy",
+        "service": "analyzer-host",
+        "analyzers": len(host.served),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@admin.get("/info")
+async def get_info():
+    """Executor and loaded analyzers"""
+    return {"status": "running", "pid": os.getpid(), "executor": executor.stats(), **host.stats()}
+
+
+@admin.get("/analyzers")
+async def list_analyzers():
+    return host.stats()
+
+
+@admin.put("/analyzers/{name}")
+async def load_analyzer(name: str):
+    """Load an analyzer from ANALYZER_CODE_DIR/<name> now, or reload it, instead of waiting for the next scan"""
+    try:
+        hosted = await host.load(name)
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+    except FileNotFoundError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=404)
+    except Exception as e:
+        logger.error(f"Failed to load analyzer {name}: {e}")
+        return JSONResponse(content={"error": f"Failed to load {name}: {e}"}, status_code=422)
+    return {"name": name, **hosted.stats()}
+
+
+@admin.delete("/analyzers/{name}")
+async def unload_analyzer(name: str):
+    """Stop serving an analyzer; a later scan loads it again if its code is still there"""
+    if not await host.unload(name):
+        return JSONResponse(content={"error": f"Unknown analyzer: {name}"}, status_code=404)
+    return {"name": name, "status": "unloaded"}
+
+
+class HostDispatcher:
+    """ASGI entry point: /<name>/<path> goes to the hosted analyzer <name> as /<path>, the rest to the admin API"""
+
+    def __init__(self, host: AnalyzerHost, admin: FastAPI):
+        self.host = host
+        self.admin = admin
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket"):
+            name, _, rest = scope["path"][1:].partition("/")
+            hosted = self.host.get(name)
+            if hosted is not None:
+                prefix = f"/{name}"
+                scope = {
+                    **scope,
+                    "path": f"/{rest}",
+                    "raw_path": scope.get("raw_path", b"")[len(prefix):] or None,
+                    "root_path": scope.get("root_path", "") + prefix,
+                }
+                # The version stays importable for the pool until requests on it finish, even after a reload
+                with hosted.serving():
+                    await hosted.app(scope, receive, send)
+                return
+        await self.admin(scope, receive, send)
+
+
+app = HostDispatcher(host, admin)
@@ -8,6 +8,8 @@ const yaml = require('yaml');
 const registryPath = path.join(process.cwd(), 'src', 'app', 'analyzers', 'registry.json');
 const composePath = path.join(process.cwd(), 'docker-compose.yml');
 const analyticsCodePath = path.join(process.cwd(), 'src', 'app', 'analyticscode');
+// With a shared analyzer host, analyzers are loaded from analyticscode by the host; no containers to manage
+const analyzerHostUrl = process.env.ANALYZER_HOST_URL;
 
 // Function to add service to docker-compose
 function addServiceToCompose(analyzer, compose) {
@@ -18,12 +20,15 @@ function addServiceToCompose(analyzer, compose) {
     },
     networks: ['analyzer-network'],
     volumes: [
-      `./src/app/analyticscode/${analyzer}:/app:ro`
+      `./src/app/analyticscode/${analyzer}:/app:ro`,
+      // The gateway's uploaded sheets, read by {"dataset": handle} requests
+      './datasets:/datasets:ro'
     ],
     environment: [
       `SERVICE_NAME=${analyzer}`,
       'SERVICE_PORT=8000',
-      'PYTHONPATH=/app'
+      'PYTHONPATH=/app',
+      'DATASET_DIR=/datasets'
     ],
     user: '${DOCKER_UID}:${DOCKER_GID}',
     restart: 'unless-stopped',
@@ -153,6 +158,10 @@ const watcher = chokidar.watch(registryPath, {
 let debounceTimer;
 
 watcher.on('change', async (filePath) => {
+  if (analyzerHostUrl) {
+    console.log(`Registry changed. Analyzers are served by the analyzer host at ${analyzerHostUrl}`);
+    return;
+  }
   console.log('Registry changed. Checking analyzers...');
   
   clearTimeout(debounceTimer);
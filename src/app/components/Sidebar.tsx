@@ -8,6 +8,7 @@ import { AnalyzerCreationWizard } from './analyzer-wizard/AnalyzerCreationWizard
 import { AnalyzerConfig } from '@/types/analyzer';
 import { SpreadsheetData } from '@/types';
 import { useAnalyzerStore } from '../store/analyzerStore';
+import { waitForJob } from '../utils/analyzerJobs';
 import { 
   Settings2, 
   Plus, 
@@ -134,6 +135,11 @@ const Sidebar: React.FC<SidebarProps> = ({
         throw new Error(data.details || data.error || 'Failed to create analyzer');
       }
 
+      // A 202 only means creation was queued; wait for the job to finish
+      if (data.jobId) {
+        await waitForJob(data.jobId);
+      }
+
       // Rest of your code...
     } catch (error) {
       console.error('Error in handleCreateAnalyzer:', error);
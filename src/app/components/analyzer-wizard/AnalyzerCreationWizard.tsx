@@ -9,6 +9,7 @@ import { InputDefinitionStep } from './InputDefinitionStep'
 import { RulesDefinitionStep } from './RulesDefinitionStep'
 import { OutputDefinitionStep } from './OutputDefinitionStep'
 import { AnalyzerTypeStep } from './AnalyzerTypeStep'
+import { waitForJob } from '../../utils/analyzerJobs'
 
 interface AnalyzerCreationWizardProps {
   onComplete: (config: any) => void;
@@ -253,6 +254,19 @@ export const AnalyzerCreationWizard: React.FC<AnalyzerCreationWizardProps> = ({
         throw new Error(data.details || data.error || 'Failed to create analyzer');
       }
 
+      // Creation is queued as a job; only its success means the analyzer exists
+      if (data.jobId) {
+        await waitForJob(data.jobId, job => {
+          if (job.stage === 'registering_gateway') {
+            setCreationStages(stages => stages.map((stage, index) => 
+              index <= 1 ? { ...stage, status: 'complete' }
+              : index === 2 ? { ...stage, status: 'in-progress' }
+              : stage
+            ));
+          }
+        });
+      }
+
       setCreationStages(stages => stages.map((stage, index) => 
         index <= 1 ? { ...stage, status: 'complete' }
         : index === 2 ? { ...stage, status: 'in-progress' }
@@ -0,0 +1,38 @@
+// Same-origin path; next.config.js rewrites /api/backend to the backend
+const BACKEND_URL = '/api/backend';
+
+export type JobStatus = 'queued' | 'running' | 'succeeded' | 'failed';
+
+export interface AnalyzerJob {
+  id: string;
+  kind: string;
+  status: JobStatus;
+  stage: string | null;
+  result: any;
+  error: string | null;
+}
+
+// create-analyzer answers 202 with a job id; the analyzer exists only once that job has succeeded
+export async function waitForJob(
+  jobId: string,
+  onUpdate?: (job: AnalyzerJob) => void,
+  intervalMs = 1000
+): Promise<AnalyzerJob> {
+  while (true) {
+    const response = await fetch(`${BACKEND_URL}/jobs/${jobId}`);
+    const job = await response.json();
+
+    if (!response.ok) {
+      throw new Error(job.detail || job.error || `Could not read job ${jobId}`);
+    }
+
+    onUpdate?.(job);
+    if (job.status === 'succeeded') {
+      return job;
+    }
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Failed to create analyzer');
+    }
+    await new Promise(resolve => setTimeout(resolve, intervalMs));
+  }
+}